@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -8,14 +8,99 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///data/app.db"
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    sqlite_wal: bool = True
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 30000
     data_dir: Path = Path("data")
     mistral_api_key: str | None = None
+    mistral_server_url: str | None = None
+    mistral_model: str = "mistral-large-latest"
+    mistral_timeout_seconds: float = 60.0
     frontend_origins: List[str] = [
         "http://localhost:5173",
         "http://127.0.0.1:5173",
         "http://localhost:8080",
     ]
     api_prefix: str = "/api"
+    events_max_streams: int = 12
+    queue_embedded_worker: bool = True
+    queue_max_concurrency: int = 4
+    queue_lease_seconds: int = 60
+    queue_poll_interval: float = 1.0
+    queue_max_attempts: int = 3
+    scheduler_interactive_max_pages: int = 20
+    scheduler_fair_share: Literal["client", "folder", "none"] = "client"
+    scheduler_max_wait_seconds: int = 900
+    scheduler_reserved_interactive_slots: int = 1
+    scheduler_metrics_window_hours: int = 24
+    job_progress_write_interval: float = 2.0
+    worker_threads: int = 2
+    worker_processes: int = 0
+    worker_max_jobs_per_process: int = 50
+    worker_max_rss_mb: int = 3072
+    worker_preload_converter: bool = True
+    ocr_default_engine: str = "auto"
+    ocr_auto_fallback_engine: str = "docling"
+    ocr_text_min_chars_per_page: int = 50
+    ocr_text_min_coverage: float = 0.5
+    ocr_shard_pages: int = 0
+    ocr_shard_min_pages: int = 40
+    ocr_shard_workers: int = 2
+    upload_max_bytes: int = 1024 * 1024 * 1024
+    upload_chunk_size: int = 8 * 1024 * 1024
+    upload_session_ttl_hours: int = 24
+    hotfolder_dirs: str = ""
+    hotfolder_archive_dir: Optional[Path] = None
+    hotfolder_settle_seconds: float = 5.0
+    hotfolder_poll_interval: float = 10.0
+    hotfolder_inotify: bool = True
+    hotfolder_engine: Optional[str] = None
+    hotfolder_priority: Literal["interactive", "bulk"] = "bulk"
+    hotfolder_batch_size: int = 200
+    text_store_chunk_chars: int = 4000
+    text_store_compression_level: int = 6
+    text_excerpt_chars: int = 300
+    search_enabled: bool = True
+    search_common_term_pages: int = 20000
+    search_index_batch_size: int = 50
+    search_index_interval: float = 5.0
+    download_accel_redirect: Optional[str] = None
+    download_precompress: bool = True
+    download_precompress_min_bytes: int = 1024
+    storage_keep_uploads: bool = False
+    storage_upload_retention_hours: float = 0.0
+    storage_result_retention_days: int = 0
+    storage_cold_after_days: int = 7
+    storage_zstd_level: int = 10
+    storage_derived_max_bytes: int = 2 * 1024 * 1024 * 1024
+    storage_conversions_max_bytes: int = 1024 * 1024 * 1024
+    storage_cleanup_interval: float = 60.0
+    storage_cleanup_batch_size: int = 200
+    storage_backend: Literal["local", "s3"] = "local"
+    storage_s3_bucket: Optional[str] = None
+    storage_s3_prefix: str = ""
+    storage_s3_endpoint_url: Optional[str] = None
+    storage_s3_region: Optional[str] = None
+    storage_s3_access_key_id: Optional[str] = None
+    storage_s3_secret_access_key: Optional[str] = None
+    storage_s3_multipart_threshold: int = 16 * 1024 * 1024
+    storage_s3_multipart_chunk_size: int = 16 * 1024 * 1024
+    storage_s3_max_concurrency: int = 4
+    storage_s3_presign_seconds: int = 900
+    storage_s3_local_copies_max_bytes: int = 10 * 1024 * 1024 * 1024
+    batch_max_files: int = 1000
+    batch_max_bytes: int = 4 * 1024 * 1024 * 1024
+    result_cache_enabled: bool = True
+    result_cache_max_bytes: int = 1024 * 1024 * 1024
+    summary_concurrency: int = 2
+    summary_batch_size: int = 8
+    summary_rate_per_minute: int = 60
+    summary_max_attempts: int = 5
+    summary_retry_base_seconds: float = 10.0
+    summary_cache_ttl_days: int = 180
+    summary_cache_max_entries: int = 50000
 
     @model_validator(mode="after")
     def normalize_prefix(self) -> "Settings":
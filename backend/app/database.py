@@ -1,6 +1,8 @@
 from contextlib import contextmanager
 from typing import Iterator
 
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
 from sqlmodel import Session, SQLModel, create_engine
 
@@ -8,16 +10,117 @@ from .config import get_settings
 
 
 settings = get_settings()
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(str(settings.database_url), connect_args=connect_args, echo=False)
+
+
+def _is_file_sqlite(database_url: str) -> bool:
+    return database_url.startswith("sqlite") and ":memory:" not in database_url and database_url.rstrip("/") != "sqlite:"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def build_engine(database_url: str, *, tuned: bool = True) -> Engine:
+    """Create the engine; ``tuned`` applies the production SQLite profile.
+
+    The profile switches file databases to WAL so readers never block the
+    writer, relaxes fsync to ``synchronous=NORMAL`` (safe under WAL), waits on
+    locks instead of failing with "database is locked", and sizes the pool for
+    the web threads plus OCR workers of one process.
+    """
+    if not database_url.startswith("sqlite"):
+        return create_engine(
+            database_url,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_pre_ping=True,
+            echo=False,
+        )
+    connect_args = {"check_same_thread": False}
+    if not tuned or not _is_file_sqlite(database_url):
+        return create_engine(database_url, connect_args=connect_args, echo=False)
+
+    connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    sqlite_engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        echo=False,
+    )
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    return sqlite_engine
+
+
+engine = build_engine(str(settings.database_url))
+
+
+def _column_default_sql(column) -> str | None:
+    default = column.default
+    if default is None or not default.is_scalar:
+        return None
+    value = default.arg
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return None
+
+
+def add_missing_columns() -> None:
+    """Add columns declared on the models but missing from existing tables.
+
+    ``create_all`` only creates new tables, so databases created by an older
+    release would otherwise never see the new job columns. Columns with a
+    ``default_factory`` are added without a default and stay NULL on existing
+    rows; list them in ``migrations.COLUMN_BACKFILLS``.
+    """
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+            default_sql = _column_default_sql(column)
+            if default_sql is not None:
+                ddl += f" DEFAULT {default_sql}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(ddl))
+            except OperationalError as exc:  # pragma: no cover - concurrent startup
+                if "duplicate column" not in str(exc).lower():
+                    raise
 
 
 def init_db() -> None:
+    from . import models  # noqa: F401  # register tables on the metadata
+
     try:
         SQLModel.metadata.create_all(engine, checkfirst=True)
     except OperationalError as exc:  # pragma: no cover - defensive branch
         if "already exists" not in str(exc).lower():
             raise
+    add_missing_columns()
+
+    from .migrations import run_migrations
+
+    run_migrations(engine)
 
 
 @contextmanager
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+from .database import init_db
+from .services.hotfolder import HotFolderIngestor, watched_roots
+from .services.ocr import ensure_storage_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Hot-folder ingest daemon")
+    parser.add_argument("directories", nargs="*", type=Path, help="Directories to watch (overrides HOTFOLDER_DIRS)")
+    parser.add_argument("--once", action="store_true", help="Ingest the files already present and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    settings = get_settings()
+    init_db()
+    ensure_storage_dirs(settings.data_dir)
+
+    roots = [directory.resolve() for directory in args.directories] or watched_roots()
+    missing = [root for root in roots if not root.is_dir()]
+    if not roots or missing:
+        parser.error(f"No directories to watch: {', '.join(map(str, missing)) or 'set HOTFOLDER_DIRS'}")
+
+    ingestor = HotFolderIngestor(roots)
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):  # pragma: no cover - signal handler
+        logger.info("Received signal %s, stopping", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    ingestor.poll()
+    if args.once:
+        # Nothing else writes the files, so there is no need to wait for them to settle.
+        # ingest takes at most hotfolder_batch_size files per call.
+        while ingestor.pending and not stop_event.is_set():
+            chunk = sorted(ingestor.pending)[: settings.hotfolder_batch_size]
+            ingestor.ingest(chunk)
+            for path in chunk:
+                ingestor.pending.pop(path, None)
+        return
+
+    ingestor.start_watching()
+    logger.info(
+        "Watching %s (%s)", ", ".join(map(str, roots)), "inotify + polling" if ingestor.watcher else "polling"
+    )
+    tick = min(1.0, settings.hotfolder_settle_seconds)
+    try:
+        while not stop_event.is_set():
+            ingestor.wait_for_events(tick)
+            ready = ingestor.ready()
+            while ready and not stop_event.is_set():
+                started = time.perf_counter()
+                created = ingestor.ingest(ready)
+                logger.debug("Ingested %s files in %.2fs", created, time.perf_counter() - started)
+                ready = ingestor.ready()
+    finally:
+        ingestor.close()
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution helper
+    main()
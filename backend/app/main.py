@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import itertools
 import json
 import logging
+import queue
 import time
-from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable
 
-from flask import Flask, abort, jsonify, make_response, request, send_file
+from flask import Flask, Response, abort, jsonify, make_response, request
 from flask_cors import CORS
 from pydantic import ValidationError
 from werkzeug.utils import secure_filename
@@ -16,33 +18,82 @@ from sqlmodel import select
 
 from .config import get_settings
 from .database import get_session, init_db
-from .models import OCRJob, WordDocument
+from .models import OCRBatch, OCRJob, UploadSession, WordDocument
 from .schemas import (
     FolderCreate,
     FolderUpdate,
+    OCRBatchRead,
     OCRJobDetail,
     OCRJobUpdate,
     SettingResponse,
     SettingUpdate,
+    UploadSessionCreate,
+    UploadSessionRead,
     WordConvertResponse,
     WordGenerateRequest,
     WordGenerateResponse,
 )
+from .services.batches import (
+    BatchError,
+    ByteBudget,
+    archive_sources,
+    batch_progress,
+    create_batch,
+    multipart_sources,
+)
 from .services.ocr import (
+    JOB_LIST_DEFAULT_FIELDS,
+    JOB_LIST_FIELDS,
+    JobParams,
+    build_job,
+    discard_uploads,
     ensure_storage_dirs,
     get_default_engine,
-    process_job,
+    job_list_columns,
+    new_upload_path,
+    project_job_row,
+    publish_job_event,
     serialize_job,
     serialize_job_detail,
     set_default_engine,
 )
+from .services.textstore import read_pages
+from .services.downloads import remote_download, send_download, set_disposition, variant_paths
+from .services.engines import available_engines, engine_names
+from .services.filestore import publish_path
+from .services.events import broker, publish_event
+from .services.listing import ListingError, fetch_listing, listing_etag, parse_listing_params
+from .services.result_cache import evict_orphaned_results, release_result
+from .services.scheduler import PRIORITY_CLASSES, scheduler_metrics
+from .services.search import (
+    SearchError,
+    index_status,
+    remove_job_from_index,
+    request_reindex,
+    retag_job,
+    search_available,
+    search_pages,
+)
+from .services.storage import hot_path, remove_file, remove_output, result_exists, storage_usage, touch_files
+from .services.uploads import (
+    StreamingUploadRequest,
+    append_upload_chunk,
+    claim_upload_session,
+    create_upload_session,
+    delete_upload_session,
+    expire_upload_sessions,
+    save_upload,
+)
 from .services.word import (
+    WORD_DOCUMENT_LIST_FIELDS,
+    convert_job_to_word,
     convert_pdf_to_word,
     create_word_document_from_text,
     documents_dir,
     get_document,
-    list_documents,
+    project_word_document_row,
     serialize_word_document,
+    word_document_list_columns,
 )
 from .services.folder import (
     create_folder as create_folder_service,
@@ -51,13 +102,18 @@ from .services.folder import (
     get_folder,
     list_folders,
     serialize_folder,
+    serialize_folders,
     update_folder as update_folder_service,
 )
+from .worker import start_embedded_worker
 
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-executor = ThreadPoolExecutor(max_workers=4)
+
+EVENT_KEEPALIVE_SECONDS = 15
+EVENT_RETRY_MS = 3000
+EVENT_BUSY_RETRY_MS = 30000
 
 
 def json_response(data: Any, status_code: int = 200):
@@ -134,6 +190,68 @@ def health() -> Any:
     return json_response({"status": "ok"})
 
 
+@route("/ocr/engines", methods=["GET"])
+def list_ocr_engines() -> Any:
+    return json_response([engine.describe() for engine in available_engines()])
+
+
+@route("/ocr/scheduler/metrics", methods=["GET"])
+def get_scheduler_metrics() -> Any:
+    window_hours = request.args.get("window_hours", type=int)
+    with get_session() as session:
+        return json_response(scheduler_metrics(session, window_hours))
+
+
+@route("/search", methods=["GET"])
+def search() -> Any:
+    if not search_available():
+        abort(json_response({"detail": "Căutarea nu este disponibilă"}, 503))
+    engine_name = request.args.get("engine") or None
+    if engine_name and engine_name not in engine_names():
+        abort(json_response({"detail": "Engine invalid"}, 400))
+    with get_session() as session:
+        try:
+            results = search_pages(
+                session,
+                request.args.get("q", ""),
+                folder_id=request.args.get("folder_id", type=int),
+                engine_name=engine_name,
+                limit=request.args.get("limit", 20, type=int),
+                offset=request.args.get("offset", 0, type=int),
+            )
+        except SearchError as exc:
+            abort(json_response({"detail": str(exc)}, 400))
+    return json_response(results)
+
+
+@route("/search/status", methods=["GET"])
+def get_search_status() -> Any:
+    with get_session() as session:
+        return json_response(index_status(session))
+
+
+@route("/search/reindex", methods=["POST"])
+def reindex_search() -> Any:
+    if not search_available():
+        abort(json_response({"detail": "Căutarea nu este disponibilă"}, 503))
+    payload = request.get_json(silent=True) or {}
+    try:
+        folder_id = int(payload["folder_id"]) if payload.get("folder_id") is not None else None
+        job_id = int(payload["job_id"]) if payload.get("job_id") is not None else None
+    except (TypeError, ValueError):
+        abort(json_response({"detail": "Parametri invalizi"}, 400))
+    with get_session() as session:
+        queued = request_reindex(session, folder_id=folder_id, job_id=job_id)
+        status = index_status(session)
+    return json_response({"queued": queued, **status}, 202)
+
+
+@route("/storage/usage", methods=["GET"])
+def get_storage_usage() -> Any:
+    with get_session() as session:
+        return json_response(storage_usage(session))
+
+
 @route("/settings/ocr-engine", methods=["GET"])
 def get_ocr_engine() -> Any:
     with get_session() as session:
@@ -146,34 +264,94 @@ def get_ocr_engine() -> Any:
 def update_ocr_engine() -> Any:
     payload = request.get_json(silent=True) or {}
     data = parse_model(SettingUpdate, payload)
-    if data.engine not in {"docling", "ocrmypdf"}:
+    if data.engine not in engine_names():
         abort(json_response({"detail": "Engine invalid"}, 400))
     with get_session() as session:
         set_default_engine(session, data.engine)
     return json_response(SettingResponse(engine=data.engine).model_dump())
 
 
+def _listing_params(model, allowed_fields: list[str], filter_columns: dict[str, Callable[[str], Any]]):
+    try:
+        return parse_listing_params(
+            request.args, model, allowed_fields=allowed_fields, filter_columns=filter_columns
+        )
+    except ListingError as exc:
+        abort(json_response({"detail": str(exc)}, 400))
+
+
+def _not_modified(etag: str):
+    response = make_response("", 304)
+    response.set_etag(etag)
+    return response
+
+
+def _listing_response(items: list[dict[str, Any]], next_cursor: str | None, params, etag: str):
+    body = {"items": items, "next_cursor": next_cursor} if params.paginated else items
+    response = json_response(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 @route("/ocr/jobs", methods=["GET"])
 def list_ocr_jobs() -> Any:
+    params = _listing_params(
+        OCRJob, JOB_LIST_FIELDS, {"status": str, "engine": str, "folder_id": int, "batch_id": int}
+    )
+    fields = params.fields or JOB_LIST_DEFAULT_FIELDS
     with get_session() as session:
-        statement = select(OCRJob).order_by(OCRJob.created_at.desc())
-        jobs = session.exec(statement).all()
-        serialized = [serialize_job(job, settings.api_prefix).model_dump() for job in jobs]
-    return json_response(serialized)
-
+        etag = listing_etag(session, OCRJob, params, request.query_string)
+        if etag in request.if_none_match:
+            return _not_modified(etag)
+        rows, next_cursor = fetch_listing(session, OCRJob, params, job_list_columns(fields))
+    items = [project_job_row(row, fields, settings.api_prefix) for row in rows]
+    return _listing_response(items, next_cursor, params, etag)
+
+
+@route("/events", methods=["GET"])
+@route("/ocr/jobs/events", methods=["GET"])
+def stream_events():
+    # Every stream holds a request thread while it is open, so past the cap
+    # clients are turned away instead of starving the rest of the API.
+    subscriber = broker.subscribe(limit=settings.events_max_streams)
+    if subscriber is None:
+        response = Response(f"retry: {EVENT_BUSY_RETRY_MS}\n\n", 503, mimetype="text/event-stream")
+        response.headers["Retry-After"] = str(EVENT_BUSY_RETRY_MS // 1000)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    def generate():
+        try:
+            yield f"retry: {EVENT_RETRY_MS}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            broker.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
-@route("/ocr/jobs", methods=["POST"])
-def create_ocr_job() -> Any:
-    file = request.files.get("file")
-    if file is None or not file.filename:
-        abort(json_response({"detail": "Fișier invalid"}, 400))
 
+def _job_params(session) -> JobParams:
+    """Read the upload options shared by the single-file and batch endpoints."""
     auto_detect = request.form.get("auto_detect", "true").lower() in {"true", "1", "yes", "on"}
     language = request.form.get("language") or None
     folder = request.form.get("folder") or None
     folder_id_raw = request.form.get("folder_id")
     engine_override = request.form.get("engine_override") or None
     options_raw = request.form.get("options")
+    priority = request.form.get("priority") or None
+    client_id = request.headers.get("X-Client-Id") or request.form.get("client_id") or request.remote_addr
+    if priority is not None and priority not in PRIORITY_CLASSES:
+        abort(json_response({"detail": "Prioritate invalidă"}, 400))
 
     folder_id = None
     if folder_id_raw:
@@ -186,42 +364,112 @@ def create_ocr_job() -> Any:
         options_payload = json.loads(options_raw) if options_raw else None
     except json.JSONDecodeError as exc:
         logger.warning("Invalid options payload: %s", exc)
-        return json_response({"detail": "Opțiuni invalide"}, 400)
+        abort(json_response({"detail": "Opțiuni invalide"}, 400))
+
+    selected_engine = engine_override or get_default_engine(session)
+    if selected_engine not in engine_names():
+        abort(json_response({"detail": "Motor OCR necunoscut"}, 400))
+
+    return JobParams(
+        engine=selected_engine,
+        auto_detect=auto_detect,
+        language=language,
+        folder=folder if folder and folder.lower() != "default" else None,
+        folder_id=folder_id,
+        options=options_payload,
+        priority=priority,
+        client_id=client_id,
+    )
 
-    sanitized_filename = secure_filename(Path(file.filename).name) or "upload"
-    stored_filename = f"{time.time_ns()}_{sanitized_filename}"
 
-    with get_session() as session:
-        selected_engine = engine_override or get_default_engine(session)
-        if selected_engine not in {"docling", "ocrmypdf"}:
-            abort(json_response({"detail": "Motor OCR necunoscut"}, 400))
+@route("/ocr/jobs", methods=["POST"])
+def create_ocr_job() -> Any:
+    file = request.files.get("file")
+    upload_id = request.form.get("upload_id") or None
+    if (file is None or not file.filename) and upload_id is None:
+        abort(json_response({"detail": "Fișier invalid"}, 400))
 
-        dirs = ensure_storage_dirs(settings.data_dir)
-        upload_path = dirs["uploads"] / stored_filename
-        file.save(upload_path)
-
-        folder_value = folder if folder and folder.lower() != "default" else None
-
-        job = OCRJob(
-            original_filename=Path(file.filename).name,
-            stored_filename=stored_filename,
-            engine=selected_engine,
-            auto_detect=auto_detect,
-            language=language,
-            folder=folder_value,
-            folder_id=folder_id,
-            options=json.dumps(options_payload) if options_payload else None,
+    with get_session() as session:
+        params = _job_params(session)
+
+        upload_session = None
+        if file is None or not file.filename:
+            upload_session = session.get(UploadSession, upload_id)
+            if not upload_session:
+                abort(json_response({"detail": "Încărcare inexistentă"}, 404))
+            if not upload_session.completed:
+                abort(json_response({"detail": "Încărcarea nu este completă"}, 409))
+            original_filename = Path(upload_session.filename).name
+        else:
+            original_filename = Path(file.filename).name
+
+        stored_filename, upload_path = new_upload_path(original_filename)
+        if upload_session is not None:
+            content_hash = upload_session.content_hash
+            size_bytes = upload_session.received
+            page_count = upload_session.page_count
+            claim_upload_session(session, upload_session, upload_path)
+        else:
+            content_hash, size_bytes, page_count = save_upload(file, upload_path)
+        publish_path(upload_path)
+
+        job = build_job(
+            session, params, original_filename, stored_filename, content_hash, size_bytes, page_count
         )
-        session.add(job)
+        from_cache = job.output_filename is not None
         session.commit()
+        if from_cache:
+            discard_uploads([stored_filename])
         session.refresh(job)
-
-        executor.submit(process_job, job.id)
+        publish_job_event(job)
 
         response = serialize_job(job, settings.api_prefix)
         return json_response(response.model_dump(), 201)
 
 
+def _serialize_batch(session, batch: OCRBatch) -> dict[str, Any]:
+    return OCRBatchRead(
+        id=batch.id,
+        engine=batch.engine,
+        folder_id=batch.folder_id,
+        priority_class=batch.priority_class,
+        total_jobs=batch.total_jobs,
+        created_at=batch.created_at,
+        jobs_url=f"{settings.api_prefix}/ocr/jobs?batch_id={batch.id}",
+        **batch_progress(session, batch),
+    ).model_dump()
+
+
+@route("/ocr/batches", methods=["POST"])
+def create_ocr_batch() -> Any:
+    files = request.files.getlist("files") + request.files.getlist("file")
+    archive = request.files.get("archive")
+    if not files and (archive is None or not archive.filename):
+        abort(json_response({"detail": "Fișier invalid"}, 400))
+
+    with get_session() as session:
+        params = _job_params(session)
+        budget = ByteBudget()
+        sources = multipart_sources(files, budget)
+        if archive is not None and archive.filename:
+            sources = itertools.chain(sources, archive_sources(archive, budget))
+        try:
+            batch = create_batch(session, params, sources)
+        except BatchError as exc:
+            abort(json_response({"detail": str(exc)}, 400))
+        publish_event("batch", {"id": batch.id, "total_jobs": batch.total_jobs})
+        return json_response(_serialize_batch(session, batch), 201)
+
+
+@route("/ocr/batches/<int:batch_id>", methods=["GET"])
+def get_ocr_batch(batch_id: int) -> Any:
+    with get_session() as session:
+        batch = session.get(OCRBatch, batch_id)
+        if not batch:
+            abort(json_response({"detail": "Lot inexistent"}, 404))
+        return json_response(_serialize_batch(session, batch))
+
+
 @route("/ocr/jobs/<int:job_id>", methods=["GET"])
 def get_job(job_id: int) -> Any:
     with get_session() as session:
@@ -244,6 +492,8 @@ def update_job(job_id: int) -> Any:
             job.folder = data.folder if data.folder.lower() != "default" else None
         if data.folder_id is not None:
             job.folder_id = data.folder_id
+            retag_job(session, job)
+        job.updated_at = datetime.utcnow()
         session.add(job)
         session.commit()
         session.refresh(job)
@@ -258,14 +508,41 @@ def delete_job(job_id: int):
         if not job:
             abort(json_response({"detail": "Job inexistent"}, 404))
         dirs = ensure_storage_dirs(settings.data_dir)
-        (dirs["uploads"] / job.stored_filename).unlink(missing_ok=True)
-        if job.output_filename:
-            (dirs["results"] / job.output_filename).unlink(missing_ok=True)
+        remove_file(session, dirs["uploads"] / job.stored_filename)
+        shared_output = release_result(session, job)
+        if job.output_filename and not shared_output:
+            remove_output(session, dirs["results"] / job.output_filename)
+        remove_job_from_index(session, job.id)
         session.delete(job)
         session.commit()
+        publish_event("job_deleted", {"id": job_id})
+        if shared_output:
+            evict_orphaned_results(session)
     return ("", 204)
 
 
+@route("/ocr/jobs/<int:job_id>/text", methods=["GET"])
+def get_job_text(job_id: int) -> Any:
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+    with get_session() as session:
+        job = session.get(OCRJob, job_id)
+        if not job:
+            abort(json_response({"detail": "Job inexistent"}, 404))
+        if job.status != "completed":
+            abort(json_response({"detail": "Textul nu este disponibil"}, 404))
+        pages = read_pages(job, ensure_storage_dirs(settings.data_dir), offset, limit)
+    if pages is None:
+        abort(json_response({"detail": "Textul nu este disponibil"}, 404))
+    total, entries = pages
+    items = [
+        {"position": offset + index, "page": page, "text": content}
+        for index, (page, content) in enumerate(entries)
+    ]
+    next_offset = offset + limit if offset + limit < total else None
+    return json_response({"total": total, "items": items, "next_offset": next_offset})
+
+
 @route("/ocr/jobs/<int:job_id>/download", methods=["GET"])
 def download_job(job_id: int):
     with get_session() as session:
@@ -274,17 +551,80 @@ def download_job(job_id: int):
             abort(json_response({"detail": "Fișier inexistent"}, 404))
         results_dir = ensure_storage_dirs(settings.data_dir)["results"]
         file_path = results_dir / job.output_filename
-        if not file_path.exists():
+        if not result_exists(file_path):
             abort(json_response({"detail": "Fișier lipsă"}, 404))
         media_type = job.output_mime_type or "application/octet-stream"
-    return send_file(
-        file_path,
-        mimetype=media_type,
-        as_attachment=True,
-        download_name=file_path.name,
+        touch_files(session, [file_path, *variant_paths(file_path)])
+        session.commit()
+    return remote_download(file_path, media_type, file_path.name) or send_download(
+        request, hot_path(file_path), media_type, file_path.name
     )
 
 
+def _serialize_upload_session(upload: UploadSession) -> dict[str, Any]:
+    return UploadSessionRead(
+        id=upload.id,
+        filename=upload.filename,
+        size=upload.total_size,
+        offset=upload.received,
+        completed=upload.completed,
+        chunk_size=settings.upload_chunk_size,
+    ).model_dump()
+
+
+@route("/uploads", methods=["POST"])
+def create_upload_session_route():
+    payload = request.get_json(silent=True) or {}
+    data = parse_model(UploadSessionCreate, payload)
+    if data.size <= 0 or data.size > settings.upload_max_bytes:
+        abort(json_response({"detail": "Dimensiune fișier invalidă"}, 413))
+    with get_session() as session:
+        expire_upload_sessions(session)
+        upload = create_upload_session(session, Path(data.filename).name, data.size)
+        response = _serialize_upload_session(upload)
+    return json_response(response, 201)
+
+
+@route("/uploads/<upload_id>", methods=["GET"])
+def get_upload_session_route(upload_id: str):
+    with get_session() as session:
+        upload = session.get(UploadSession, upload_id)
+        if not upload:
+            abort(json_response({"detail": "Încărcare inexistentă"}, 404))
+        response = _serialize_upload_session(upload)
+    return json_response(response)
+
+
+@route("/uploads/<upload_id>", methods=["PUT"])
+def append_upload_chunk_route(upload_id: str):
+    offset_raw = request.headers.get("Upload-Offset")
+    with get_session() as session:
+        upload = session.get(UploadSession, upload_id)
+        if not upload:
+            abort(json_response({"detail": "Încărcare inexistentă"}, 404))
+        if upload.completed:
+            abort(json_response({"detail": "Încărcarea este deja completă"}, 409))
+        try:
+            offset = int(offset_raw) if offset_raw is not None else upload.received
+        except ValueError:
+            abort(json_response({"detail": "Upload-Offset invalid"}, 400))
+        if offset != upload.received:
+            return json_response(_serialize_upload_session(upload), 409)
+        upload = append_upload_chunk(session, upload, request.stream)
+        response = _serialize_upload_session(upload)
+    return json_response(response)
+
+
+@route("/uploads/<upload_id>", methods=["DELETE"])
+def delete_upload_session_route(upload_id: str):
+    with get_session() as session:
+        upload = session.get(UploadSession, upload_id)
+        if not upload:
+            abort(json_response({"detail": "Încărcare inexistentă"}, 404))
+        delete_upload_session(session, upload)
+    return ("", 204)
+
+
 @route("/word/generate", methods=["POST"])
 def generate_word_document():
     payload = request.get_json(silent=True) or {}
@@ -302,9 +642,6 @@ def generate_word_document():
 @route("/word/convert", methods=["POST"])
 def convert_pdf_to_word_document():
     file = request.files.get("file")
-    if file is None or not file.filename:
-        abort(json_response({"detail": "Fișier invalid"}, 400))
-
     title = request.form.get("title", "")
     job_id_raw = request.form.get("job_id")
     job_id = None
@@ -314,9 +651,25 @@ def convert_pdf_to_word_document():
         except ValueError:
             abort(json_response({"detail": "Identificator job invalid"}, 400))
 
+    if (file is None or not file.filename) and job_id is None:
+        abort(json_response({"detail": "Fișier invalid"}, 400))
+
+    if file is None or not file.filename:
+        with get_session() as session:
+            job = session.get(OCRJob, job_id)
+            if not job:
+                abort(json_response({"detail": "Job inexistent"}, 404))
+            document = convert_job_to_word(session, job, title)
+            if document is None:
+                abort(json_response({"detail": "Jobul nu are un rezultat finalizat"}, 409))
+            response = WordConvertResponse(
+                document=serialize_word_document(document, settings.api_prefix)
+            )
+        return json_response(response.model_dump(), 201)
+
     dirs = ensure_storage_dirs(settings.data_dir)
     temp_path = dirs["uploads"] / f"convert_{time.time_ns()}_{secure_filename(file.filename)}"
-    file.save(temp_path)
+    content_hash, _, _ = save_upload(file, temp_path)
 
     try:
         with get_session() as session:
@@ -325,12 +678,9 @@ def convert_pdf_to_word_document():
                 title or file.filename,
                 temp_path,
                 file.filename,
+                content_hash=content_hash,
+                job_id=job_id,
             )
-            if job_id:
-                document.job_id = job_id
-                session.add(document)
-                session.commit()
-                session.refresh(document)
             response = WordConvertResponse(
                 document=serialize_word_document(document, settings.api_prefix)
             )
@@ -342,13 +692,19 @@ def convert_pdf_to_word_document():
 
 @route("/word/documents", methods=["GET"])
 def list_word_documents_route():
+    params = _listing_params(
+        WordDocument, WORD_DOCUMENT_LIST_FIELDS, {"source": str, "folder_id": int, "job_id": int}
+    )
+    fields = params.fields or WORD_DOCUMENT_LIST_FIELDS
     with get_session() as session:
-        documents = list_documents(session)
-        serialized = [
-            serialize_word_document(document, settings.api_prefix).model_dump()
-            for document in documents
-        ]
-    return json_response(serialized)
+        etag = listing_etag(session, WordDocument, params, request.query_string)
+        if etag in request.if_none_match:
+            return _not_modified(etag)
+        rows, next_cursor = fetch_listing(
+            session, WordDocument, params, word_document_list_columns(fields)
+        )
+    items = [project_word_document_row(row, fields, settings.api_prefix) for row in rows]
+    return _listing_response(items, next_cursor, params, etag)
 
 
 @route("/word/documents/<int:document_id>/download", methods=["GET"])
@@ -358,13 +714,10 @@ def download_word_document(document_id: int):
         if not document:
             abort(json_response({"detail": "Document inexistent"}, 404))
         file_path = documents_dir() / document.file_name
-        if not file_path.exists():
+        if not result_exists(file_path):
             abort(json_response({"detail": "Fișier lipsă"}, 404))
-    return send_file(
-        file_path,
-        mimetype=document.mime_type,
-        as_attachment=True,
-        download_name=document.file_name,
+    return remote_download(file_path, document.mime_type, document.file_name) or send_download(
+        request, file_path, document.mime_type, document.file_name
     )
 
 
@@ -372,7 +725,7 @@ def download_word_document(document_id: int):
 def list_folders_route():
     with get_session() as session:
         folders = list_folders(session)
-        serialized = [serialize_folder(session, folder).model_dump() for folder in folders]
+        serialized = [folder.model_dump() for folder in serialize_folders(session, folders)]
     return json_response(serialized)
 
 
@@ -437,16 +790,15 @@ def download_folder_route(folder_id: int):
         if not folder:
             abort(json_response({"detail": "Folder inexistent"}, 404))
         
-        zip_buffer = create_folder_zip(session, folder_id)
-        if not zip_buffer:
+        archive = create_folder_zip(session, folder_id)
+        if archive is None:
             abort(json_response({"detail": "Nu s-a putut crea arhiva"}, 500))
-    
-    return send_file(
-        zip_buffer,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name=f"{folder.name}.zip",
-    )
+        download_name = f"{folder.name}.zip"
+
+    response = Response(archive, mimetype="application/zip")
+    set_disposition(response, download_name)
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @route("/folders/<int:folder_id>/documents", methods=["GET"])
@@ -468,6 +820,8 @@ def get_folder_documents(folder_id: int):
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    # StreamingUploadRequest sets the body limit: upload_max_bytes, or batch_max_bytes for batches.
+    app.request_class = StreamingUploadRequest
     app.url_map.strict_slashes = False
     CORS(
         app,
@@ -479,6 +833,10 @@ def create_app() -> Flask:
     def handle_not_found(error):  # pragma: no cover - framework integration
         return json_response({"detail": getattr(error, "description", "Resource not found")}, 404)
 
+    @app.errorhandler(413)
+    def handle_too_large(error):  # pragma: no cover - framework integration
+        return json_response({"detail": "Fișierul depășește dimensiunea maximă permisă"}, 413)
+
     @app.errorhandler(400)
     def handle_bad_request(error):  # pragma: no cover - framework integration
         description = getattr(error, "description", "Invalid request")
@@ -491,6 +849,9 @@ def create_app() -> Flask:
     documents_dir()
 
     _register_routes(app, settings.api_prefix)
+    StreamingUploadRequest.batch_endpoints |= {
+        endpoint for endpoint, view in app.view_functions.items() if view is create_ocr_batch
+    }
 
     return app
 
@@ -499,5 +860,9 @@ app = create_app()
 
 
 if __name__ == "__main__":  # pragma: no cover - manual execution helper
+    # Only this single-process server runs jobs itself: under gunicorn every
+    # worker would start its own queue, summary, search and storage threads.
+    if settings.queue_embedded_worker:
+        start_embedded_worker()
     app.run(host="0.0.0.0", port=8000)
 
@@ -0,0 +1,145 @@
+"""Versioned schema migrations applied at startup.
+
+``create_all`` creates missing tables and ``add_missing_columns`` adds new
+columns; everything else an existing database needs (indexes, data fixes) is a
+numbered step here. Applied versions are recorded in ``schema_version``, so
+each step runs once per database. Steps must be idempotent because several
+processes can start at the same time.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# (name, table, columns) for the listing, folder, queue and cache query shapes.
+HOT_QUERY_INDEXES: list[tuple[str, str, tuple[str, ...]]] = [
+    ("ix_ocrjob_created_at_id", "ocrjob", ("created_at", "id")),
+    ("ix_ocrjob_status_created_at", "ocrjob", ("status", "created_at", "id")),
+    ("ix_ocrjob_folder_id_created_at", "ocrjob", ("folder_id", "created_at", "id")),
+    ("ix_ocrjob_engine_created_at", "ocrjob", ("engine", "created_at", "id")),
+    ("ix_ocrjob_status_lease_expires_at", "ocrjob", ("status", "lease_expires_at")),
+    ("ix_ocrjob_updated_at", "ocrjob", ("updated_at",)),
+    ("ix_ocrjob_cache_key", "ocrjob", ("cache_key",)),
+    ("ix_worddocument_created_at_id", "worddocument", ("created_at", "id")),
+    ("ix_worddocument_folder_id_created_at", "worddocument", ("folder_id", "created_at", "id")),
+    ("ix_worddocument_job_id", "worddocument", ("job_id",)),
+    ("ix_worddocument_updated_at", "worddocument", ("updated_at",)),
+    ("ix_folder_parent_id", "folder", ("parent_id",)),
+    ("ix_summaryrequest_status_next_attempt_at", "summaryrequest", ("status", "next_attempt_at")),
+    ("ix_resultcacheentry_ref_count_last_used_at", "resultcacheentry", ("ref_count", "last_used_at")),
+]
+
+
+SCHEDULER_INDEXES: list[tuple[str, str, tuple[str, ...]]] = [
+    ("ix_ocrjob_status_priority_class_cost", "ocrjob", ("status", "priority_class", "cost")),
+    ("ix_ocrjob_status_share_key", "ocrjob", ("status", "share_key")),
+    ("ix_ocrjob_finished_at", "ocrjob", ("finished_at",)),
+]
+
+
+def _create_indexes(indexes: list[tuple[str, str, tuple[str, ...]]]) -> Callable[[Connection], None]:
+    def migrate(connection: Connection) -> None:
+        for name, table, columns in indexes:
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+    return migrate
+
+
+def _create_search_index(connection: Connection) -> None:
+    from .services.search import create_search_index
+
+    # Completed jobs still waiting for the search indexer.
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_ocrjob_unindexed ON ocrjob (status, id) WHERE indexed_at IS NULL")
+    )
+    create_search_index(connection)
+
+
+STORAGE_INDEXES: list[tuple[str, str, tuple[str, ...]]] = [
+    # Cold compression and the derived-file LRU walk these in last-use order.
+    ("ix_storedfile_kind_codec_last_used_at", "storedfile", ("kind", "codec", "last_used_at")),
+    ("ix_storedfile_kind_last_used_at", "storedfile", ("kind", "last_used_at", "size_bytes")),
+    # Expired outputs are detached from every job and cache entry sharing them.
+    ("ix_ocrjob_output_filename", "ocrjob", ("output_filename",)),
+    ("ix_resultcacheentry_output_filename", "resultcacheentry", ("output_filename",)),
+]
+
+
+def _create_storage_indexes(connection: Connection) -> None:
+    _create_indexes(STORAGE_INDEXES)(connection)
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_storedfile_expires_at ON storedfile (expires_at) WHERE expires_at IS NOT NULL")
+    )
+
+
+# (table, column, expression) for columns whose model default is a Python factory:
+# ``add_missing_columns`` cannot express those in the ALTER TABLE, so rows that
+# predate the column are NULL until this fills them in.
+COLUMN_BACKFILLS: list[tuple[str, str, str]] = [
+    ("ocrjob", "queued_at", "created_at"),
+]
+
+
+def _backfill_columns(connection: Connection) -> None:
+    for table, column, expression in COLUMN_BACKFILLS:
+        connection.execute(text(f"UPDATE {table} SET {column} = {expression} WHERE {column} IS NULL"))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hot query indexes", _create_indexes(HOT_QUERY_INDEXES)),
+    (2, "scheduler indexes", _create_indexes(SCHEDULER_INDEXES)),
+    (3, "batch index", _create_indexes([("ix_ocrjob_batch_id", "ocrjob", ("batch_id",))])),
+    (4, "full-text search index", _create_search_index),
+    (5, "storage accounting indexes", _create_storage_indexes),
+    (6, "backfill factory-default columns", _backfill_columns),
+    (7, "local copy index", _create_indexes([("ix_localcopy_node_last_read_at", "localcopy", ("node", "last_read_at"))])),
+]
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+            )
+        )
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply pending migrations in order and return the versions applied by this call."""
+    _ensure_version_table(engine)
+    done = applied_versions(engine)
+    applied: list[int] = []
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as connection:
+                migrate(connection)
+                connection.execute(
+                    text("INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                    {"version": version, "name": name, "applied_at": datetime.utcnow()},
+                )
+        except IntegrityError:
+            # Another process recorded this version first.
+            continue
+        except OperationalError:
+            if version in applied_versions(engine):
+                continue
+            raise
+        logger.info("Applied schema migration %s (%s)", version, name)
+        applied.append(version)
+    return applied
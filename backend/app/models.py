@@ -25,14 +25,57 @@ class OCRJob(TimestampMixin, table=True):
     language: Optional[str] = None
     folder: Optional[str] = None  # Legacy string-based folder (kept for compatibility)
     folder_id: Optional[int] = Field(default=None, foreign_key="folder.id")
+    batch_id: Optional[int] = Field(default=None, foreign_key="ocrbatch.id")
     status: str = Field(default="queued")
     progress: int = Field(default=0)
     error: Optional[str] = None
     output_filename: Optional[str] = None
     output_mime_type: Optional[str] = None
     options: Optional[str] = None
-    text_excerpt: Optional[str] = None
+    text_excerpt: Optional[str] = None  # jobs before the page store, or any job with a remote file store (services/textstore.py)
     summary: Optional[str] = None
+    content_hash: Optional[str] = None
+    cache_key: Optional[str] = None
+    resolved_engine: Optional[str] = None  # engine that actually produced the output when ``engine`` is "auto"
+    size_bytes: Optional[int] = None
+    page_count: Optional[int] = None
+    # Filled in by the preflight analysis before OCR (see services/preflight.py).
+    text_page_count: Optional[int] = None
+    ocr_page_count: Optional[int] = None
+    preflight: Optional[str] = None
+    attempts: int = Field(default=0)
+    priority_class: str = Field(default="interactive")
+    cost: Optional[float] = None  # estimated processing cost, see OCREngine.estimate_cost
+    client_id: Optional[str] = None
+    share_key: Optional[str] = None  # fair-share group: client or folder
+    queued_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    indexed_at: Optional[datetime] = None  # set once the output is in the search index (services/search.py)
+    purged_at: Optional[datetime] = None  # output removed by the retention policy (services/storage.py)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+
+class OCRBatch(TimestampMixin, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    engine: str
+    folder_id: Optional[int] = Field(default=None, foreign_key="folder.id")
+    client_id: Optional[str] = None
+    priority_class: str = Field(default="bulk")
+    total_jobs: int = Field(default=0)
+
+
+class SearchPage(SQLModel, table=True):
+    """One page (or markdown chunk) of job output; the content table of the FTS5 search index."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: int = Field(index=True)
+    position: int
+    page: Optional[int] = None
+    text: str
+    tags: str  # folder and engine filter tokens, see services/search.py
 
 
 class WordDocument(TimestampMixin, table=True):
@@ -53,3 +96,71 @@ class Folder(TimestampMixin, table=True):
     description: Optional[str] = None
     color: str = Field(default="green")
     parent_id: Optional[int] = Field(default=None, foreign_key="folder.id")
+
+
+class ResultCacheEntry(TimestampMixin, table=True):
+    key: str = Field(primary_key=True)
+    content_hash: str = Field(index=True)
+    engine: str
+    resolved_engine: Optional[str] = None
+    output_filename: str
+    output_mime_type: str
+    text_excerpt: Optional[str] = None
+    summary: Optional[str] = None
+    size_bytes: int = Field(default=0)
+    ref_count: int = Field(default=0)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class StoredFile(TimestampMixin, table=True):
+    """A file under ``data_dir``, for usage accounting and retention (services/storage.py)."""
+
+    path: str = Field(primary_key=True)  # relative to data_dir
+    kind: str  # upload, result, text, derived, document or conversion
+    job_id: Optional[int] = Field(default=None, index=True)
+    size_bytes: int = Field(default=0)  # on disk, after compression
+    codec: Optional[str] = None  # "zstd" once a cold result is compressed to ``path`` + ".zst"
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    expires_at: Optional[datetime] = None
+
+
+class LocalCopy(SQLModel, table=True):
+    """A node's copy of a bucket object under ``data_dir``, for the local-copies budget (services/storage.py).
+
+    ``StoredFile`` rows are shared by every node, so copies are accounted per node here.
+    """
+
+    node: str = Field(primary_key=True)  # host name
+    path: str = Field(primary_key=True)  # relative to data_dir, as StoredFile.path
+    size_bytes: int = Field(default=0)
+    last_read_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class UploadSession(TimestampMixin, table=True):
+    id: str = Field(primary_key=True)
+    filename: str
+    total_size: Optional[int] = None
+    received: int = Field(default=0)
+    completed: bool = Field(default=False)
+    content_hash: Optional[str] = None
+    page_count: Optional[int] = None
+
+
+class SummaryRequest(TimestampMixin, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    target: str  # "job" or "word_document"
+    target_id: int = Field(index=True)
+    prompt: str
+    status: str = Field(default="pending", index=True)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    lease_expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class SummaryCacheEntry(TimestampMixin, table=True):
+    key: str = Field(primary_key=True)
+    model: str
+    summary: str
+    hits: int = Field(default=0)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
@@ -16,6 +16,7 @@ class OCRJobRead(BaseModel):
     id: int
     original_filename: str
     engine: str
+    resolved_engine: Optional[str] = None
     auto_detect: bool
     language: Optional[str]
     folder: Optional[str]
@@ -27,11 +28,32 @@ class OCRJobRead(BaseModel):
     output_mime_type: Optional[str]
     text_excerpt: Optional[str]
     summary: Optional[str]
+    priority_class: str = "interactive"
+    page_count: Optional[int] = None
+    text_page_count: Optional[int] = None
+    ocr_page_count: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     download_url: Optional[str]
 
 
+class OCRBatchRead(BaseModel):
+    id: int
+    engine: str
+    folder_id: Optional[int]
+    priority_class: str
+    total_jobs: int
+    status: str
+    progress: int
+    jobs: int
+    queued: int
+    processing: int
+    completed: int
+    failed: int
+    created_at: datetime
+    jobs_url: str
+
+
 class OCRJobDetail(OCRJobRead):
     options: Optional[dict]
 
@@ -90,3 +112,18 @@ class FolderRead(BaseModel):
     created_at: datetime
     updated_at: datetime
     document_count: int = 0
+    total_document_count: int = 0
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+
+
+class UploadSessionRead(BaseModel):
+    id: str
+    filename: str
+    size: Optional[int]
+    offset: int
+    completed: bool
+    chunk_size: int
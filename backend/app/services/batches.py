@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import logging
+import zipfile
+from dataclasses import replace
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from ..config import get_settings
+from ..models import OCRBatch, OCRJob
+from .filestore import discard_path, publish_path
+from .ocr import JobParams, build_job, discard_uploads, new_upload_path
+from .uploads import copy_stream, save_upload
+
+logger = logging.getLogger(__name__)
+
+# Stores one source file at the given path, returning its SHA-256, size and page-count hint.
+StoreFile = Callable[[Path], tuple[str, int, Optional[int]]]
+
+
+class BatchError(ValueError):
+    pass
+
+
+class ByteBudget:
+    """Bytes a batch may still store, shared by its multipart files and archive members."""
+
+    def __init__(self, total: Optional[int] = None) -> None:
+        self.remaining = get_settings().batch_max_bytes if total is None else total
+
+    def take(self, size: int) -> None:
+        self.remaining -= size
+        if self.remaining < 0:
+            raise RequestEntityTooLarge()
+
+
+def multipart_sources(files: list[FileStorage], budget: Optional[ByteBudget] = None) -> Iterator[tuple[str, StoreFile]]:
+    budget = budget or ByteBudget()
+    for file in files:
+        if not file or not file.filename:
+            continue
+
+        def store(destination: Path, file: FileStorage = file) -> tuple[str, int, Optional[int]]:
+            stored = save_upload(file, destination)
+            try:
+                budget.take(stored[1])
+            except RequestEntityTooLarge:
+                destination.unlink(missing_ok=True)
+                raise
+            return stored
+
+        yield Path(file.filename).name, store
+
+
+def _skip_member(info: zipfile.ZipInfo) -> bool:
+    parts = PurePosixPath(info.filename).parts
+    return info.is_dir() or not parts or parts[0] == "__MACOSX" or any(part.startswith(".") for part in parts)
+
+
+def archive_sources(archive: FileStorage, budget: Optional[ByteBudget] = None) -> Iterator[tuple[str, StoreFile]]:
+    """Yield the files of a ZIP upload, extracting each one only when it is stored."""
+    settings = get_settings()
+    budget = budget or ByteBudget()
+    try:
+        bundle = zipfile.ZipFile(archive.stream)
+    except zipfile.BadZipFile as exc:
+        raise BatchError("Arhivă ZIP invalidă") from exc
+    with bundle:
+        members = [info for info in bundle.infolist() if not _skip_member(info)]
+        if len(members) > settings.batch_max_files:
+            raise BatchError(f"Arhiva conține prea multe fișiere (maxim {settings.batch_max_files})")
+        # Declared sizes can lie, so copy_stream enforces the limit on the bytes actually read.
+        for info in members:
+            if info.file_size > settings.upload_max_bytes:
+                raise BatchError(f"Fișierul {info.filename} este prea mare")
+
+            def store(destination: Path, info: zipfile.ZipInfo = info) -> tuple[str, int, Optional[int]]:
+                with bundle.open(info) as stream:
+                    stored = copy_stream(stream, destination, min(settings.upload_max_bytes, max(budget.remaining, 0)))
+                budget.take(stored[1])
+                return stored
+
+            yield PurePosixPath(info.filename).name, store
+
+
+def _remove_stored(paths: list[Path], published: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+    for path in published:
+        try:
+            discard_path(path)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Cannot delete the stored copy of %s", path.name)
+
+
+def create_batch(session: Session, params: JobParams, sources: Iterable[tuple[str, StoreFile]]) -> OCRBatch:
+    """Store every source file, then add the batch and all of its jobs in a single transaction.
+
+    Files are written and published to the file store before the first
+    INSERT so the database write lock is not held while a large request
+    streams to disk or to the bucket.
+    """
+    settings = get_settings()
+    stored: list[tuple[str, str, str, int, Optional[int]]] = []
+    stored_paths: list[Path] = []
+    published: list[Path] = []
+    try:
+        for original_filename, store in sources:
+            if len(stored) >= settings.batch_max_files:
+                raise BatchError(f"Prea multe fișiere într-un lot (maxim {settings.batch_max_files})")
+            stored_filename, upload_path = new_upload_path(original_filename)
+            stored_paths.append(upload_path)
+            stored.append((original_filename, stored_filename, *store(upload_path)))
+        if not stored:
+            raise BatchError("Lotul nu conține fișiere")
+        for path in stored_paths:
+            publish_path(path)
+            published.append(path)
+
+        batch = OCRBatch(
+            engine=params.engine,
+            folder_id=params.folder_id,
+            client_id=params.client_id,
+            priority_class=params.priority or "bulk",
+            total_jobs=len(stored),
+        )
+        session.add(batch)
+        session.flush()
+        job_params = replace(params, priority=batch.priority_class)
+        cached_uploads: list[str] = []
+        for original_filename, stored_filename, content_hash, size_bytes, page_count in stored:
+            job = build_job(
+                session,
+                job_params,
+                original_filename,
+                stored_filename,
+                content_hash,
+                size_bytes,
+                page_count,
+                batch_id=batch.id,
+            )
+            if job.output_filename:
+                cached_uploads.append(stored_filename)
+        session.commit()
+    except Exception:
+        session.rollback()
+        _remove_stored(stored_paths, published)
+        raise
+    discard_uploads(cached_uploads)
+    logger.info("Created batch %s with %s jobs", batch.id, len(stored))
+    return batch
+
+
+def batch_progress(session: Session, batch: OCRBatch) -> dict[str, Any]:
+    counts = {"queued": 0, "processing": 0, "completed": 0, "failed": 0}
+    progress_sum = 0
+    rows = session.exec(
+        select(OCRJob.status, func.count(), func.sum(OCRJob.progress))
+        .where(OCRJob.batch_id == batch.id)
+        .group_by(OCRJob.status)
+    )
+    for status, count, progress in rows:
+        counts[status] = counts.get(status, 0) + count
+        progress_sum += progress or 0
+    jobs = sum(counts.values())
+    if jobs and counts["completed"] + counts["failed"] == jobs:
+        status = "completed"
+    elif jobs and counts["queued"] == jobs:
+        status = "queued"
+    else:
+        status = "processing"
+    return {
+        **counts,
+        "jobs": jobs,
+        "status": status,
+        "progress": progress_sum // jobs if jobs else 0,
+    }
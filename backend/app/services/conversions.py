@@ -0,0 +1,93 @@
+"""Docling conversions cached by the SHA-256 of their input.
+
+Each cached markdown file has a ``StoredFile`` row of kind ``conversion``, so
+the storage manager drops the least recently used ones above
+``storage_conversions_max_bytes``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from sqlmodel import Session
+
+from ..config import get_settings
+from ..database import engine
+from .storage import touch_files, track_file
+from .uploads import file_sha256
+
+logger = logging.getLogger(__name__)
+
+
+def conversions_dir() -> Path:
+    directory = get_settings().data_dir / "cache" / "conversions"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.replace(temp_name, path)
+
+
+def get_cached_markdown(content_hash: Optional[str], session: Optional[Session] = None) -> Optional[str]:
+    """Return the cached conversion of ``content_hash`` and mark it as used.
+
+    With ``session`` the use is recorded in the caller's transaction and the
+    caller commits; without one it is committed on its own.
+    """
+    if not content_hash:
+        return None
+    if session is None:
+        with Session(engine) as own_session:
+            markdown = get_cached_markdown(content_hash, own_session)
+            own_session.commit()
+        return markdown
+    path = conversions_dir() / f"{content_hash}.md"
+    try:
+        markdown = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    touch_files(session, [path])
+    return markdown
+
+
+def store_conversion(content_hash: str, markdown: str, session: Optional[Session] = None) -> None:
+    """Cache ``markdown`` as the conversion of ``content_hash``; commits like ``get_cached_markdown``."""
+    if session is None:
+        with Session(engine) as own_session:
+            store_conversion(content_hash, markdown, own_session)
+            own_session.commit()
+        return
+    path = conversions_dir() / f"{content_hash}.md"
+    _write_atomic(path, markdown)
+    track_file(session, path, "conversion", size_bytes=len(markdown.encode("utf-8")))
+
+
+def convert_to_markdown(
+    path: Path, content_hash: Optional[str] = None, session: Optional[Session] = None, cache: bool = True
+) -> str:
+    """Run docling on ``path`` unless a conversion of the same content is already cached.
+
+    Pass ``cache=False`` for temporary inputs, such as the page range of a
+    shard, whose content never comes back.
+    """
+    if cache:
+        content_hash = content_hash or file_sha256(path)
+        cached = get_cached_markdown(content_hash, session)
+        if cached is not None:
+            logger.info("Reusing cached docling conversion %s", content_hash[:12])
+            return cached
+
+    from .ocr import get_converter
+
+    result = get_converter().convert(str(path))
+    markdown = result.document.export_to_markdown()
+    if cache:
+        store_conversion(content_hash, markdown, session)
+    return markdown
@@ -0,0 +1,177 @@
+"""File downloads: conditional and range requests, precompressed variants, nginx offload.
+
+Outputs and Word documents are sent by Flask ``send_file``, which answers
+``Range``, ``If-None-Match`` and ``If-Modified-Since`` from the file itself.
+With ``download_accel_redirect`` set, the response carries only headers and an
+``X-Accel-Redirect`` to an internal nginx location that aliases ``data_dir``,
+so nginx streams the file and handles ranges while the worker returns
+immediately (see ``deploy/nginx.conf``). With a remote file store the
+download is redirected to a presigned URL of the object instead.
+
+Markdown outputs get ``.gz`` (and ``.br`` when the ``brotli`` package is
+installed) siblings once the job finishes. Flask picks one from
+``Accept-Encoding``; behind nginx, ``gzip_static``/``brotli_static`` do.
+"""
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from flask import Request, Response, make_response, redirect, send_file
+from werkzeug.http import is_resource_modified
+
+from ..config import get_settings
+from .filestore import get_file_store
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = {"text/markdown", "text/plain"}
+# Preferred first when the client accepts several.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """ETag in nginx's format, so both serving modes answer ``If-None-Match`` alike."""
+    return f"{int(stat.st_mtime):x}-{stat.st_size:x}"
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _write_variant(path: Path, suffix: str, data: bytes) -> None:
+    target = path.with_name(path.name + suffix)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, target)
+    # Keep the original's mtime, so Last-Modified does not depend on the variant served.
+    stat = path.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def precompress_output(path: Path, mime_type: Optional[str]) -> list[str]:
+    """Write the compressed variants of a text output, returning the encodings written."""
+    settings = get_settings()
+    if not settings.download_precompress or mime_type not in COMPRESSIBLE_TYPES or get_file_store().remote:
+        # Downloads from a bucket are redirected there, so variants would never be served.
+        return []
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    if len(raw) < settings.download_precompress_min_bytes:
+        return []
+    written = []
+    compressors = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = _brotli()
+    if brotli is not None:
+        compressors["br"] = lambda data: brotli.compress(data, mode=brotli.MODE_TEXT)
+    for encoding, suffix in ENCODINGS:
+        compress = compressors.get(encoding)
+        if compress is None:
+            continue
+        data = compress(raw)
+        if len(data) >= len(raw):
+            continue
+        _write_variant(path, suffix, data)
+        written.append(encoding)
+    return written
+
+
+def variant_paths(path: Path) -> list[Path]:
+    return [path.with_name(path.name + suffix) for _encoding, suffix in ENCODINGS]
+
+
+def remove_variants(path: Path) -> None:
+    for variant in variant_paths(path):
+        variant.unlink(missing_ok=True)
+
+
+def _pick_variant(request: Request, path: Path) -> tuple[Path, Optional[str]]:
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] <= 0:
+            continue
+        variant = path.with_name(path.name + suffix)
+        if variant.exists():
+            return variant, encoding
+    return path, None
+
+
+def _accel_location(path: Path) -> Optional[str]:
+    settings = get_settings()
+    try:
+        relative = path.resolve().relative_to(settings.data_dir.resolve())
+    except ValueError:
+        logger.warning("Not offloading %s: outside the data directory", path)
+        return None
+    return settings.download_accel_redirect.rstrip("/") + "/" + quote(relative.as_posix())
+
+
+def set_disposition(response: Response, download_name: str) -> None:
+    ascii_name = download_name.encode("ascii", "ignore").decode("ascii")
+    if not ascii_name.rsplit(".", 1)[0]:
+        ascii_name = "download" + Path(download_name).suffix
+    response.headers.set(
+        "Content-Disposition", "attachment", filename=ascii_name, **{"filename*": f"UTF-8''{quote(download_name)}"}
+    )
+
+
+def remote_download(path: Path, mimetype: str, download_name: str) -> Optional[Response]:
+    """Redirect to a presigned URL of the object stored for ``path`` when the file store has one."""
+    store = get_file_store()
+    if not store.remote:
+        return None
+    url = store.download_url(store.key_for(path), download_name, mimetype)
+    if url is None:
+        return None
+    response = redirect(url, 302)
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+
+def send_download(request: Request, path: Path, mimetype: str, download_name: str) -> Response:
+    """Send ``path`` as an attachment, offloaded to nginx when configured."""
+    settings = get_settings()
+    stat = path.stat()
+    etag = file_etag(stat)
+    compressible = mimetype in COMPRESSIBLE_TYPES
+
+    location = _accel_location(path) if settings.download_accel_redirect else None
+    if location is not None:
+        if not is_resource_modified(request.environ, etag=etag, last_modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc)):
+            response = make_response("", 304)
+        else:
+            response = make_response("", 200)
+            response.headers["X-Accel-Redirect"] = location
+            response.headers["Content-Type"] = mimetype
+            set_disposition(response, download_name)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    served, encoding = _pick_variant(request, path) if compressible else (path, None)
+    response = send_file(
+        served,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        etag=etag if encoding is None else file_etag(served.stat()),
+    )
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,371 @@
+"""OCR engine registry.
+
+Each engine declares what it can read, what it produces and roughly how much
+it costs per page, and runs on a whole document or on a page range.
+``process_job`` dispatches through :func:`get_engine`; the ``auto`` engine
+routes born-digital documents to plain text extraction and only sends scanned
+pages to a heavy OCR engine.
+"""
+from __future__ import annotations
+
+import logging
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from ..config import get_settings
+from .conversions import convert_to_markdown, get_cached_markdown, store_conversion
+from .preflight import OCR_PAGE, TEXT_PAGE, PreflightReport, analyze_pdf, extract_pdf_text
+from .sharding import extract_pages, is_pdf, run_sharded_docling, run_sharded_ocrmypdf, should_shard
+from .textstore import PageText, numbered_pages
+from .uploads import file_sha256
+
+logger = logging.getLogger(__name__)
+
+PageRange = tuple[int, int]  # 0-based, inclusive
+PLAIN_TEXT_SUFFIXES = {".txt", ".md", ".markdown", ".csv"}
+DOCX_SUFFIXES = {".docx"}
+# Used when the page count of an input is unknown.
+BYTES_PER_PAGE_ESTIMATE = 100 * 1024
+
+
+@dataclass(frozen=True)
+class EngineCapabilities:
+    scanned: bool  # recognizes text in scanned pages and images
+    text_layer: bool  # reads PDFs that already carry a text layer
+    plain_documents: bool  # reads .txt/.md/.docx inputs
+    layout: bool  # keeps headings, tables and reading order
+    heavy: bool  # loads OCR models or Tesseract
+    output_mime_type: str
+
+
+@dataclass
+class EngineRequest:
+    job_id: int
+    input_path: Path
+    results_dir: Path
+    options: dict[str, Any] = field(default_factory=dict)
+    language: Optional[str] = None
+    auto_detect: bool = True
+    content_hash: Optional[str] = None
+    on_progress: Optional[Callable[[int, int], None]] = None
+    preflight: Optional[PreflightReport] = None
+
+
+@dataclass
+class EngineResult:
+    output_path: Path
+    mime_type: str
+    text: Optional[str]
+    engine: str
+    # Text per PDF page when the engine knows page boundaries; see services/textstore.py.
+    pages: Optional[list[PageText]] = None
+
+
+def language_to_tesseract_code(language: Optional[str]) -> Optional[str]:
+    if not language:
+        return None
+    mapping = {
+        "romanian": "ron",
+        "english": "eng",
+        "german": "deu",
+        "italian": "ita",
+        "spanish": "spa",
+        "hungarian": "hun",
+        "french": "fra",
+        "ukrainian": "ukr",
+    }
+    return mapping.get(language.lower())
+
+
+def build_ocrmypdf_kwargs(
+    options: dict[str, Any], language: Optional[str], auto_detect: bool
+) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {
+        "optimize": int(options.get("optimizationLevel", 1)),
+        "rotate_pages": bool(options.get("rotatePages", True)),
+        "remove_background": bool(options.get("removeBackground", False)),
+        "skip_text": bool(options.get("skipText", True)),
+        "redo_ocr": bool(options.get("redoOcr", False)),
+        "deskew": bool(options.get("deskew", False)),
+        "output_type": options.get("outputType", "pdfa"),
+    }
+    tesseract_language = language_to_tesseract_code(language) if not auto_detect else None
+    if tesseract_language:
+        kwargs["language"] = tesseract_language
+    return kwargs
+
+
+def _output_path(request: EngineRequest, tag: str, suffix: str, pages: Optional[PageRange]) -> Path:
+    if pages is not None:
+        tag = f"{tag}_p{pages[0] + 1}-{pages[1] + 1}"
+    return request.results_dir / f"{request.job_id}_{tag}{suffix}"
+
+
+def is_plain_document(path: Path) -> bool:
+    return path.suffix.lower() in PLAIN_TEXT_SUFFIXES | DOCX_SUFFIXES
+
+
+class OCREngine:
+    name = ""
+    label = ""
+    cost_per_page = 1.0
+    capabilities: EngineCapabilities
+
+    def estimate_cost(
+        self,
+        page_count: Optional[int],
+        size_bytes: Optional[int] = None,
+        report: Optional[PreflightReport] = None,
+    ) -> float:
+        """Relative processing cost, roughly seconds of one CPU core."""
+        if report is not None:
+            page_count = report.page_count
+        if page_count is None:
+            page_count = max((size_bytes or 0) // BYTES_PER_PAGE_ESTIMATE, 1)
+        return self.cost_per_page * page_count
+
+    def cache_options(self, options: dict[str, Any], language: Optional[str], auto_detect: bool) -> dict[str, Any]:
+        """The subset of job options that changes this engine's output."""
+        return {}
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        raise NotImplementedError
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "label": self.label,
+            "cost_per_page": self.cost_per_page,
+            "capabilities": asdict(self.capabilities),
+        }
+
+
+class DoclingEngine(OCREngine):
+    name = "docling"
+    label = "Docling"
+    cost_per_page = 4.0
+    capabilities = EngineCapabilities(
+        scanned=True, text_layer=True, plain_documents=True, layout=True, heavy=True, output_mime_type="text/markdown"
+    )
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        page_texts: Optional[list[PageText]] = None
+        if pages is not None:
+            with tempfile.TemporaryDirectory(dir=request.results_dir) as work_dir:
+                chunk = extract_pages(request.input_path, pages[0], pages[1], Path(work_dir) / "pages.pdf")
+                markdown = convert_to_markdown(chunk, cache=False)
+        else:
+            content_hash = request.content_hash or file_sha256(request.input_path)
+            markdown = get_cached_markdown(content_hash)
+            shard_pages = should_shard(request.input_path, request.options) if markdown is None else None
+            if markdown is None and shard_pages:
+                shards = run_sharded_docling(request.input_path, shard_pages, request.on_progress)
+                # Like OCR runs of mixed documents, each shard is kept under its first page.
+                page_texts = [(first + 1, text) for first, _last, text in shards if text]
+                markdown = "\n\n".join(text for _page, text in page_texts)
+                store_conversion(content_hash, markdown)
+            elif markdown is None:
+                markdown = convert_to_markdown(request.input_path, content_hash)
+        output_path = _output_path(request, "docling", ".md", pages)
+        output_path.write_text(markdown, encoding="utf-8")
+        return EngineResult(output_path, "text/markdown", markdown, self.name, page_texts)
+
+
+class OcrmypdfEngine(OCREngine):
+    name = "ocrmypdf"
+    label = "OCRmyPDF"
+    cost_per_page = 2.0
+    capabilities = EngineCapabilities(
+        scanned=True, text_layer=True, plain_documents=False, layout=False, heavy=True, output_mime_type="application/pdf"
+    )
+
+    def cache_options(self, options: dict[str, Any], language: Optional[str], auto_detect: bool) -> dict[str, Any]:
+        return build_ocrmypdf_kwargs(options, language, auto_detect)
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        import ocrmypdf
+
+        kwargs = build_ocrmypdf_kwargs(request.options, request.language, request.auto_detect)
+        output_path = _output_path(request, "ocr", ".pdf", pages)
+        if pages is not None:
+            with tempfile.TemporaryDirectory(dir=request.results_dir) as work_dir:
+                chunk = extract_pages(request.input_path, pages[0], pages[1], Path(work_dir) / "pages.pdf")
+                ocrmypdf.ocr(str(chunk), str(output_path), **kwargs)
+        else:
+            shard_pages = should_shard(request.input_path, request.options)
+            if shard_pages:
+                run_sharded_ocrmypdf(request.input_path, output_path, kwargs, shard_pages, request.on_progress)
+            else:
+                report = request.preflight
+                if report is not None and report.ocr_page_count and kwargs["skip_text"] and not kwargs["redo_ocr"]:
+                    # Pages with a text layer would be skipped anyway, but only after ocrmypdf rasterized them.
+                    kwargs["pages"] = report.ocr_pages_spec()
+                ocrmypdf.ocr(str(request.input_path), str(output_path), **kwargs)
+        return EngineResult(output_path, "application/pdf", None, self.name)
+
+
+class TextEngine(OCREngine):
+    """Extract text that is already in the file: PDF text layers, plain text and DOCX."""
+
+    name = "text"
+    label = "Extragere text"
+    cost_per_page = 0.02
+    capabilities = EngineCapabilities(
+        scanned=False, text_layer=True, plain_documents=True, layout=False, heavy=False, output_mime_type="text/markdown"
+    )
+
+    def write_result(
+        self,
+        request: EngineRequest,
+        text: str,
+        pages: Optional[PageRange] = None,
+        page_texts: Optional[list[PageText]] = None,
+    ) -> EngineResult:
+        output_path = _output_path(request, "text", ".md", pages)
+        output_path.write_text(text, encoding="utf-8")
+        return EngineResult(output_path, "text/markdown", text, self.name, page_texts)
+
+    def extract(self, path: Path) -> str:
+        suffix = path.suffix.lower()
+        if suffix in DOCX_SUFFIXES:
+            from docx import Document
+
+            return "\n".join(paragraph.text for paragraph in Document(str(path)).paragraphs)
+        if suffix in PLAIN_TEXT_SUFFIXES:
+            return path.read_text(encoding="utf-8", errors="replace")
+        raise ValueError("Fișierul nu conține text extractibil")
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        report = request.preflight
+        if report is not None and report.texts and pages is None:
+            return self.write_result(request, report.text(), page_texts=numbered_pages(report.texts))
+        if is_pdf(request.input_path):
+            texts = extract_pdf_text(request.input_path, pages)
+            first = pages[0] if pages is not None else 0
+            text = "\n\n".join(text.strip() for text in texts)
+            return self.write_result(request, text, pages, numbered_pages(texts, first))
+        return self.write_result(request, self.extract(request.input_path), pages)
+
+
+class AutoEngine(OCREngine):
+    """Pick the cheapest engine that handles the document."""
+
+    name = "auto"
+    label = "Automat"
+    capabilities = EngineCapabilities(
+        scanned=True, text_layer=True, plain_documents=True, layout=False, heavy=False, output_mime_type="text/markdown"
+    )
+
+    @property
+    def fallback(self) -> OCREngine:
+        name = get_settings().ocr_auto_fallback_engine
+        return get_engine("docling" if name == self.name else name)
+
+    @property
+    def cost_per_page(self) -> float:  # type: ignore[override]
+        # Without looking at the file the scan path is the safe assumption.
+        return self.fallback.cost_per_page
+
+    def estimate_cost(
+        self,
+        page_count: Optional[int],
+        size_bytes: Optional[int] = None,
+        report: Optional[PreflightReport] = None,
+    ) -> float:
+        if report is None:
+            return super().estimate_cost(page_count, size_bytes)
+        text_cost = get_engine("text").cost_per_page * report.text_page_count
+        return text_cost + self.fallback.cost_per_page * report.ocr_page_count
+
+    def cache_options(self, options: dict[str, Any], language: Optional[str], auto_detect: bool) -> dict[str, Any]:
+        settings = get_settings()
+        return {
+            "fallback": self.fallback.name,
+            "fallback_options": self.fallback.cache_options(options, language, auto_detect),
+            "min_chars": settings.ocr_text_min_chars_per_page,
+            "min_coverage": settings.ocr_text_min_coverage,
+        }
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        text_engine = get_engine("text")
+        path = request.input_path
+        if is_plain_document(path):
+            return text_engine.run(request, pages)
+        if not is_pdf(path):
+            return self.fallback.run(request, pages)
+        report = request.preflight if pages is None else None
+        if report is None or not report.texts:
+            try:
+                report = analyze_pdf(path, pages)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Could not read the text layer of %s: %s", path.name, exc)
+                return self.fallback.run(request, pages)
+        if not report.ocr_page_count:
+            logger.info("Job %s has a text layer on every page, skipping OCR", request.job_id)
+            first = pages[0] if pages is not None else 0
+            return text_engine.write_result(request, report.text(), pages, numbered_pages(report.texts, first))
+        fallback = self.fallback
+        if (
+            report.coverage < get_settings().ocr_text_min_coverage
+            or pages is not None
+            or fallback.capabilities.output_mime_type != "text/markdown"
+        ):
+            # Mostly scanned, or an engine that produces a PDF: the fallback sees the whole
+            # document (ocrmypdf limits itself to the image pages using the preflight report).
+            return fallback.run(request, pages)
+        return self._run_mixed(request, report, fallback)
+
+    def _run_mixed(self, request: EngineRequest, report: PreflightReport, fallback: OCREngine) -> EngineResult:
+        """Extract the text pages directly and OCR only runs of image pages."""
+        logger.info(
+            "Job %s: %s of %s pages need OCR", request.job_id, report.ocr_page_count, report.page_count
+        )
+        parts = []
+        page_texts: list[PageText] = []
+        done = 0
+        for kind, first, last in report.runs():
+            if kind == TEXT_PAGE:
+                parts.append(report.text(first, last))
+                page_texts.extend(numbered_pages(report.texts[first : last + 1], first))
+            elif kind == OCR_PAGE:
+                partial = fallback.run(request, (first, last))
+                parts.append(partial.text or "")
+                if partial.text and partial.text.strip():
+                    # The OCR output of a run has no page breaks; it is kept under the run's first page.
+                    page_texts.append((first + 1, partial.text.strip()))
+                partial.output_path.unlink(missing_ok=True)
+                done += last - first + 1
+                if request.on_progress:
+                    request.on_progress(done, report.ocr_page_count)
+        text = "\n\n".join(part for part in parts if part.strip())
+        output_path = _output_path(request, f"{fallback.name}_text", ".md", None)
+        output_path.write_text(text, encoding="utf-8")
+        return EngineResult(output_path, "text/markdown", text, f"{fallback.name}+text", page_texts)
+
+
+_ENGINES: dict[str, OCREngine] = {}
+
+
+def register_engine(engine: OCREngine) -> None:
+    _ENGINES[engine.name] = engine
+
+
+def get_engine(name: str) -> OCREngine:
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Motor OCR necunoscut: {name}") from None
+
+
+def engine_names() -> list[str]:
+    return list(_ENGINES)
+
+
+def available_engines() -> list[OCREngine]:
+    return list(_ENGINES.values())
+
+
+for _engine in (AutoEngine(), DoclingEngine(), OcrmypdfEngine(), TextEngine()):
+    register_engine(_engine)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_DATAGRAM_BYTES = 64 * 1024
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def events_dir() -> Path:
+    directory = get_settings().data_dir / "run" / "events"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def publish_event(kind: str, payload: dict[str, Any]) -> None:
+    """Send an event to every process on this node that has subscribers.
+
+    Each listening process binds a Unix datagram socket in ``events_dir()``;
+    publishing is a non-blocking send to each of them, so workers never wait
+    on slow or dead listeners. Sockets left behind by dead processes are removed.
+    """
+    message = json.dumps({"type": kind, "data": payload}, default=str).encode("utf-8")
+    if len(message) > MAX_DATAGRAM_BYTES:
+        logger.warning("Dropping %s event larger than %s bytes", kind, MAX_DATAGRAM_BYTES)
+        return
+    try:
+        targets = list(events_dir().glob("*.sock"))
+    except OSError:  # pragma: no cover - defensive branch
+        return
+    if not targets:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for target in targets:
+            try:
+                sender.sendto(message, str(target))
+            except (ConnectionRefusedError, FileNotFoundError):
+                target.unlink(missing_ok=True)
+            except (BlockingIOError, OSError) as exc:
+                logger.debug("Could not deliver %s event to %s: %s", kind, target.name, exc)
+
+
+class EventBroker:
+    """Receive published events in this process and fan them out to local subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._path: Optional[Path] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_listening(self) -> None:
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        path = events_dir() / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.bind(str(path))
+        self._socket = listener
+        self._path = path
+        self._pid = os.getpid()
+        atexit.register(path.unlink, missing_ok=True)
+        self._thread = threading.Thread(target=self._receive, args=(listener,), name="event-broker", daemon=True)
+        self._thread.start()
+
+    def _receive(self, listener: socket.socket) -> None:
+        while True:
+            try:
+                data = listener.recv(MAX_DATAGRAM_BYTES)
+            except OSError:
+                return
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # A stalled client misses deltas; it resynchronizes on reconnect.
+                    pass
+
+    def subscribe(self, limit: Optional[int] = None) -> Optional[queue.Queue]:
+        """Add a subscriber, or return None when ``limit`` subscribers are already connected."""
+        subscriber: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._ensure_listening()
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+
+broker = EventBroker()
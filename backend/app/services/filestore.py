@@ -0,0 +1,286 @@
+"""Where uploads, results and Word documents live: the data directory or an S3-compatible bucket.
+
+Objects are addressed by keys relative to ``data_dir`` (``uploads/<name>``,
+``results/<name>``, ``results/word_documents/<name>``, ``text/<name>.pages``),
+the same paths ``StoredFile`` records. Engines and converters need real
+files, so code keeps working on local paths: ``fetch`` makes an object
+available under ``data_dir`` and ``publish`` stores a file written there.
+Readers that only pass the bytes on, such as folder archives, stream the
+object with ``iter_bytes`` instead.
+
+With the local backend both are no-ops and files stay where they always
+were. With the S3 backend (``STORAGE_BACKEND=s3``) ``data_dir`` only holds
+node-local copies: the web process publishes uploads, any worker node pulls
+its input and pushes its outputs with multipart transfers, and downloads are
+redirected to presigned URLs, so the bucket answers range and conditional
+requests. Copies fetched to a node are recorded per node and trimmed by the
+storage manager (see ``LocalCopy``).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER = 1024 * 1024
+
+# Local copies fetched (size, read time) or read again (None, read time) since
+# the last sync, by key; None once the copy is gone. The storage manager moves
+# them to the LocalCopy table (services/storage.py) so requests never write.
+_copy_reads: dict[str, Optional[tuple[Optional[int], datetime]]] = {}
+_copy_reads_lock = threading.Lock()
+
+
+def _note_copy(key: str, size: Optional[int]) -> None:
+    now = datetime.utcnow()
+    with _copy_reads_lock:
+        seen = _copy_reads.get(key)
+        if size is None and seen is not None:
+            size = seen[0]
+        _copy_reads[key] = (size, now)
+
+
+def _forget_copy(key: str) -> None:
+    with _copy_reads_lock:
+        _copy_reads[key] = None
+
+
+def drain_copy_reads() -> dict[str, Optional[tuple[Optional[int], datetime]]]:
+    global _copy_reads  # pylint: disable=global-statement
+    with _copy_reads_lock:
+        reads, _copy_reads = _copy_reads, {}
+    return reads
+
+
+class FileStore:
+    """Local filesystem under ``data_dir``; the base for remote stores."""
+
+    name = "local"
+    remote = False
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def key_for(self, path: Path) -> str:
+        return path.resolve().relative_to(self.root.resolve()).as_posix()
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).exists()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.local_path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, key: str) -> Path:
+        """Return a local path holding the object, raising ``FileNotFoundError`` if there is none."""
+        path = self.local_path(key)
+        if not path.exists():
+            raise FileNotFoundError(key)
+        return path
+
+    def publish(self, key: str) -> None:
+        """Store the local file of ``key`` so every node can read it."""
+
+    def release(self, key: str) -> None:
+        """Drop the local copy of a published object when it is not the object itself."""
+
+    def open(self, key: str) -> BinaryIO:
+        """Open the object for streaming reads, without a local copy."""
+        return self.local_path(key).open("rb")
+
+    def iter_bytes(self, key: str, chunk_size: int = COPY_BUFFER) -> Iterator[bytes]:
+        with self.open(key) as handle:
+            while chunk := handle.read(chunk_size):
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        self.local_path(key).unlink(missing_ok=True)
+
+    def download_url(self, key: str, download_name: str, mimetype: str) -> Optional[str]:
+        """Return a URL clients can download ``key`` from directly, if the store has one."""
+        return None
+
+
+class S3FileStore(FileStore):
+    """Objects in an S3-compatible bucket, with ``data_dir`` as the local copy."""
+
+    name = "s3"
+    remote = True
+
+    def __init__(self, root: Path, bucket: str, prefix: str = "") -> None:
+        super().__init__(root)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                import boto3
+                from botocore.config import Config
+
+                settings = get_settings()
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=settings.storage_s3_endpoint_url,
+                    region_name=settings.storage_s3_region,
+                    aws_access_key_id=settings.storage_s3_access_key_id,
+                    aws_secret_access_key=settings.storage_s3_secret_access_key,
+                    # Stand-ins such as MinIO serve buckets under the path, not a subdomain.
+                    config=Config(s3={"addressing_style": "path" if settings.storage_s3_endpoint_url else "auto"}),
+                )
+            return self._client
+
+    @property
+    def transfer_config(self) -> Any:
+        from boto3.s3.transfer import TransferConfig
+
+        settings = get_settings()
+        return TransferConfig(
+            multipart_threshold=settings.storage_s3_multipart_threshold,
+            multipart_chunksize=settings.storage_s3_multipart_chunk_size,
+            max_concurrency=settings.storage_s3_max_concurrency,
+        )
+
+    def object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _missing(self, exc: Exception) -> bool:
+        from botocore.exceptions import ClientError
+
+        return isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") in {
+            "404",
+            "NoSuchKey",
+            "NotFound",
+        }
+
+    def _head(self, key: str) -> Optional[dict[str, Any]]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as exc:  # pylint: disable=broad-except
+            if self._missing(exc):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return super().exists(key) or self._head(key) is not None
+
+    def size(self, key: str) -> Optional[int]:
+        head = self._head(key)
+        return None if head is None else head["ContentLength"]
+
+    def fetch(self, key: str) -> Path:
+        path = self.local_path(key)
+        if path.exists():
+            # Keys are never rewritten, so a local copy is always current.
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.client.download_file(self.bucket, self.object_key(key), str(temporary), Config=self.transfer_config)
+        except Exception as exc:  # pylint: disable=broad-except
+            temporary.unlink(missing_ok=True)
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        os.replace(temporary, path)
+        return path
+
+    def publish(self, key: str) -> None:
+        path = self.local_path(key)
+        self.client.upload_file(str(path), self.bucket, self.object_key(key), Config=self.transfer_config)
+
+    def release(self, key: str) -> None:
+        self.local_path(key).unlink(missing_ok=True)
+        _forget_copy(key)
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as exc:  # pylint: disable=broad-except
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        return response["Body"]
+
+    def delete(self, key: str) -> None:
+        super().delete(key)
+        _forget_copy(key)
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def download_url(self, key: str, download_name: str, mimetype: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(key),
+                "ResponseContentType": mimetype,
+                "ResponseContentDisposition": f"attachment; filename*=UTF-8''{quote(download_name)}",
+            },
+            ExpiresIn=get_settings().storage_s3_presign_seconds,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_file_store() -> FileStore:
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        if not settings.storage_s3_bucket:
+            raise RuntimeError("STORAGE_S3_BUCKET is required with STORAGE_BACKEND=s3")
+        return S3FileStore(settings.data_dir, settings.storage_s3_bucket, settings.storage_s3_prefix)
+    return FileStore(settings.data_dir)
+
+
+def fetch_path(path: Path) -> Path:
+    """Make the object stored for ``path`` available there, returning ``path`` either way."""
+    store = get_file_store()
+    if not store.remote:
+        return path
+    key = store.key_for(path)
+    if path.exists():
+        # Only bumps the read time of a known copy: files written here may not be published yet.
+        _note_copy(key, None)
+        return path
+    try:
+        fetched = store.fetch(key)
+    except FileNotFoundError:
+        return path
+    _note_copy(key, fetched.stat().st_size)
+    from .storage import local_copies_due, trim_local_copies
+
+    if local_copies_due():
+        threading.Thread(target=trim_local_copies, name="trim-local-copies", daemon=True).start()
+    return fetched
+
+
+def publish_path(path: Path, keep_local: bool = False) -> None:
+    """Store a file written under ``data_dir``, dropping the local copy unless ``keep_local``."""
+    store = get_file_store()
+    if not store.remote or not path.exists():
+        return
+    key = store.key_for(path)
+    store.publish(key)
+    if not keep_local:
+        store.release(key)
+
+
+def discard_path(path: Path) -> None:
+    """Delete a file written under ``data_dir`` together with its stored object, if any."""
+    store = get_file_store()
+    store.delete(store.key_for(path))
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
-import io
 import logging
 import zipfile
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+from sqlalchemy import func
 from sqlmodel import Session, select
 
 from ..config import get_settings
 from ..models import Folder, OCRJob, WordDocument
 from ..schemas import FolderRead
 from .ocr import ensure_storage_dirs
+from .search import retag_job
+from .storage import iter_stored
 
 logger = logging.getLogger(__name__)
 
@@ -78,14 +81,18 @@ def delete_folder(session: Session, folder_id: int) -> bool:
     
     # Remove folder reference from OCR jobs
     ocr_jobs = session.exec(select(OCRJob).where(OCRJob.folder_id == folder_id)).all()
+    now = datetime.utcnow()
     for job in ocr_jobs:
         job.folder_id = None
+        job.updated_at = now
         session.add(job)
+        retag_job(session, job)
     
     # Remove folder reference from Word documents
     word_docs = session.exec(select(WordDocument).where(WordDocument.folder_id == folder_id)).all()
     for doc in word_docs:
         doc.folder_id = None
+        doc.updated_at = now
         session.add(doc)
     
     session.delete(folder)
@@ -93,55 +100,163 @@ def delete_folder(session: Session, folder_id: int) -> bool:
     return True
 
 
-def get_folder_document_count(session: Session, folder_id: int) -> int:
-    ocr_count = len(list(session.exec(select(OCRJob).where(OCRJob.folder_id == folder_id)).all()))
-    word_count = len(list(session.exec(select(WordDocument).where(WordDocument.folder_id == folder_id)).all()))
-    return ocr_count + word_count
+def folder_document_counts(session: Session) -> dict[int, int]:
+    """Count the OCR jobs and Word documents filed directly in each folder."""
+    counts: dict[int, int] = {}
+    for model in (OCRJob, WordDocument):
+        statement = (
+            select(model.folder_id, func.count())
+            .where(model.folder_id.is_not(None))
+            .group_by(model.folder_id)
+        )
+        for folder_id, count in session.exec(statement).all():
+            counts[folder_id] = counts.get(folder_id, 0) + count
+    return counts
+
+
+def _subtree_counts(parents: dict[int, Optional[int]], direct: dict[int, int]) -> dict[int, int]:
+    """Add every folder's direct count to itself and all of its ancestors."""
+    totals = dict.fromkeys(parents, 0)
+    for folder_id in parents:
+        count = direct.get(folder_id, 0)
+        if not count:
+            continue
+        seen: set[int] = set()
+        current: Optional[int] = folder_id
+        # ``seen`` guards against parent_id cycles created through PATCH.
+        while current is not None and current in totals and current not in seen:
+            seen.add(current)
+            totals[current] += count
+            current = parents[current]
+    return totals
+
+
+def serialize_folders(session: Session, folders: list[Folder]) -> list[FolderRead]:
+    """Serialize ``folders`` with document counts from two aggregate queries."""
+    direct = folder_document_counts(session)
+    parents = dict(session.exec(select(Folder.id, Folder.parent_id)).all())
+    totals = _subtree_counts(parents, direct)
+    return [
+        FolderRead(
+            id=folder.id,
+            name=folder.name,
+            description=folder.description,
+            color=folder.color,
+            parent_id=folder.parent_id,
+            created_at=folder.created_at,
+            updated_at=folder.updated_at,
+            document_count=direct.get(folder.id, 0),
+            total_document_count=totals.get(folder.id, 0),
+        )
+        for folder in folders
+    ]
 
 
 def serialize_folder(session: Session, folder: Folder) -> FolderRead:
-    return FolderRead(
-        id=folder.id,
-        name=folder.name,
-        description=folder.description,
-        color=folder.color,
-        parent_id=folder.parent_id,
-        created_at=folder.created_at,
-        updated_at=folder.updated_at,
-        document_count=get_folder_document_count(session, folder.id),
-    )
+    return serialize_folders(session, [folder])[0]
+
+
+# Formats that are already compressed gain nothing from deflate.
+STORED_SUFFIXES = {".pdf", ".docx", ".zip", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+ZIP_READ_CHUNK = 1024 * 1024
+ZIP_EPOCH = datetime(1980, 1, 1)
+
+
+class _ZipSink:
+    """Write-only, unseekable target that lets ``zipfile`` emit data descriptors."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
 
-def create_folder_zip(session: Session, folder_id: int) -> Optional[io.BytesIO]:
-    """Create a ZIP file containing all documents in a folder."""
+def _unique_arcname(name: str, used: set[str]) -> str:
+    if name not in used:
+        used.add(name)
+        return name
+    path = Path(name)
+    counter = 2
+    while True:
+        candidate = str(path.with_name(f"{path.stem} ({counter}){path.suffix}"))
+        if candidate not in used:
+            used.add(candidate)
+            return candidate
+        counter += 1
+
+
+def folder_zip_entries(session: Session, folder_id: int) -> list[tuple[Path, str, datetime]]:
+    """List the files of a folder as ``(path, arcname, modified)`` with unique arcnames.
+
+    Nothing is read here: files are opened one at a time while the archive
+    streams, so the first byte does not wait for the whole folder.
+    """
+    results_dir = ensure_storage_dirs(get_settings().data_dir)["results"]
+    word_dir = results_dir / "word_documents"
+    used: set[str] = set()
+    entries: list[tuple[Path, str, datetime]] = []
+
+    jobs = session.exec(
+        select(OCRJob.original_filename, OCRJob.output_filename, OCRJob.finished_at, OCRJob.updated_at)
+        .where(OCRJob.folder_id == folder_id, OCRJob.output_filename.is_not(None))
+        .order_by(OCRJob.id)
+    ).all()
+    for original_filename, output_filename, finished_at, updated_at in jobs:
+        file_path = results_dir / output_filename
+        # Docling results are Markdown, so name them after the output format.
+        name = Path(Path(original_filename).name).with_suffix(file_path.suffix).name
+        entries.append((file_path, _unique_arcname(f"ocr/{name}", used), finished_at or updated_at))
+
+    documents = session.exec(
+        select(WordDocument.file_name, WordDocument.updated_at)
+        .where(WordDocument.folder_id == folder_id)
+        .order_by(WordDocument.id)
+    ).all()
+    for file_name, updated_at in documents:
+        entries.append((word_dir / file_name, _unique_arcname(f"word/{file_name}", used), updated_at))
+    return entries
+
+
+def stream_zip(entries: list[tuple[Path, str, datetime]]) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``entries`` while reading the files, in constant memory."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for file_path, arcname, modified in entries:
+            chunks = iter_stored(file_path, ZIP_READ_CHUNK)
+            try:
+                first = next(chunks, b"")
+            except FileNotFoundError:
+                # Deleted or purged since the job was listed.
+                logger.warning("Skipping %s in folder archive: file disappeared", file_path.name)
+                continue
+            info = zipfile.ZipInfo(arcname, date_time=max(modified, ZIP_EPOCH).timetuple()[:6])
+            info.external_attr = 0o644 << 16
+            info.compress_type = (
+                zipfile.ZIP_STORED if file_path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+            )
+            with archive.open(info, "w") as target:
+                target.write(first)
+                yield sink.drain()
+                for chunk in chunks:
+                    target.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def create_folder_zip(session: Session, folder_id: int) -> Optional[Iterator[bytes]]:
+    """Return a streaming ZIP of all documents in a folder."""
     folder = get_folder(session, folder_id)
     if not folder:
         return None
-    
-    settings = get_settings()
-    dirs = ensure_storage_dirs(settings.data_dir)
-    results_dir = dirs["results"]
-    
-    # Get all documents in folder
-    ocr_jobs = list(session.exec(select(OCRJob).where(OCRJob.folder_id == folder_id)).all())
-    word_docs = list(session.exec(select(WordDocument).where(WordDocument.folder_id == folder_id)).all())
-    
-    # Create ZIP in memory
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Add OCR job outputs
-        for job in ocr_jobs:
-            if job.output_filename:
-                file_path = results_dir / job.output_filename
-                if file_path.exists():
-                    zip_file.write(file_path, f"ocr/{job.original_filename}")
-        
-        # Add Word documents
-        word_dir = results_dir / "word_documents"
-        for doc in word_docs:
-            file_path = word_dir / doc.file_name
-            if file_path.exists():
-                zip_file.write(file_path, f"word/{doc.file_name}")
-    
-    zip_buffer.seek(0)
-    return zip_buffer
+    return stream_zip(folder_zip_entries(session, folder_id))
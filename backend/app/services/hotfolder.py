@@ -0,0 +1,384 @@
+"""Hot-folder ingestion: files dropped into watched directories become OCR jobs.
+
+Discovery has two sources. inotify reports local writes as soon as a file is
+closed. A poller stats every known directory and lists only the ones whose
+mtime changed, which also catches writes on network shares that never raise
+inotify events. A discovered file is ingested once its size and mtime have
+not changed for ``hotfolder_settle_seconds``. Files in one subdirectory are
+turned into one batch through :func:`.batches.create_batch`, with the
+subdirectory mapped to a ``Folder`` of the same name. The input is then moved
+to the archive directory, keeping its relative path.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import shutil
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlmodel import Session, select as sql_select
+
+from ..config import get_settings
+from ..database import engine
+from ..models import Folder
+from .batches import create_batch
+from .events import publish_event
+from .ocr import JobParams, get_default_engine
+from .uploads import copy_stream
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+TEMPORARY_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload", ".filepart", "~")
+FAILED_DIR = "_failed"
+# A directory changed within this many seconds of being listed may change again
+# within the same mtime tick (coarse on network shares), so it is listed again.
+RACY_MTIME_SECONDS = 2.0
+
+
+def watched_roots() -> list[Path]:
+    return [Path(entry.strip()).resolve() for entry in get_settings().hotfolder_dirs.split(",") if entry.strip()]
+
+
+def archive_root() -> Path:
+    settings = get_settings()
+    return (settings.hotfolder_archive_dir or settings.data_dir / "hotfolder-archive").resolve()
+
+
+def is_candidate(path: Path) -> bool:
+    name = path.name
+    return not name.startswith((".", "~$")) and not name.lower().endswith(TEMPORARY_SUFFIXES)
+
+
+class InotifyWatcher:
+    """Minimal inotify binding. inotify is not recursive, so every directory gets its own watch."""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._paths: dict[int, Path] = {}
+
+    @classmethod
+    def create(cls) -> Optional["InotifyWatcher"]:
+        try:
+            return cls()
+        except (OSError, AttributeError) as exc:
+            logger.warning("inotify is unavailable, relying on polling: %s", exc)
+            return None
+
+    def add(self, directory: Path) -> None:
+        descriptor = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if descriptor < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                logger.warning("inotify watch limit reached at %s, polling covers the rest", directory)
+            elif error != errno.ENOENT:
+                logger.warning("Cannot watch %s: %s", directory, os.strerror(error))
+            return
+        self._paths[descriptor] = directory
+
+    def read(self, timeout: float) -> Optional[list[tuple[Path, int]]]:
+        """Return ``(path, mask)`` events, or None when the kernel queue overflowed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: list[tuple[Path, int]] = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            descriptor, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._paths.get(descriptor)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(descriptor, None)
+                continue
+            events.append((directory / os.fsdecode(name) if name else directory, mask))
+        return None if overflow else events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryPoller:
+    """Find new files by listing only the directories whose mtime changed since the last poll."""
+
+    def __init__(self, roots: list[Path], excluded: list[Path]) -> None:
+        self.roots = roots
+        self.excluded = excluded
+        self._mtimes: dict[Path, Optional[int]] = {root: None for root in roots}
+
+    def directories(self) -> list[Path]:
+        return list(self._mtimes)
+
+    def _skip_directory(self, path: Path) -> bool:
+        return path.name.startswith(".") or any(path == excluded or excluded in path.parents for excluded in self.excluded)
+
+    def add_directory(self, path: Path) -> bool:
+        if self._skip_directory(path):
+            return False
+        self._mtimes.setdefault(path, None)
+        return True
+
+    def poll(self) -> tuple[list[Path], list[Path]]:
+        """Return ``(files, new_directories)`` found in directories that changed."""
+        files: list[Path] = []
+        new_directories: list[Path] = []
+        queue = list(self._mtimes)
+        while queue:
+            directory = queue.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                if directory not in self.roots:
+                    self._mtimes.pop(directory, None)
+                continue
+            if self._mtimes.get(directory) == mtime:
+                continue
+            racy = time.time() - mtime / 1e9 < RACY_MTIME_SECONDS
+            self._mtimes[directory] = None if racy else mtime
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as exc:
+                logger.warning("Cannot list %s: %s", directory, exc)
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    if path not in self._mtimes and not self._skip_directory(path):
+                        self._mtimes[path] = None
+                        new_directories.append(path)
+                        queue.append(path)
+                elif entry.is_file(follow_symlinks=False) and is_candidate(path):
+                    files.append(path)
+        return files, new_directories
+
+
+@dataclass
+class _Pending:
+    size: int
+    mtime_ns: int
+    stable_since: float
+
+
+class HotFolderIngestor:
+    def __init__(self, roots: Optional[list[Path]] = None) -> None:
+        self.roots = roots if roots is not None else watched_roots()
+        self.archive = archive_root()
+        self.poller = DirectoryPoller(self.roots, [self.archive])
+        self.watcher: Optional[InotifyWatcher] = None
+        self.pending: dict[Path, _Pending] = {}
+        self._folders: dict[tuple[str, ...], Optional[int]] = {}
+        self._last_poll = 0.0
+
+    def start_watching(self) -> None:
+        if get_settings().hotfolder_inotify:
+            self.watcher = InotifyWatcher.create()
+        if self.watcher is not None:
+            for directory in self.poller.directories():
+                self.watcher.add(directory)
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+
+    def root_for(self, path: Path) -> Optional[Path]:
+        for root in self.roots:
+            if root in path.parents:
+                return root
+        return None
+
+    def discover(self, path: Path) -> None:
+        if path in self.pending or not is_candidate(path) or self.root_for(path) is None:
+            return
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+        self.pending[path] = _Pending(stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def _add_directories(self, directories: list[Path]) -> None:
+        for directory in directories:
+            if self.poller.add_directory(directory) and self.watcher is not None:
+                self.watcher.add(directory)
+
+    def poll(self) -> None:
+        files, directories = self.poller.poll()
+        self._add_directories(directories)
+        for path in files:
+            self.discover(path)
+        self._last_poll = time.monotonic()
+
+    def wait_for_events(self, timeout: float) -> None:
+        """Block until inotify reports something or ``timeout`` passes, then poll if one is due."""
+        if self.watcher is None:
+            time.sleep(timeout)
+        else:
+            events = self.watcher.read(timeout)
+            if events is None:
+                logger.warning("inotify queue overflowed, rescanning")
+                self.poller = DirectoryPoller(self.roots, [self.archive])
+                self._add_directories(list(self.roots))
+                self._last_poll = 0.0
+            else:
+                for path, mask in events:
+                    if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land in a new directory before its watch exists; the poll lists it.
+                        self._add_directories([path])
+                        self._last_poll = 0.0
+                    elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        self.discover(path)
+        if time.monotonic() - self._last_poll >= get_settings().hotfolder_poll_interval:
+            self.poll()
+
+    def ready(self) -> list[Path]:
+        """Pending files whose size and mtime have stayed unchanged for the settle time."""
+        settle = get_settings().hotfolder_settle_seconds
+        now = time.monotonic()
+        ready = []
+        for path, pending in list(self.pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (pending.size, pending.mtime_ns):
+                self.pending[path] = _Pending(stat.st_size, stat.st_mtime_ns, now)
+            elif now - pending.stable_since >= settle and stat.st_size > 0:
+                ready.append(path)
+        return sorted(ready)
+
+    def folder_for(self, session: Session, parts: tuple[str, ...]) -> Optional[int]:
+        """Map a subdirectory path below a watched root to a ``Folder`` chain, creating missing folders."""
+        if not parts:
+            return None
+        if parts in self._folders:
+            return self._folders[parts]
+        parent_id = self.folder_for(session, parts[:-1])
+        folder = session.exec(
+            sql_select(Folder).where(Folder.name == parts[-1], Folder.parent_id == parent_id)
+        ).first()
+        if folder is None:
+            folder = Folder(name=parts[-1], parent_id=parent_id)
+            session.add(folder)
+            session.commit()
+            session.refresh(folder)
+            logger.info("Created folder %s for hot-folder directory %s", folder.id, "/".join(parts))
+        self._folders[parts] = folder.id
+        return folder.id
+
+    def _move(self, path: Path, root: Path, target_root: Path) -> None:
+        target = target_root / root.name / path.relative_to(root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            target = target.with_name(f"{target.stem}.{datetime.utcnow():%Y%m%d%H%M%S%f}{target.suffix}")
+        shutil.move(str(path), str(target))
+
+    def _move_failed(self, path: Path, root: Path) -> None:
+        self.pending.pop(path, None)
+        try:
+            self._move(path, root, self.archive / FAILED_DIR)
+        except OSError as exc:
+            logger.error("Cannot move %s aside: %s", path, exc)
+
+    def _acceptable(self, path: Path) -> bool:
+        """Reject files a batch would fail on, so they do not take their siblings down with them."""
+        try:
+            size = path.stat().st_size
+        except OSError as exc:
+            logger.error("Hot-folder file %s is unreadable: %s", path, exc)
+            return False
+        if size == 0 or size > get_settings().upload_max_bytes:
+            logger.error("Hot-folder file %s has an unsupported size (%s bytes)", path, size)
+            return False
+        return os.access(path, os.R_OK)
+
+    def _create_batch(self, root: Path, parts: tuple[str, ...], files: list[Path]) -> tuple[int, int]:
+        settings = get_settings()
+        with Session(engine) as session:
+            params = JobParams(
+                engine=settings.hotfolder_engine or get_default_engine(session),
+                folder_id=self.folder_for(session, parts),
+                priority=settings.hotfolder_priority,
+                client_id=f"hotfolder:{root.name}",
+            )
+            sources = [(path.name, lambda destination, path=path: _copy_file(path, destination)) for path in files]
+            batch = create_batch(session, params, sources)
+            return batch.id, batch.total_jobs
+
+    def _ingest_group(self, root: Path, parts: tuple[str, ...], files: list[Path]) -> int:
+        try:
+            batch_id, total = self._create_batch(root, parts, files)
+        except Exception:  # pylint: disable=broad-except
+            if len(files) > 1:
+                # Find the offending files by ingesting the group file by file.
+                logger.warning("Hot-folder batch for %s failed, retrying file by file", root.joinpath(*parts))
+                return sum(self._ingest_group(root, parts, [path]) for path in files)
+            logger.exception("Hot-folder ingest failed for %s", files[0])
+            self._move_failed(files[0], root)
+            return 0
+        publish_event("batch", {"id": batch_id, "total_jobs": total})
+        for path in files:
+            self.pending.pop(path, None)
+            try:
+                self._move(path, root, self.archive)
+            except OSError as exc:
+                # The job exists; a file left in place is only picked up again after a restart.
+                logger.error("Cannot archive %s: %s", path, exc)
+        logger.info("Hot folder %s: batch %s with %s files", root.joinpath(*parts), batch_id, total)
+        return total
+
+    def ingest(self, paths: list[Path]) -> int:
+        """Create one batch per source directory and archive the inputs. Returns the number of jobs."""
+        settings = get_settings()
+        groups: dict[tuple[Path, tuple[str, ...]], list[Path]] = {}
+        for path in paths[: settings.hotfolder_batch_size]:
+            root = self.root_for(path)
+            if root is None:
+                continue
+            if not self._acceptable(path):
+                self._move_failed(path, root)
+                continue
+            groups.setdefault((root, path.parent.relative_to(root).parts), []).append(path)
+        return sum(self._ingest_group(root, parts, files) for (root, parts), files in groups.items())
+
+
+def _copy_file(source: Path, destination: Path) -> tuple[str, int, Optional[int]]:
+    with source.open("rb") as handle:
+        return copy_stream(handle, destination, get_settings().upload_max_bytes)
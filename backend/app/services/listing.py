@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlmodel import Session, SQLModel, select
+from werkzeug.datastructures import MultiDict
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ListingError(ValueError):
+    pass
+
+
+@dataclass
+class ListingParams:
+    limit: Optional[int] = None
+    cursor: Optional[tuple[datetime, int]] = None
+    filters: list[Any] = field(default_factory=list)
+    fields: Optional[list[str]] = None
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> tuple[datetime, int]:
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ListingError("Cursor invalid") from exc
+
+
+def _parse_datetime(value: str, name: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as exc:
+        raise ListingError(f"Parametrul {name} nu este o dată validă") from exc
+    # Timestamps are stored as naive UTC.
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_listing_params(
+    args: MultiDict,
+    model: type[SQLModel],
+    *,
+    allowed_fields: list[str],
+    filter_columns: dict[str, Callable[[str], Any]],
+) -> ListingParams:
+    """Translate query-string arguments into keyset pagination, filters and a field projection.
+
+    ``filter_columns`` maps a query parameter to a converter for its value;
+    repeated parameters (``?status=queued&status=processing``) become IN filters.
+    """
+    params = ListingParams()
+
+    if "limit" in args or "cursor" in args:
+        try:
+            limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError as exc:
+            raise ListingError("Parametrul limit este invalid") from exc
+        params.limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if args.get("cursor"):
+        params.cursor = decode_cursor(args["cursor"])
+
+    for name, convert in filter_columns.items():
+        values = [value for value in args.getlist(name) if value != ""]
+        if not values:
+            continue
+        column = getattr(model, name)
+        try:
+            converted = [convert(value) for value in values]
+        except ValueError as exc:
+            raise ListingError(f"Filtrul {name} este invalid") from exc
+        params.filters.append(column == converted[0] if len(converted) == 1 else column.in_(converted))
+
+    if args.get("created_after"):
+        params.filters.append(model.created_at >= _parse_datetime(args["created_after"], "created_after"))
+    if args.get("created_before"):
+        params.filters.append(model.created_at < _parse_datetime(args["created_before"], "created_before"))
+
+    if args.get("fields"):
+        requested = [name.strip() for name in args["fields"].split(",") if name.strip()]
+        unknown = sorted(set(requested) - set(allowed_fields))
+        if unknown:
+            raise ListingError(f"Câmpuri necunoscute: {', '.join(unknown)}")
+        params.fields = requested
+
+    return params
+
+
+def listing_etag(session: Session, model: type[SQLModel], params: ListingParams, query_string: bytes) -> str:
+    """Build an ETag from the newest ``updated_at`` and the row count of the filtered set.
+
+    Creations and updates move ``updated_at`` and deletions change the count,
+    so an unchanged tag means the listing can be answered with 304.
+    """
+    latest, count = session.exec(
+        select(func.max(model.updated_at), func.count()).select_from(model).where(*params.filters)
+    ).one()
+    digest = hashlib.sha1()
+    digest.update(f"{latest.isoformat() if latest else ''}|{count}|".encode("utf-8"))
+    digest.update(query_string)
+    return digest.hexdigest()
+
+
+def fetch_listing(
+    session: Session,
+    model: type[SQLModel],
+    params: ListingParams,
+    columns: list[str],
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    """Load the selected columns, newest first, and return the rows plus the next cursor."""
+    needed = list(dict.fromkeys(["id", "created_at", *columns]))
+    statement = (
+        select(*(getattr(model, name) for name in needed))
+        .where(*params.filters)
+        .order_by(model.created_at.desc(), model.id.desc())
+    )
+    if params.cursor is not None:
+        created_at, row_id = params.cursor
+        statement = statement.where(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id),
+            )
+        )
+    if params.limit is not None:
+        statement = statement.limit(params.limit + 1)
+
+    rows = [dict(zip(needed, row)) for row in session.exec(statement).all()]
+    next_cursor = None
+    if params.limit is not None and len(rows) > params.limit:
+        rows = rows[: params.limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
@@ -1,10 +1,131 @@
 from __future__ import annotations
 
-from typing import Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional
 
-from mistralai import Mistral
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
 
 from ..config import get_settings
+from ..database import engine
+from ..models import SummaryCacheEntry
+
+if TYPE_CHECKING:
+    from mistralai import Mistral
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are an assistant that summarizes OCR extracted text into concise Romanian summaries."
+TEMPERATURE = 0.2
+MAX_TOKENS = 300
+
+_client: Optional[Mistral] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Mistral:
+    """Return the process-wide client; its HTTP pool keeps connections alive between calls."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import httpx
+            from mistralai import Mistral
+
+            settings = get_settings()
+            connections = max(settings.summary_concurrency, 1) * 2
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(settings.mistral_timeout_seconds, connect=10.0),
+                limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            )
+            _client = Mistral(
+                api_key=settings.mistral_api_key,
+                server_url=settings.mistral_server_url,
+                client=http_client,
+                timeout_ms=int(settings.mistral_timeout_seconds * 1000),
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def summary_cache_key(prompt: str, model: str) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": SYSTEM_PROMPT,
+            "prompt": prompt,
+            "temperature": TEMPERATURE,
+            "max_tokens": MAX_TOKENS,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_summary(prompt: str, session: Optional[Session] = None) -> Optional[str]:
+    """Return the memoized summary for ``prompt`` and record the hit.
+
+    With ``session`` the lookup joins the caller's transaction and the caller
+    commits; a separate connection would wait on the write lock the caller
+    may already hold.
+    """
+    if session is None:
+        with Session(engine) as own_session:
+            summary = get_cached_summary(prompt, own_session)
+            own_session.commit()
+            return summary
+    settings = get_settings()
+    key = summary_cache_key(prompt, settings.mistral_model)
+    now = datetime.utcnow()
+    entry = session.get(SummaryCacheEntry, key)
+    if entry is None:
+        return None
+    if entry.created_at < now - timedelta(days=settings.summary_cache_ttl_days):
+        session.delete(entry)
+        return None
+    entry.hits += 1
+    entry.last_used_at = now
+    session.add(entry)
+    return entry.summary
+
+
+def store_summary(prompt: str, summary: str) -> None:
+    settings = get_settings()
+    key = summary_cache_key(prompt, settings.mistral_model)
+    with Session(engine) as session:
+        entry = session.get(SummaryCacheEntry, key)
+        if entry is None:
+            entry = SummaryCacheEntry(key=key, model=settings.mistral_model, summary=summary)
+        else:
+            entry.summary = summary
+            entry.created_at = entry.last_used_at = entry.updated_at = datetime.utcnow()
+        session.add(entry)
+        session.commit()
+        evict_summary_cache(session)
+
+
+def evict_summary_cache(session: Session) -> int:
+    """Drop expired entries, then the least recently used ones beyond the entry limit."""
+    settings = get_settings()
+    cutoff = datetime.utcnow() - timedelta(days=settings.summary_cache_ttl_days)
+    removed = session.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.created_at < cutoff)).rowcount
+    excess = session.exec(select(func.count()).select_from(SummaryCacheEntry)).one() - settings.summary_cache_max_entries
+    if excess > 0:
+        oldest = (
+            select(SummaryCacheEntry.key)
+            .order_by(SummaryCacheEntry.last_used_at)
+            .limit(excess)
+            .scalar_subquery()
+        )
+        removed += session.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.key.in_(oldest))).rowcount
+    session.commit()
+    return removed
 
 
 def generate_summary(prompt: str) -> Optional[str]:
@@ -12,22 +133,28 @@ def generate_summary(prompt: str) -> Optional[str]:
     if not settings.mistral_api_key:
         return None
 
-    client = Mistral(api_key=settings.mistral_api_key)
-    chat_response = client.chat.complete(
-        model="mistral-large-latest",
+    cached = get_cached_summary(prompt)
+    if cached is not None:
+        return cached
+
+    chat_response = get_client().chat.complete(
+        model=settings.mistral_model,
         messages=[
             {
                 "role": "system",
-                "content": "You are an assistant that summarizes OCR extracted text into concise Romanian summaries.",
+                "content": SYSTEM_PROMPT,
             },
             {
                 "role": "user",
                 "content": prompt,
             },
         ],
-        temperature=0.2,
-        max_tokens=300,
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
     )
     if chat_response.choices:
-        return chat_response.choices[0].message.content
+        summary = chat_response.choices[0].message.content
+        if summary:
+            store_summary(prompt, summary)
+        return summary
     return None
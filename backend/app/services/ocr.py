@@ -2,28 +2,59 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional
 
-import ocrmypdf
-from docling.document_converter import DocumentConverter
 from sqlmodel import Session, select
+from werkzeug.utils import secure_filename
 
 from ..config import get_settings
 from ..database import engine
 from ..models import OCRJob, Setting
 from ..schemas import OCRJobDetail, OCRJobRead
-from .mistral_client import generate_summary
+from .downloads import precompress_output
+from .engines import EngineRequest, get_engine
+from .events import publish_event
+from .preflight import PreflightReport, analyze_pdf
+from .result_cache import (
+    attach_cached_result,
+    build_cache_key,
+    get_cached_result,
+    record_excerpt,
+    register_result,
+)
+from .scheduler import classify_job, estimate_job_cost, share_key_for
+from .search import index_completed_job
+from .filestore import discard_path, fetch_path
+from .storage import publish_job_output, release_upload, track_file, track_job_output
+from .textstore import chunk_text, join_pages, save_job_text, text_excerpt
+from .sharding import is_pdf
+from .summaries import request_summary
+
+if TYPE_CHECKING:
+    from docling.document_converter import DocumentConverter
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = {"completed", "failed"}
+
 _converter: DocumentConverter | None = None
 
 
 def get_converter() -> DocumentConverter:
+    """Return the process-wide docling converter, importing docling on first use.
+
+    The OCR engines (and torch behind docling) are only imported by the code
+    that runs jobs, so the web process starts without them.
+    """
     global _converter
     if _converter is None:
+        from docling.document_converter import DocumentConverter
+
         _converter = DocumentConverter()
     return _converter
 
@@ -39,7 +70,7 @@ def ensure_storage_dirs(base_dir: Path) -> dict[str, Path]:
 def get_default_engine(session: Session) -> str:
     statement = select(Setting).where(Setting.key == "ocr_engine")
     setting = session.exec(statement).first()
-    return setting.value if setting else "docling"
+    return setting.value if setting else get_settings().ocr_default_engine
 
 
 def set_default_engine(session: Session, engine: str) -> None:
@@ -58,6 +89,7 @@ def serialize_job(job: OCRJob, prefix: str) -> OCRJobRead:
         id=job.id,
         original_filename=job.original_filename,
         engine=job.engine,
+        resolved_engine=job.resolved_engine,
         auto_detect=job.auto_detect,
         language=job.language,
         folder=job.folder,
@@ -67,14 +99,44 @@ def serialize_job(job: OCRJob, prefix: str) -> OCRJobRead:
         error=job.error,
         output_filename=job.output_filename,
         output_mime_type=job.output_mime_type,
-        text_excerpt=job.text_excerpt,
+        text_excerpt=text_excerpt(job.output_filename, job.text_excerpt),
         summary=job.summary,
+        priority_class=job.priority_class,
+        page_count=job.page_count,
+        text_page_count=job.text_page_count,
+        ocr_page_count=job.ocr_page_count,
         created_at=job.created_at,
         updated_at=job.updated_at,
         download_url=f"{prefix}/ocr/jobs/{job.id}/download" if job.output_filename else None,
     )
 
 
+JOB_LIST_FIELDS = list(OCRJobRead.model_fields)
+# Listings leave out the text columns unless ``fields`` asks for them.
+JOB_LIST_DEFAULT_FIELDS = [name for name in JOB_LIST_FIELDS if name not in ("text_excerpt", "summary")]
+
+
+def job_list_columns(fields: list[str]) -> list[str]:
+    columns = [name for name in fields if name != "download_url"]
+    if "download_url" in fields or "text_excerpt" in fields:
+        # The excerpt is read from the page store named after the output.
+        columns.append("output_filename")
+    return columns
+
+
+def project_job_row(row: dict[str, Any], fields: list[str], prefix: str) -> dict[str, Any]:
+    """Build a listing entry with only ``fields`` from a partially loaded job row."""
+    item = {}
+    for name in fields:
+        if name == "download_url":
+            item[name] = f"{prefix}/ocr/jobs/{row['id']}/download" if row.get("output_filename") else None
+        elif name == "text_excerpt":
+            item[name] = text_excerpt(row.get("output_filename"), row[name])
+        else:
+            item[name] = row[name]
+    return item
+
+
 def serialize_job_detail(job: OCRJob, prefix: str) -> OCRJobDetail:
     options = json.loads(job.options) if job.options else None
     base = serialize_job(job, prefix).model_dump()
@@ -82,6 +144,48 @@ def serialize_job_detail(job: OCRJob, prefix: str) -> OCRJobDetail:
     return OCRJobDetail(**base)
 
 
+def _job_event_payload(job: OCRJob) -> dict[str, Any]:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "output_filename": job.output_filename,
+        "output_mime_type": job.output_mime_type,
+        "summary": job.summary,
+        "updated_at": job.updated_at.isoformat(),
+    }
+
+
+def publish_job_event(job: OCRJob) -> None:
+    publish_event("job", _job_event_payload(job))
+
+
+_progress_writes: dict[int, float] = {}
+_progress_lock = threading.Lock()
+
+
+def _coalesce_progress(job_id: int, status: str, previous_status: str, error: Optional[str]) -> bool:
+    """Return True when a progress-only update arrives too soon after the last write.
+
+    Status changes and errors are always written; plain progress ticks are
+    written at most once per ``job_progress_write_interval`` seconds per job.
+    """
+    now = time.monotonic()
+    with _progress_lock:
+        if status != "processing" or status != previous_status or error is not None:
+            if status in TERMINAL_STATUSES:
+                _progress_writes.pop(job_id, None)
+            else:
+                _progress_writes[job_id] = now
+            return False
+        last = _progress_writes.get(job_id)
+        if last is not None and now - last < get_settings().job_progress_write_interval:
+            return True
+        _progress_writes[job_id] = now
+        return False
+
+
 def update_job_status(
     session: Session,
     job: OCRJob,
@@ -90,29 +194,142 @@ def update_job_status(
     progress: int,
     error: Optional[str] = None,
 ) -> None:
+    if _coalesce_progress(job.id, status, job.status, error):
+        return
     job.status = status
     job.progress = progress
     job.error = error
     job.updated_at = datetime.utcnow()
+    if status in TERMINAL_STATUSES:
+        job.finished_at = job.updated_at
     session.add(job)
+    # Built before the commit expires the instance, so publishing needs no reload.
+    payload = _job_event_payload(job)
     session.commit()
-    session.refresh(job)
+    publish_event("job", payload)
+
+
+def result_cache_key(
+    content_hash: str,
+    engine_name: str,
+    options: dict[str, Any],
+    language: Optional[str],
+    auto_detect: bool,
+) -> str:
+    # Only the options an engine actually uses may split the cache.
+    normalized = get_engine(engine_name).cache_options(options, language, auto_detect)
+    return build_cache_key(
+        content_hash, engine_name, normalized, None if auto_detect else (language or None)
+    )
 
 
-def language_to_tesseract_code(language: Optional[str]) -> Optional[str]:
-    if not language:
+@dataclass
+class JobParams:
+    """Upload options shared by every job created from one request."""
+
+    engine: str
+    auto_detect: bool = True
+    language: Optional[str] = None
+    folder: Optional[str] = None
+    folder_id: Optional[int] = None
+    options: Optional[dict[str, Any]] = None
+    priority: Optional[str] = None
+    client_id: Optional[str] = None
+
+
+def new_upload_path(original_filename: str) -> tuple[str, Path]:
+    """Pick a free stored filename in the uploads directory for ``original_filename``."""
+    uploads = ensure_storage_dirs(get_settings().data_dir)["uploads"]
+    sanitized_filename = secure_filename(original_filename) or "upload"
+    while True:
+        stored_filename = f"{time.time_ns()}_{sanitized_filename}"
+        if not (uploads / stored_filename).exists():
+            return stored_filename, uploads / stored_filename
+
+
+def build_job(
+    session: Session,
+    params: JobParams,
+    original_filename: str,
+    stored_filename: str,
+    content_hash: str,
+    size_bytes: int,
+    page_count: Optional[int],
+    batch_id: Optional[int] = None,
+) -> OCRJob:
+    """Add a job for a stored upload, completed straight from the result cache when possible.
+
+    The caller publishes the upload to the file store before (see
+    ``publish_path``) and commits; the upload of a job completed from the
+    cache is then removed with :func:`discard_uploads`.
+    """
+    job = OCRJob(
+        original_filename=original_filename,
+        stored_filename=stored_filename,
+        engine=params.engine,
+        auto_detect=params.auto_detect,
+        language=params.language,
+        folder=params.folder,
+        folder_id=params.folder_id,
+        batch_id=batch_id,
+        options=json.dumps(params.options) if params.options else None,
+        content_hash=content_hash,
+        size_bytes=size_bytes,
+        page_count=page_count,
+        cache_key=result_cache_key(
+            content_hash, params.engine, params.options or {}, params.language, params.auto_detect
+        ),
+        priority_class=classify_job(page_count, params.priority),
+        cost=estimate_job_cost(params.engine, page_count, size_bytes),
+        client_id=params.client_id,
+        share_key=share_key_for(params.client_id, params.folder_id),
+    )
+    upload_path = ensure_storage_dirs(get_settings().data_dir)["uploads"] / stored_filename
+    cached = get_cached_result(session, job.cache_key) if get_settings().result_cache_enabled else None
+    if cached is not None:
+        attach_cached_result(session, job, cached)
+    else:
+        track_file(session, upload_path, "upload", size_bytes=size_bytes)
+    session.add(job)
+    return job
+
+
+def discard_uploads(stored_filenames: list[str]) -> None:
+    """Delete uploads that committed jobs do not need, i.e. of jobs completed from the cache."""
+    uploads = ensure_storage_dirs(get_settings().data_dir)["uploads"]
+    for stored_filename in stored_filenames:
+        try:
+            discard_path(uploads / stored_filename)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Cannot delete upload %s", stored_filename)
+
+
+def run_preflight(session: Session, job: OCRJob, input_path: Path) -> Optional[PreflightReport]:
+    """Classify the pages of a PDF and store the counts on the job before any engine runs."""
+    if not is_pdf(input_path):
         return None
-    mapping = {
-        "romanian": "ron",
-        "english": "eng",
-        "german": "deu",
-        "italian": "ita",
-        "spanish": "spa",
-        "hungarian": "hun",
-        "french": "fra",
-        "ukrainian": "ukr",
-    }
-    return mapping.get(language.lower())
+    started = time.perf_counter()
+    try:
+        report = analyze_pdf(input_path)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("Preflight failed for job %s: %s", job.id, exc)
+        return None
+    job.page_count = report.page_count
+    job.text_page_count = report.text_page_count
+    job.ocr_page_count = report.ocr_page_count
+    job.preflight = report.to_json()
+    job.cost = estimate_job_cost(job.engine, report.page_count, job.size_bytes, report)
+    session.add(job)
+    session.commit()
+    logger.info(
+        "Job %s preflight: %s pages, %s with text, %s to OCR (%.0f ms)",
+        job.id,
+        report.page_count,
+        report.text_page_count,
+        report.ocr_page_count,
+        (time.perf_counter() - started) * 1000,
+    )
+    return report
 
 
 def process_job(job_id: int) -> None:
@@ -127,55 +344,61 @@ def process_job(job_id: int) -> None:
 
         update_job_status(session, job, status="processing", progress=10)
 
-        input_path = dirs["uploads"] / job.stored_filename
+        input_path = fetch_path(dirs["uploads"] / job.stored_filename)
         options = json.loads(job.options) if job.options else {}
 
+        def report_pages(pages_done: int, total_pages: int) -> None:
+            update_job_status(
+                session,
+                job,
+                status="processing",
+                progress=10 + (85 * pages_done) // max(total_pages, 1),
+            )
+
         try:
-            if job.engine == "ocrmypdf":
-                output_path = dirs["results"] / f"{job.id}_ocr.pdf"
-                kwargs = {
-                    "optimize": int(options.get("optimizationLevel", 1)),
-                    "rotate_pages": bool(options.get("rotatePages", True)),
-                    "remove_background": bool(options.get("removeBackground", False)),
-                    "skip_text": bool(options.get("skipText", True)),
-                    "redo_ocr": bool(options.get("redoOcr", False)),
-                    "deskew": bool(options.get("deskew", False)),
-                    "output_type": options.get("outputType", "pdfa"),
-                }
-                language = language_to_tesseract_code(job.language) if not job.auto_detect else None
-                if language:
-                    kwargs["language"] = language
-                ocrmypdf.ocr(
-                    str(input_path),
-                    str(output_path),
-                    **kwargs,
+            report = run_preflight(session, job, input_path)
+            result = get_engine(job.engine).run(
+                EngineRequest(
+                    job_id=job.id,
+                    input_path=input_path,
+                    results_dir=dirs["results"],
+                    options=options,
+                    language=job.language,
+                    auto_detect=job.auto_detect,
+                    content_hash=job.content_hash,
+                    on_progress=report_pages,
+                    preflight=report,
                 )
-                job.output_filename = output_path.name
-                job.output_mime_type = "application/pdf"
-                text_excerpt = None
-            else:
-                converter = get_converter()
-                result = converter.convert(str(input_path))
-                markdown = result.document.export_to_markdown()
-                output_path = dirs["results"] / f"{job.id}_docling.md"
-                output_path.write_text(markdown, encoding="utf-8")
-                job.output_filename = output_path.name
-                job.output_mime_type = "text/markdown"
-                text_excerpt = markdown[:2000]
-
-            job.text_excerpt = text_excerpt
-
-            if text_excerpt:
+            )
+            job.output_filename = result.output_path.name
+            job.output_mime_type = result.mime_type
+            job.resolved_engine = result.engine
+
+            if settings.result_cache_enabled:
+                register_result(session, job)
+            if result.pages is None and result.text is not None:
+                result.pages = chunk_text(result.text)
+            pages = save_job_text(job, dirs, result.pages)
+            if settings.result_cache_enabled:
+                record_excerpt(session, job)
+            precompress_output(dirs["results"] / job.output_filename, job.output_mime_type)
+            track_job_output(session, job, dirs["results"])
+            publish_job_output(job, dirs["results"])
+            release_upload(session, job, input_path, succeeded=True)
+            summary_source = join_pages(pages, 4000)
+            if summary_source.strip() and not job.summary:
+                # Unless memoized, the summary is filled in later by the summary worker.
                 summary_prompt = (
                     "Rezuma textul extras dintr-un document scanat in 3-4 fraze in limba romana. "
                     "Textul este urmatorul:\n"
-                    f"{text_excerpt[:4000]}"
+                    f"{summary_source}"
                 )
-                summary = generate_summary(summary_prompt)
-                if summary:
-                    job.summary = summary
-
+                job.summary = request_summary(session, "job", job.id, summary_prompt)
             update_job_status(session, job, status="completed", progress=100)
         except Exception as exc:  # pylint: disable=broad-except
             logger.exception("Failed to process job %s", job_id)
             update_job_status(session, job, status="failed", progress=100, error=str(exc))
+            release_upload(session, job, input_path, succeeded=False)
+            session.commit()
+        else:
+            index_completed_job(session, job, dirs, pages)
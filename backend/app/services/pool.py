@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from typing import Optional
+
+from ..config import get_settings
+from .queue import (
+    LeaseKeeper,
+    claim_next_job,
+    make_worker_id,
+    maybe_recover_expired_leases,
+    requeue_job,
+)
+
+logger = logging.getLogger(__name__)
+
+_context = multiprocessing.get_context("spawn")
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            resident_pages = int(handle.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):  # pragma: no cover - non-Linux fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child_main(conn: Connection, preload: bool, max_jobs: int, max_rss_mb: int) -> None:
+    """Entry point of a pool process: keep one warm converter and run jobs sent by the parent."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Shutdown is coordinated by the parent, which lets running jobs finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from .ocr import get_converter, process_job
+
+    if preload:
+        get_converter()
+    conn.send(("ready", None, current_rss_mb(), False))
+
+    jobs_done = 0
+    while True:
+        try:
+            job_id = conn.recv()
+        except EOFError:
+            return
+        if job_id is None:
+            return
+        process_job(job_id)
+        jobs_done += 1
+        rss = current_rss_mb()
+        recycle = jobs_done >= max_jobs or (max_rss_mb > 0 and rss >= max_rss_mb)
+        conn.send(("done", job_id, rss, recycle))
+        if recycle:
+            logger.info("Pool process %s recycling after %s jobs (%.0f MB RSS)", os.getpid(), jobs_done, rss)
+            return
+
+
+@dataclass
+class _Slot:
+    index: int
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    conn: Optional[Connection] = None
+    ready: bool = False
+    job_id: Optional[int] = None
+    lease: Optional[LeaseKeeper] = field(default=None, repr=False)
+
+
+class ProcessPoolWorker:
+    """Run queued jobs in long-lived child processes that each keep a warm converter.
+
+    The parent owns the queue leases and heartbeats them; children only receive
+    job ids over a pipe, so a crashed child never leaves a job leased forever.
+    Children exit after ``worker_max_jobs_per_process`` jobs or once their RSS
+    crosses ``worker_max_rss_mb`` and are replaced with a fresh process.
+    """
+
+    def __init__(self, processes: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.processes = processes or settings.worker_processes or 1
+        self.poll_interval = settings.queue_poll_interval
+        self.preload = settings.worker_preload_converter
+        self.max_jobs = max(settings.worker_max_jobs_per_process, 1)
+        self.max_rss_mb = settings.worker_max_rss_mb
+        self.worker_id = make_worker_id()
+        self.stop_event = threading.Event()
+        self.slots = [_Slot(index) for index in range(self.processes)]
+
+    def _spawn(self, slot: _Slot) -> None:
+        parent_conn, child_conn = _context.Pipe()
+        process = _context.Process(
+            target=_child_main,
+            args=(child_conn, self.preload, self.max_jobs, self.max_rss_mb),
+            name=f"ocr-pool-{slot.index}",
+            # Not a daemon: pool processes may start their own shard processes.
+            daemon=False,
+        )
+        process.start()
+        child_conn.close()
+        slot.process = process
+        slot.conn = parent_conn
+        slot.ready = False
+
+    def _finish_job(self, slot: _Slot, crashed: bool = False) -> None:
+        if slot.job_id is None:
+            return
+        if slot.lease is not None:
+            slot.lease.stop(release=not crashed)
+        if crashed:
+            logger.error("Pool process for job %s exited unexpectedly", slot.job_id)
+            requeue_job(slot.job_id, self.worker_id, error="Procesul OCR s-a oprit neașteptat")
+        slot.job_id = None
+        slot.lease = None
+
+    def _reap(self, slot: _Slot) -> None:
+        if slot.process is not None and not slot.ready and slot.job_id is None:
+            logger.error("Pool process %s exited before it was ready", slot.process.pid)
+            # Avoid a tight respawn loop when the converter cannot be loaded.
+            self.stop_event.wait(self.poll_interval)
+        if slot.process is not None:
+            slot.process.join(timeout=5)
+        if slot.conn is not None:
+            slot.conn.close()
+        slot.process = None
+        slot.conn = None
+        slot.ready = False
+
+    def _handle_message(self, slot: _Slot) -> None:
+        try:
+            kind, job_id, rss, recycle = slot.conn.recv()
+        except (EOFError, OSError):
+            self._finish_job(slot, crashed=True)
+            self._reap(slot)
+            return
+        if kind == "ready":
+            slot.ready = True
+            logger.info("Pool process %s ready (%.0f MB RSS)", slot.process.pid, rss)
+            return
+        self._finish_job(slot)
+        if recycle:
+            self._reap(slot)
+
+    def _dispatch(self) -> None:
+        for slot in self.slots:
+            if self.stop_event.is_set():
+                return
+            if not slot.ready or slot.job_id is not None:
+                continue
+            job_id = claim_next_job(self.worker_id)
+            if job_id is None:
+                return
+            slot.lease = LeaseKeeper(job_id, self.worker_id)
+            slot.lease.start()
+            slot.job_id = job_id
+            slot.conn.send(job_id)
+
+    def run(self) -> None:
+        for slot in self.slots:
+            self._spawn(slot)
+
+        while True:
+            stopping = self.stop_event.is_set()
+            if stopping and all(slot.job_id is None for slot in self.slots):
+                break
+
+            for slot in self.slots:
+                if slot.process is None and not stopping:
+                    self._spawn(slot)
+                elif slot.process is not None and not slot.process.is_alive() and not slot.conn.poll():
+                    self._finish_job(slot, crashed=True)
+                    self._reap(slot)
+
+            if not stopping:
+                maybe_recover_expired_leases()
+                self._dispatch()
+
+            conns = [slot.conn for slot in self.slots if slot.conn is not None]
+            for conn in wait(conns, timeout=self.poll_interval) if conns else []:
+                slot = next(slot for slot in self.slots if slot.conn is conn)
+                self._handle_message(slot)
+
+        for slot in self.slots:
+            if slot.conn is not None:
+                try:
+                    slot.conn.send(None)
+                except OSError:
+                    pass
+            self._reap(slot)
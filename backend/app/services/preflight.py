@@ -0,0 +1,121 @@
+"""Cheap per-page analysis of PDFs, run before any OCR engine sees the file.
+
+Each page is read with pdfium, without rendering, and classified as:
+
+* ``t`` - its text layer holds at least ``ocr_text_min_chars_per_page``
+  characters, so the text can be extracted directly;
+* ``i`` - it draws something (usually a scanned image) but has too little
+  text, so it needs OCR;
+* ``b`` - it draws nothing at all and is skipped.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..config import get_settings
+
+PageRange = tuple[int, int]
+
+TEXT_PAGE = "t"
+OCR_PAGE = "i"
+BLANK_PAGE = "b"
+
+
+def extract_pdf_text(path: Path, pages: Optional[PageRange] = None) -> list[str]:
+    """Return the text layer of each page, using pdfium without rendering anything."""
+    return [text for text, _kind in _read_pages(path, pages)]
+
+
+def _read_pages(path: Path, pages: Optional[PageRange] = None) -> Iterator[tuple[str, str]]:
+    import pypdfium2 as pdfium
+
+    minimum = get_settings().ocr_text_min_chars_per_page
+    document = pdfium.PdfDocument(str(path))
+    try:
+        first, last = pages if pages is not None else (0, len(document) - 1)
+        for index in range(first, min(last, len(document) - 1) + 1):
+            page = document[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+                if len(text.strip()) >= minimum:
+                    kind = TEXT_PAGE
+                elif next(page.get_objects(max_depth=1), None) is not None:
+                    kind = OCR_PAGE
+                else:
+                    kind = BLANK_PAGE
+            finally:
+                textpage.close()
+                page.close()
+            yield text, kind
+    finally:
+        document.close()
+
+
+@dataclass
+class PreflightReport:
+    kinds: str
+    # Kept in memory only, so the text engine does not read the file twice.
+    texts: list[str] = field(default_factory=list, repr=False)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def text_page_count(self) -> int:
+        return self.kinds.count(TEXT_PAGE)
+
+    @property
+    def ocr_page_count(self) -> int:
+        return self.kinds.count(OCR_PAGE)
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of the pages that need no OCR."""
+        if not self.kinds:
+            return 0.0
+        return 1 - self.ocr_page_count / self.page_count
+
+    def runs(self) -> list[tuple[str, int, int]]:
+        """Consecutive pages of the same kind, as ``(kind, first, last)`` with 0-based indexes."""
+        result = []
+        index = 0
+        for kind, group in groupby(self.kinds):
+            length = len(list(group))
+            result.append((kind, index, index + length - 1))
+            index += length
+        return result
+
+    def ocr_pages_spec(self) -> str:
+        """The pages that need OCR, 1-based, in the ``1,3-5`` form ocrmypdf accepts."""
+        return ",".join(
+            str(first + 1) if first == last else f"{first + 1}-{last + 1}"
+            for kind, first, last in self.runs()
+            if kind == OCR_PAGE
+        )
+
+    def text(self, first: int = 0, last: Optional[int] = None) -> str:
+        last = self.page_count - 1 if last is None else last
+        return "\n\n".join(text.strip() for text in self.texts[first : last + 1] if text.strip())
+
+    def to_json(self) -> str:
+        return json.dumps({"kinds": self.kinds, "coverage": round(self.coverage, 4)})
+
+    @classmethod
+    def from_json(cls, payload: Optional[str]) -> Optional["PreflightReport"]:
+        if not payload:
+            return None
+        return cls(kinds=json.loads(payload).get("kinds", ""))
+
+
+def analyze_pdf(path: Path, pages: Optional[PageRange] = None) -> PreflightReport:
+    texts, kinds = [], []
+    for text, kind in _read_pages(path, pages):
+        texts.append(text)
+        kinds.append(kind)
+    return PreflightReport(kinds="".join(kinds), texts=texts)
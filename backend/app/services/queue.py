@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, or_, update
+from sqlalchemy import select as sa_select
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import engine
+from ..models import OCRJob
+from .scheduler import bulk_slots, next_job_candidate, running_bulk_jobs
+
+logger = logging.getLogger(__name__)
+
+_jobs = OCRJob.__table__
+
+RECOVERY_INTERVAL_SECONDS = 30.0
+_recovery_lock = threading.Lock()
+_last_recovery: Optional[float] = None
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _active_leases(now: datetime):
+    return (
+        sa_select(func.count())
+        .select_from(_jobs)
+        .where(_jobs.c.status == "processing", _jobs.c.lease_expires_at > now)
+        .scalar_subquery()
+    )
+
+
+def claim_next_job(worker_id: str) -> Optional[int]:
+    """Atomically lease the next queued job, respecting the global concurrency limit.
+
+    The scheduler picks the candidate (see :mod:`.scheduler`). The row is only
+    taken if it is still queued and fewer than ``queue_max_concurrency``
+    unexpired leases exist (and, for bulk jobs, fewer than the bulk slots);
+    the checks live in the WHERE clause of a single UPDATE so concurrent
+    workers cannot double-claim.
+    """
+    settings = get_settings()
+    for _ in range(3):
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            picked = next_job_candidate(session, now)
+            if picked is None:
+                return None
+            candidate, priority_class = picked
+
+            conditions = [
+                _jobs.c.id == candidate,
+                _jobs.c.status == "queued",
+                _active_leases(now) < settings.queue_max_concurrency,
+            ]
+            if priority_class == "bulk":
+                conditions.append(running_bulk_jobs(now) < bulk_slots())
+            result = session.execute(
+                update(_jobs)
+                .where(*conditions)
+                .values(
+                    status="processing",
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=settings.queue_lease_seconds),
+                    heartbeat_at=now,
+                    started_at=now,
+                    attempts=_jobs.c.attempts + 1,
+                    updated_at=now,
+                )
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return candidate
+
+            still_queued = session.exec(
+                select(OCRJob.id).where(OCRJob.id == candidate, OCRJob.status == "queued")
+            ).first()
+            if still_queued is not None:
+                # The candidate is free, so a concurrency limit is what stopped us.
+                return None
+    return None
+
+
+def heartbeat(job_id: int, worker_id: str) -> bool:
+    settings = get_settings()
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(_jobs)
+            .where(
+                _jobs.c.id == job_id,
+                _jobs.c.lease_owner == worker_id,
+                _jobs.c.status == "processing",
+            )
+            .values(
+                lease_expires_at=now + timedelta(seconds=settings.queue_lease_seconds),
+                heartbeat_at=now,
+            )
+        )
+    return result.rowcount == 1
+
+
+def release_job(job_id: int, worker_id: str) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            update(_jobs)
+            .where(_jobs.c.id == job_id, _jobs.c.lease_owner == worker_id)
+            .values(lease_owner=None, lease_expires_at=None)
+        )
+
+
+def requeue_job(job_id: int, worker_id: str, error: Optional[str] = None) -> None:
+    """Give a leased job back to the queue, failing it once attempts are exhausted."""
+    settings = get_settings()
+    now = datetime.utcnow()
+    owned = (
+        _jobs.c.id == job_id,
+        _jobs.c.lease_owner == worker_id,
+        _jobs.c.status == "processing",
+    )
+    with engine.begin() as connection:
+        connection.execute(
+            update(_jobs)
+            .where(*owned, _jobs.c.attempts >= settings.queue_max_attempts)
+            .values(
+                status="failed",
+                progress=100,
+                finished_at=now,
+                error=error or "Procesarea a fost întreruptă de prea multe ori",
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+        )
+        connection.execute(
+            update(_jobs)
+            .where(*owned)
+            .values(
+                status="queued",
+                progress=0,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+        )
+
+
+def recover_expired_leases() -> int:
+    """Return processing jobs whose lease expired to the queue (or fail them).
+
+    Jobs left in ``processing`` without any lease come from releases that ran
+    the in-process executor and are recovered the same way.
+    """
+    settings = get_settings()
+    now = datetime.utcnow()
+    expired = or_(_jobs.c.lease_expires_at.is_(None), _jobs.c.lease_expires_at < now)
+    with engine.begin() as connection:
+        failed = connection.execute(
+            update(_jobs)
+            .where(
+                _jobs.c.status == "processing",
+                expired,
+                _jobs.c.attempts >= settings.queue_max_attempts,
+            )
+            .values(
+                status="failed",
+                progress=100,
+                finished_at=now,
+                error="Procesarea a fost întreruptă de prea multe ori",
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+        ).rowcount
+        requeued = connection.execute(
+            update(_jobs)
+            .where(_jobs.c.status == "processing", expired)
+            .values(
+                status="queued",
+                progress=0,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=now,
+            )
+        ).rowcount
+    if failed or requeued:
+        logger.warning("Recovered expired leases: %s requeued, %s failed", requeued, failed)
+    return requeued + failed
+
+
+def maybe_recover_expired_leases() -> None:
+    """Run :func:`recover_expired_leases` at most once per recovery interval in this process."""
+    global _last_recovery
+    with _recovery_lock:
+        now = time.monotonic()
+        if _last_recovery is not None and now - _last_recovery < RECOVERY_INTERVAL_SECONDS:
+            return
+        _last_recovery = now
+    try:
+        recover_expired_leases()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Lease recovery failed")
+
+
+class LeaseKeeper:
+    """Keep a job lease alive from a background thread while the job runs."""
+
+    def __init__(self, job_id: int, worker_id: str) -> None:
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"lease-{job_id}", daemon=True
+        )
+
+    def _run(self) -> None:
+        interval = max(get_settings().queue_lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            try:
+                if not heartbeat(self.job_id, self.worker_id):
+                    logger.warning("Lost lease on job %s", self.job_id)
+                    self.lost = True
+                    return
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Heartbeat failed for job %s", self.job_id)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, release: bool = True) -> None:
+        self._stop.set()
+        self._thread.join()
+        if release:
+            release_job(self.job_id, self.worker_id)
+
+    def __enter__(self) -> "LeaseKeeper":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..models import OCRJob, ResultCacheEntry
+from .storage import remove_output, result_exists, retain_result
+
+logger = logging.getLogger(__name__)
+
+
+def build_cache_key(
+    content_hash: str, engine: str, options: dict[str, Any], language: Optional[str]
+) -> str:
+    payload = json.dumps(
+        {"content": content_hash, "engine": engine, "options": options, "language": language},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _results_dir() -> Path:
+    return get_settings().data_dir / "results"
+
+
+def get_cached_result(session: Session, key: str) -> Optional[ResultCacheEntry]:
+    entry = session.get(ResultCacheEntry, key)
+    if entry is None:
+        return None
+    if not result_exists(_results_dir() / entry.output_filename):
+        logger.warning("Dropping cache entry %s: %s is missing", key, entry.output_filename)
+        # Flushed so the key can be registered again in the same transaction; the caller commits.
+        session.delete(entry)
+        session.flush()
+        return None
+    return entry
+
+
+def attach_cached_result(session: Session, job: OCRJob, entry: ResultCacheEntry) -> None:
+    """Complete ``job`` with the output of ``entry`` without running OCR. The caller commits."""
+    now = datetime.utcnow()
+    entry.ref_count += 1
+    entry.last_used_at = now
+    retain_result(session, entry.output_filename)
+    job.cache_key = entry.key
+    job.output_filename = entry.output_filename
+    job.output_mime_type = entry.output_mime_type
+    job.resolved_engine = entry.resolved_engine
+    job.text_excerpt = entry.text_excerpt
+    job.summary = entry.summary
+    job.status = "completed"
+    job.progress = 100
+    job.updated_at = now
+    session.add(entry)
+    session.add(job)
+
+
+def register_result(session: Session, job: OCRJob) -> None:
+    """Record the finished output of ``job`` in the cache. The caller commits.
+
+    If an identical job finished first, ``job`` is pointed at the existing
+    output and its own copy is removed.
+    """
+    if not job.cache_key or not job.output_filename:
+        return
+    results_dir = _results_dir()
+    existing = get_cached_result(session, job.cache_key)
+    if existing is not None:
+        if existing.output_filename != job.output_filename:
+            (results_dir / job.output_filename).unlink(missing_ok=True)
+        attach_cached_result(session, job, existing)
+        return
+
+    output_path = results_dir / job.output_filename
+    entry = ResultCacheEntry(
+        key=job.cache_key,
+        content_hash=job.content_hash or "",
+        engine=job.engine,
+        resolved_engine=job.resolved_engine,
+        output_filename=job.output_filename,
+        output_mime_type=job.output_mime_type or "application/octet-stream",
+        text_excerpt=job.text_excerpt,
+        summary=job.summary,
+        size_bytes=output_path.stat().st_size if output_path.exists() else 0,
+        ref_count=1,
+    )
+    session.add(entry)
+
+
+def record_excerpt(session: Session, job: OCRJob) -> None:
+    """Copy an excerpt set after the output was registered onto its cache entry. The caller commits."""
+    if not job.cache_key or not job.text_excerpt:
+        return
+    entry = session.get(ResultCacheEntry, job.cache_key)
+    if entry is not None and entry.output_filename == job.output_filename and not entry.text_excerpt:
+        entry.text_excerpt = job.text_excerpt
+        session.add(entry)
+
+
+def release_result(session: Session, job: OCRJob) -> bool:
+    """Drop the reference ``job`` holds on a cached output. The caller commits.
+
+    Returns ``True`` when the output file belongs to the cache and must not be
+    deleted together with the job.
+    """
+    if not job.cache_key or not job.output_filename:
+        return False
+    entry = session.get(ResultCacheEntry, job.cache_key)
+    if entry is None or entry.output_filename != job.output_filename:
+        return False
+    entry.ref_count = max(entry.ref_count - 1, 0)
+    entry.last_used_at = datetime.utcnow()
+    session.add(entry)
+    return True
+
+
+def evict_orphaned_results(session: Session, max_bytes: Optional[int] = None) -> int:
+    """Delete least recently used unreferenced entries until they fit in the cache budget."""
+    if max_bytes is None:
+        max_bytes = get_settings().result_cache_max_bytes
+    orphaned = ResultCacheEntry.ref_count <= 0
+    total = session.exec(
+        select(func.coalesce(func.sum(ResultCacheEntry.size_bytes), 0)).where(orphaned)
+    ).one()
+    evicted = 0
+    if total <= max_bytes:
+        return evicted
+
+    results_dir = _results_dir()
+    statement = select(ResultCacheEntry).where(orphaned).order_by(ResultCacheEntry.last_used_at)
+    for entry in session.exec(statement).all():
+        if total <= max_bytes:
+            break
+        remove_output(session, results_dir / entry.output_filename)
+        total -= entry.size_bytes
+        session.delete(entry)
+        evicted += 1
+    session.commit()
+    if evicted:
+        logger.info("Evicted %s orphaned cached results", evicted)
+    return evicted
@@ -0,0 +1,186 @@
+"""Job ordering for the database queue.
+
+Queued jobs are ordered by:
+
+1. priority class - ``interactive`` before ``bulk``; a job of either class
+   that has waited longer than ``scheduler_max_wait_seconds`` is promoted to
+   the front of its tier so large jobs are never starved;
+2. fair share - jobs of the client (or folder) with the fewest running jobs
+   first, so one large batch cannot take every worker;
+3. shortest job first - by the estimated ``cost`` of the job;
+4. arrival order.
+
+``bulk`` jobs never hold more than ``queue_max_concurrency -
+scheduler_reserved_interactive_slots`` leases at once.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import case, func, or_
+from sqlalchemy import select as sa_select
+from sqlmodel import Session
+
+from ..config import get_settings
+from ..models import OCRJob
+from .engines import get_engine
+from .preflight import PreflightReport
+
+_jobs = OCRJob.__table__
+
+PRIORITY_CLASSES = ("interactive", "bulk")
+# Jobs created before costs were recorded sort as one-page jobs.
+UNKNOWN_COST = 1.0
+
+
+def classify_job(page_count: Optional[int], requested: Optional[str] = None) -> str:
+    if requested:
+        return requested
+    if page_count is not None and page_count > get_settings().scheduler_interactive_max_pages:
+        return "bulk"
+    return "interactive"
+
+
+def estimate_job_cost(
+    engine_name: str,
+    page_count: Optional[int],
+    size_bytes: Optional[int],
+    report: Optional[PreflightReport] = None,
+) -> float:
+    return round(get_engine(engine_name).estimate_cost(page_count, size_bytes, report), 3)
+
+
+def share_key_for(client_id: Optional[str], folder_id: Optional[int]) -> Optional[str]:
+    mode = get_settings().scheduler_fair_share
+    if mode == "client":
+        return f"client:{client_id}" if client_id else None
+    if mode == "folder":
+        return f"folder:{folder_id}" if folder_id is not None else "folder:"
+    return None
+
+
+def bulk_slots() -> int:
+    settings = get_settings()
+    return max(settings.queue_max_concurrency - settings.scheduler_reserved_interactive_slots, 1)
+
+
+def running_bulk_jobs(now: datetime):
+    return (
+        sa_select(func.count())
+        .select_from(_jobs)
+        .where(
+            _jobs.c.status == "processing",
+            _jobs.c.lease_expires_at > now,
+            _jobs.c.priority_class == "bulk",
+        )
+        .scalar_subquery()
+    )
+
+
+def next_job_candidate(session: Session, now: datetime) -> Optional[tuple[int, str]]:
+    """Return ``(id, priority_class)`` of the job that should run next."""
+    settings = get_settings()
+    queued_at = func.coalesce(_jobs.c.queued_at, _jobs.c.created_at)
+    aged = queued_at < now - timedelta(seconds=settings.scheduler_max_wait_seconds)
+    running = (
+        sa_select(_jobs.c.share_key, func.count().label("running"))
+        .where(_jobs.c.status == "processing", _jobs.c.share_key.is_not(None))
+        .group_by(_jobs.c.share_key)
+        .subquery()
+    )
+    statement = (
+        sa_select(_jobs.c.id, _jobs.c.priority_class)
+        .select_from(_jobs.outerjoin(running, running.c.share_key == _jobs.c.share_key))
+        .where(_jobs.c.status == "queued")
+        .order_by(
+            case((or_(_jobs.c.priority_class != "bulk", aged), 0), else_=1),
+            func.coalesce(running.c.running, 0),
+            case((aged, 0), else_=1),
+            func.coalesce(_jobs.c.cost, UNKNOWN_COST),
+            queued_at,
+            _jobs.c.id,
+        )
+        .limit(1)
+    )
+    if session.execute(sa_select(running_bulk_jobs(now))).scalar_one() >= bulk_slots():
+        statement = statement.where(_jobs.c.priority_class != "bulk")
+    row = session.execute(statement).first()
+    return (row.id, row.priority_class) if row is not None else None
+
+
+def _percentiles(values: list[float]) -> dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(math.ceil(fraction * len(ordered)) - 1, len(ordered) - 1)], 3)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1], 3)}
+
+
+def scheduler_metrics(session: Session, window_hours: Optional[int] = None) -> dict[str, Any]:
+    """Queue depth and queue-wait / run-time percentiles per priority class."""
+    window_hours = window_hours or get_settings().scheduler_metrics_window_hours
+    now = datetime.utcnow()
+    queued_at = func.coalesce(_jobs.c.queued_at, _jobs.c.created_at)
+    classes: dict[str, dict[str, Any]] = {
+        name: {"queued": 0, "processing": 0, "queued_cost": 0.0, "oldest_queued_seconds": None}
+        for name in PRIORITY_CLASSES
+    }
+
+    pending = session.execute(
+        sa_select(
+            _jobs.c.priority_class,
+            _jobs.c.status,
+            func.count(),
+            func.sum(func.coalesce(_jobs.c.cost, UNKNOWN_COST)),
+            func.min(queued_at),
+        )
+        .where(_jobs.c.status.in_(("queued", "processing")))
+        .group_by(_jobs.c.priority_class, _jobs.c.status)
+    )
+    for priority_class, status, count, cost, oldest in pending:
+        entry = classes.setdefault(
+            priority_class, {"queued": 0, "processing": 0, "queued_cost": 0.0, "oldest_queued_seconds": None}
+        )
+        entry[status] = count
+        if status == "queued":
+            entry["queued_cost"] = round(cost or 0.0, 3)
+            entry["oldest_queued_seconds"] = round((now - oldest).total_seconds(), 3) if oldest else None
+
+    finished = session.execute(
+        sa_select(
+            _jobs.c.priority_class,
+            _jobs.c.status,
+            queued_at.label("queued_at"),
+            _jobs.c.started_at,
+            _jobs.c.finished_at,
+            _jobs.c.page_count,
+        ).where(
+            _jobs.c.finished_at >= now - timedelta(hours=window_hours),
+            _jobs.c.started_at.is_not(None),
+        )
+    )
+    samples: dict[str, dict[str, Any]] = {}
+    for row in finished:
+        sample = samples.setdefault(
+            row.priority_class, {"completed": 0, "failed": 0, "pages": 0, "wait": [], "run": []}
+        )
+        sample[row.status] = sample.get(row.status, 0) + 1
+        sample["pages"] += row.page_count or 0
+        sample["wait"].append(max((row.started_at - row.queued_at).total_seconds(), 0.0))
+        sample["run"].append(max((row.finished_at - row.started_at).total_seconds(), 0.0))
+
+    for name, entry in classes.items():
+        sample = samples.get(name, {"completed": 0, "failed": 0, "pages": 0, "wait": [], "run": []})
+        entry.update(
+            completed=sample["completed"],
+            failed=sample["failed"],
+            pages=sample["pages"],
+            wait_seconds=_percentiles(sample["wait"]),
+            run_seconds=_percentiles(sample["run"]),
+        )
+    return {"window_hours": window_hours, "bulk_slots": bulk_slots(), "classes": classes}
@@ -0,0 +1,405 @@
+"""Full-text search over the complete output of completed OCR jobs.
+
+The text of every job is stored page by page in ``searchpage`` and indexed
+by the SQLite FTS5 table ``searchpage_fts``, which uses ``searchpage`` as
+its external content so the text is kept only once. The folder and engine
+of the job are indexed as tokens in a second column, ``tags``, so filtered
+queries never leave the index. Pages are read from the page store of the
+job output (see services/textstore.py).
+
+Jobs are indexed when they complete and by ``SearchIndexer``, which picks up
+completed jobs whose ``indexed_at`` is empty: results attached from the
+cache at upload time and jobs queued again by ``request_reindex``.
+"""
+from __future__ import annotations
+
+import html
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import func, text, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import engine
+from ..models import OCRJob, SearchPage
+from .textstore import PageText, job_pages
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "searchpage_fts"
+MAX_RESULTS = 100
+MAX_QUERY_TERMS = 16
+# Snippet markers that cannot occur in extracted text; swapped for <mark> once the snippet is escaped.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+_jobs = OCRJob.__table__
+
+_fts_available: Optional[bool] = None
+
+
+class SearchError(ValueError):
+    pass
+
+
+def create_search_index(connection) -> None:
+    """Migration step: create the FTS5 table where SQLite was built with it."""
+    if connection.dialect.name != "sqlite":
+        logger.warning("Full-text search needs SQLite FTS5, search is disabled")
+        return
+    try:
+        connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "text, tags, content='searchpage', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        )
+    except OperationalError as exc:
+        logger.warning("SQLite has no FTS5 support (%s), search is disabled", exc)
+
+
+def search_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        if engine.dialect.name != "sqlite":
+            _fts_available = False
+        else:
+            with engine.connect() as connection:
+                row = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+                ).first()
+            _fts_available = row is not None
+    return _fts_available and get_settings().search_enabled
+
+
+def page_tags(folder_id: Optional[int], engine_name: str) -> str:
+    """Filter tokens stored in the ``tags`` column, so filters are answered by the index itself."""
+    return f"folder{folder_id or 0} engine{engine_name}"
+
+
+def _delete_fts_rows(session: Session, job_id: int) -> None:
+    # External-content tables need the old values to remove their tokens.
+    session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, text, tags) "
+            "SELECT 'delete', id, text, tags FROM searchpage WHERE job_id = :job_id"
+        ),
+        {"job_id": job_id},
+    )
+
+
+def _insert_fts_rows(session: Session, job_id: int) -> None:
+    session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, text, tags) "
+            "SELECT id, text, tags FROM searchpage WHERE job_id = :job_id"
+        ),
+        {"job_id": job_id},
+    )
+
+
+def remove_job_from_index(session: Session, job_id: int) -> None:
+    """Drop the indexed pages of a job. The caller commits."""
+    if not search_available():
+        return
+    _delete_fts_rows(session, job_id)
+    session.execute(text("DELETE FROM searchpage WHERE job_id = :job_id"), {"job_id": job_id})
+
+
+def retag_job(session: Session, job: OCRJob) -> None:
+    """Update the folder filter of a job that moved. The caller commits."""
+    if not search_available():
+        return
+    _delete_fts_rows(session, job.id)
+    session.execute(
+        text("UPDATE searchpage SET tags = :tags WHERE job_id = :job_id"),
+        {"tags": page_tags(job.folder_id, job.engine), "job_id": job.id},
+    )
+    _insert_fts_rows(session, job.id)
+
+
+def index_job(session: Session, job: OCRJob, pages: list[PageText]) -> None:
+    """Replace the indexed pages of ``job``. The caller commits."""
+    remove_job_from_index(session, job.id)
+    if not pages:
+        return
+    tags = page_tags(job.folder_id, job.engine)
+    session.execute(
+        SearchPage.__table__.insert(),
+        [
+            {"job_id": job.id, "position": position, "page": page, "text": content, "tags": tags}
+            for position, (page, content) in enumerate(pages)
+        ],
+    )
+    _insert_fts_rows(session, job.id)
+
+
+def claim_for_indexing(session: Session, job_id: int) -> bool:
+    """Mark a completed job as indexed unless another process got to it first."""
+    result = session.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id, _jobs.c.status == "completed", _jobs.c.indexed_at.is_(None))
+        .values(indexed_at=datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+def index_completed_job(
+    session: Session, job: OCRJob, dirs: dict[str, Path], pages: Optional[list[PageText]] = None
+) -> None:
+    """Index a job that just completed. Failures are logged; the job result is not affected."""
+    if not search_available():
+        return
+    try:
+        # Read the pages before taking the write lock.
+        if pages is None:
+            pages = job_pages(job, dirs)
+        if claim_for_indexing(session, job.id):
+            index_job(session, job, pages)
+            logger.info("Indexed %s pages of job %s", len(pages), job.id)
+        session.commit()
+    except Exception:  # pylint: disable=broad-except
+        session.rollback()
+        logger.exception("Failed to index job %s", job.id)
+        # Leave it out of the backlog; a reindex request tries again.
+        claim_for_indexing(session, job.id)
+        session.commit()
+
+
+def request_reindex(session: Session, folder_id: Optional[int] = None, job_id: Optional[int] = None) -> int:
+    """Queue completed jobs for the background indexer and return how many were queued.
+
+    Their current pages stay searchable until the indexer replaces them.
+    """
+    statement = update(_jobs).where(_jobs.c.status == "completed", _jobs.c.indexed_at.is_not(None))
+    if folder_id is not None:
+        statement = statement.where(_jobs.c.folder_id == folder_id)
+    if job_id is not None:
+        statement = statement.where(_jobs.c.id == job_id)
+    result = session.execute(statement.values(indexed_at=None))
+    session.commit()
+    return result.rowcount
+
+
+def index_status(session: Session) -> dict[str, Any]:
+    available = search_available()
+    pending = session.exec(
+        select(func.count()).select_from(OCRJob).where(OCRJob.status == "completed", OCRJob.indexed_at.is_(None))
+    ).one()
+    pages = session.exec(select(func.count()).select_from(SearchPage)).one() if available else 0
+    return {"available": available, "indexed_pages": pages, "pending_jobs": pending}
+
+
+def parse_query(query: str) -> list[str]:
+    """Split user input into quoted FTS5 phrases: every word or "quoted phrase" must match."""
+    terms = []
+    for phrase, word in _QUERY_TERM.findall(query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    if not terms:
+        raise SearchError("Interogare de căutare goală")
+    if len(terms) > MAX_QUERY_TERMS:
+        raise SearchError(f"Prea mulți termeni de căutare (maxim {MAX_QUERY_TERMS})")
+    return terms
+
+
+def build_match_query(terms: list[str], folder_id: Optional[int] = None, engine_name: Optional[str] = None) -> str:
+    match = f"text : ({' '.join(terms)})"
+    if folder_id is not None:
+        match += f' AND tags : "folder{folder_id}"'
+    if engine_name:
+        match += f' AND tags : "engine{engine_name}"'
+    return match
+
+
+def _is_common(session: Session, term: str, pages: int) -> bool:
+    # Walks at most ``pages`` entries of the term's doclist, without scoring anything.
+    row = session.execute(
+        text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match ORDER BY rowid DESC LIMIT 1 OFFSET :pages"),
+        {"match": f"text : {term}", "pages": pages},
+    ).first()
+    return row is not None
+
+
+def _ranked_rows(
+    session: Session, terms: list[str], match: str, limit: int, offset: int
+) -> tuple[list[tuple[int, float]], str]:
+    """Return ``(rowid, bm25 score)`` for one page of results and how they were ordered.
+
+    bm25 counts the pages containing each phrase of the MATCH expression over
+    the whole index, so its cost grows with the most common term. Only terms
+    found on at most ``search_common_term_pages`` pages are scored; the other
+    terms and the filter tags still have to match. A query made only of
+    common terms returns the newest matches.
+    """
+    threshold = get_settings().search_common_term_pages
+    scored = [term for term in terms if not _is_common(session, term, threshold)]
+    if not scored:
+        rows = session.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+                "ORDER BY rowid DESC LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        ).all()
+        return [(row.rowid, 0.0) for row in rows], "newest"
+
+    rank_match = build_match_query(scored)
+    if rank_match == match:
+        rows = session.execute(
+            text(
+                f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+                "ORDER BY rank LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        ).all()
+        return [(row.rowid, -row.rank) for row in rows], "full"
+
+    # The scored terms bound the candidates, so both sets stay small.
+    allowed = set(
+        session.execute(
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"), {"match": match}
+        ).scalars()
+    )
+    ranked: list[tuple[int, float]] = []
+    skipped = 0
+    candidates = session.execute(
+        text(f"SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match ORDER BY rank"), {"match": rank_match}
+    )
+    for row in candidates:
+        if row.rowid not in allowed:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        ranked.append((row.rowid, -row.rank))
+        if len(ranked) == limit:
+            break
+    return ranked, "full" if len(scored) == len(terms) else "partial"
+
+
+def search_pages(
+    session: Session,
+    query: str,
+    folder_id: Optional[int] = None,
+    engine_name: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict[str, Any]:
+    """Rank matching pages with bm25 and return one page of hits with highlighted snippets."""
+    if not search_available():
+        raise SearchError("Căutarea nu este disponibilă")
+    started = time.perf_counter()
+    terms = parse_query(query)
+    match = build_match_query(terms, folder_id, engine_name)
+    limit = max(1, min(limit, MAX_RESULTS))
+    offset = max(offset, 0)
+    try:
+        rows, ranking = _ranked_rows(session, terms, match, limit, offset)
+    except OperationalError as exc:
+        raise SearchError("Interogare de căutare invalidă") from exc
+
+    items: list[dict[str, Any]] = []
+    if rows:
+        page_ids = [rowid for rowid, _score in rows]
+        pages = {page.id: page for page in session.exec(select(SearchPage).where(SearchPage.id.in_(page_ids)))}
+        jobs = {
+            job.id: job
+            for job in session.exec(
+                select(OCRJob.id, OCRJob.original_filename, OCRJob.folder_id, OCRJob.engine).where(
+                    OCRJob.id.in_({page.job_id for page in pages.values()})
+                )
+            )
+        }
+        for rowid, score in rows:
+            page = pages.get(rowid)
+            job = jobs.get(page.job_id) if page else None
+            if job is None:
+                continue
+            # One lookup per hit: FTS5 seeks a single rowid, but scans every match for "rowid IN (...)".
+            snippet = session.execute(
+                text(
+                    f"SELECT snippet({FTS_TABLE}, 0, :start, :end, '…', 24) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH :match AND rowid = :rowid"
+                ),
+                {"match": match, "start": _MARK_START, "end": _MARK_END, "rowid": rowid},
+            ).scalar()
+            items.append(
+                {
+                    "job_id": page.job_id,
+                    "original_filename": job.original_filename,
+                    "page": page.page,
+                    "position": page.position,
+                    "folder_id": job.folder_id,
+                    "engine": job.engine,
+                    "score": round(score, 4),
+                    "snippet": html.escape(snippet or "").replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>"),
+                }
+            )
+    return {
+        "items": items,
+        "next_offset": offset + limit if len(rows) == limit else None,
+        "ranking": ranking,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+class SearchIndexer:
+    """Index completed jobs that are not in the search index yet."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.batch_size = max(settings.search_index_batch_size, 1)
+        self.poll_interval = settings.search_index_interval
+        self.stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        from .ocr import ensure_storage_dirs
+
+        if not search_available():
+            return 0
+        dirs = ensure_storage_dirs(get_settings().data_dir)
+        indexed = 0
+        with Session(engine) as session:
+            job_ids = session.exec(
+                select(OCRJob.id)
+                .where(OCRJob.status == "completed", OCRJob.indexed_at.is_(None))
+                .order_by(OCRJob.id)
+                .limit(self.batch_size)
+            ).all()
+            for job_id in job_ids:
+                job = session.get(OCRJob, job_id)
+                if job is None:
+                    continue
+                index_completed_job(session, job, dirs)
+                indexed += 1
+        return indexed
+
+    def _loop(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                indexed = self.run_once()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Search indexer error")
+                indexed = 0
+            if indexed < self.batch_size:
+                self.stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="search-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_shard_executor() -> ProcessPoolExecutor:
+    """Return the process pool shared by all sharded jobs of this process.
+
+    Pool processes are reused between jobs, so docling models loaded by a
+    shard stay warm for the next one.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = ProcessPoolExecutor(
+                max_workers=max(settings.ocr_shard_workers, 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def is_pdf(path: Path) -> bool:
+    with path.open("rb") as handle:
+        return handle.read(5) == b"%PDF-"
+
+
+def pdf_page_count(path: Path) -> int:
+    import pikepdf
+
+    with pikepdf.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def should_shard(path: Path, options: dict[str, Any]) -> Optional[int]:
+    """Return the page count when the input should be processed in shards, else ``None``."""
+    settings = get_settings()
+    if settings.ocr_shard_pages <= 0 or options.get("sharded") is False:
+        return None
+    if not is_pdf(path):
+        return None
+    import pikepdf
+
+    try:
+        page_count = pdf_page_count(path)
+    except pikepdf.PdfError:
+        logger.warning("Could not read page count of %s, processing it in one piece", path)
+        return None
+    if page_count < max(settings.ocr_shard_min_pages, settings.ocr_shard_pages + 1):
+        return None
+    return page_count
+
+
+def split_pdf(path: Path, chunk_pages: int, output_dir: Path) -> list[tuple[int, int, Path]]:
+    """Split ``path`` into consecutive page ranges; returns ``(first, last, chunk_path)`` with 0-based pages."""
+    import pikepdf
+
+    chunks: list[tuple[int, int, Path]] = []
+    with pikepdf.open(path) as source:
+        total = len(source.pages)
+        for start in range(0, total, chunk_pages):
+            end = min(start + chunk_pages, total) - 1
+            chunk = pikepdf.new()
+            chunk.pages.extend(source.pages[start : end + 1])
+            chunk_path = output_dir / f"chunk_{start:06d}.pdf"
+            chunk.save(chunk_path)
+            chunks.append((start, end, chunk_path))
+    return chunks
+
+
+def extract_pages(path: Path, first: int, last: int, output_path: Path) -> Path:
+    """Write 0-based pages ``first``..``last`` (inclusive) of ``path`` to ``output_path``."""
+    import pikepdf
+
+    with pikepdf.open(path) as source, pikepdf.new() as chunk:
+        chunk.pages.extend(source.pages[first : last + 1])
+        chunk.save(output_path)
+    return output_path
+
+
+def _pdfa_claim(pdf: Any) -> Optional[str]:
+    """The PDF/A part and conformance declared in a PDF's XMP metadata, e.g. ``2B``."""
+    meta = pdf.open_metadata(set_pikepdf_as_editor=False, update_docinfo=False)
+    part = meta.get("pdfaid:part")
+    return f"{part}{meta.get('pdfaid:conformance', '')}" if part else None
+
+
+def merge_pdfs(paths: list[Path], output_path: Path) -> None:
+    """Concatenate PDFs in order into the first one, keeping its catalog (XMP metadata, output intent).
+
+    The merged file keeps the first chunk's PDF/A declaration only when every
+    chunk declares the same one; otherwise the declaration is removed rather
+    than claimed for pages that were not produced that way.
+    """
+    import pikepdf
+
+    with pikepdf.open(paths[0]) as merged:
+        claim = _pdfa_claim(merged)
+        consistent = True
+        for path in paths[1:]:
+            with pikepdf.open(path) as part:
+                consistent = consistent and _pdfa_claim(part) == claim
+                merged.pages.extend(part.pages)
+        if claim and not consistent:
+            logger.warning("Shards of %s disagree on PDF/A %s, dropping the declaration", output_path.name, claim)
+            with merged.open_metadata(set_pikepdf_as_editor=False, update_docinfo=False) as meta:
+                for key in ("pdfaid:part", "pdfaid:conformance"):
+                    if key in meta:
+                        del meta[key]
+        merged.save(output_path)
+
+
+def _ocrmypdf_chunk(input_path: str, output_path: str, kwargs: dict[str, Any]) -> None:
+    import ocrmypdf
+
+    ocrmypdf.ocr(input_path, output_path, **kwargs)
+
+
+def _docling_chunk(input_path: str) -> str:
+    from .ocr import get_converter
+
+    result = get_converter().convert(input_path)
+    return result.document.export_to_markdown()
+
+
+def _run_chunks(
+    chunks: list[tuple[int, int, Path]],
+    submit: Callable[[ProcessPoolExecutor, Path], Future],
+    total_pages: int,
+    on_progress: Optional[ProgressCallback],
+) -> list[Any]:
+    executor = get_shard_executor()
+    futures = {submit(executor, chunk_path): index for index, (_, _, chunk_path) in enumerate(chunks)}
+    results: list[Any] = [None] * len(chunks)
+    pages_done = 0
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                results[index] = future.result()
+                first, last, _ = chunks[index]
+                pages_done += last - first + 1
+                if on_progress:
+                    on_progress(pages_done, total_pages)
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+    return results
+
+
+def run_sharded_ocrmypdf(
+    input_path: Path,
+    output_path: Path,
+    kwargs: dict[str, Any],
+    total_pages: int,
+    on_progress: Optional[ProgressCallback] = None,
+) -> None:
+    settings = get_settings()
+    chunk_kwargs = dict(kwargs)
+    # Each shard runs in its own process, so keep ocrmypdf from spawning a full pool per shard.
+    chunk_kwargs.setdefault("jobs", max((os.cpu_count() or 1) // max(settings.ocr_shard_workers, 1), 1))
+    work_dir = Path(tempfile.mkdtemp(prefix="ocr_shards_", dir=output_path.parent))
+    try:
+        chunks = split_pdf(input_path, settings.ocr_shard_pages, work_dir)
+        outputs = [work_dir / f"{chunk_path.stem}_ocr.pdf" for _, _, chunk_path in chunks]
+        output_by_input = {chunk_path: output for (_, _, chunk_path), output in zip(chunks, outputs)}
+        _run_chunks(
+            chunks,
+            lambda executor, chunk_path: executor.submit(
+                _ocrmypdf_chunk, str(chunk_path), str(output_by_input[chunk_path]), chunk_kwargs
+            ),
+            total_pages,
+            on_progress,
+        )
+        merge_pdfs(outputs, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_sharded_docling(
+    input_path: Path,
+    total_pages: int,
+    on_progress: Optional[ProgressCallback] = None,
+) -> list[tuple[int, int, str]]:
+    """Convert a PDF in shards, returning ``(first, last, markdown)`` per shard with 0-based pages."""
+    settings = get_settings()
+    work_dir = Path(tempfile.mkdtemp(prefix="ocr_shards_", dir=input_path.parent))
+    try:
+        chunks = split_pdf(input_path, settings.ocr_shard_pages, work_dir)
+        parts = _run_chunks(
+            chunks,
+            lambda executor, chunk_path: executor.submit(_docling_chunk, str(chunk_path)),
+            total_pages,
+            on_progress,
+        )
+        return [(first, last, (part or "").strip()) for (first, last, _), part in zip(chunks, parts)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
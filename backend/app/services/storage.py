@@ -0,0 +1,601 @@
+"""Usage accounting, retention and cold compression for the files under ``data_dir``.
+
+Every upload, output, page store, download variant and Word document has a
+``StoredFile`` row with its kind, size on disk, last use and expiry, so usage
+is a query and cleanup never lists a directory. ``StorageManager`` runs
+bounded passes over those rows, each reading one index:
+
+- expired files are deleted: originals ``storage_upload_retention_hours``
+  after their job succeeded, outputs (with their page store and download
+  variants) ``storage_result_retention_days`` after the last job that used
+  them finished;
+- markdown and text outputs unused for ``storage_cold_after_days`` are
+  compressed with zstd and decompressed again by ``hot_path`` on their next
+  read (with the local file store; buckets have their own lifecycle rules);
+- download variants, which downloads can do without, are dropped least
+  recently used first while they take more than ``storage_derived_max_bytes``,
+  and cached docling conversions above ``storage_conversions_max_bytes``;
+- with a remote file store, the node-local copies of objects, recorded in
+  ``LocalCopy`` as they are fetched, are dropped least recently read first
+  above ``storage_s3_local_copies_max_bytes``.
+
+Files written before the accounting existed are registered from the job and
+document tables, one batch per pass.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import engine
+from ..models import LocalCopy, OCRJob, ResultCacheEntry, Setting, StoredFile, WordDocument
+from .downloads import variant_paths
+from .filestore import drain_copy_reads, fetch_path, get_file_store, publish_path
+from .textstore import store_path
+
+logger = logging.getLogger(__name__)
+
+COLD_SUFFIX = ".zst"
+COMPRESSIBLE_SUFFIXES = {".md", ".txt"}
+# Reads mark a file as used at most this often, so downloads rarely write.
+TOUCH_INTERVAL = timedelta(hours=1)
+# Local copies read more recently than this are kept even above the budget,
+# so the inputs of running jobs are not dropped under them.
+LOCAL_COPY_GRACE = timedelta(hours=1)
+NODE = socket.gethostname()
+
+_last_trim: Optional[float] = None
+_trim_lock = threading.Lock()
+
+
+def _data_dir() -> Path:
+    return get_settings().data_dir
+
+
+def relative_path(path: Path) -> str:
+    return path.resolve().relative_to(_data_dir().resolve()).as_posix()
+
+
+def cold_path(path: Path) -> Path:
+    return path.with_name(path.name + COLD_SUFFIX)
+
+
+def result_exists(path: Path) -> bool:
+    if path.exists() or cold_path(path).exists():
+        return True
+    store = get_file_store()
+    return store.remote and store.exists(relative_path(path))
+
+
+def _stored_size(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        store = get_file_store()
+        # Published objects may have no copy on this node.
+        return store.size(relative_path(path)) if store.remote else None
+
+
+def _zstandard():
+    import zstandard
+
+    return zstandard
+
+
+def _later(current: Optional[datetime], candidate: Optional[datetime]) -> Optional[datetime]:
+    if current is None or candidate is None:
+        return current or candidate
+    return max(current, candidate)
+
+
+def result_expiry(finished_at: Optional[datetime] = None) -> Optional[datetime]:
+    days = get_settings().storage_result_retention_days
+    if days <= 0:
+        return None
+    return (finished_at or datetime.utcnow()) + timedelta(days=days)
+
+
+def track_file(
+    session: Session,
+    path: Path,
+    kind: str,
+    *,
+    job_id: Optional[int] = None,
+    size_bytes: Optional[int] = None,
+    expires_at: Optional[datetime] = None,
+    used_at: Optional[datetime] = None,
+) -> Optional[StoredFile]:
+    """Record ``path`` for accounting, or refresh its row. The caller commits.
+
+    The expiry of a tracked file is only ever pushed back, so an output shared
+    through the result cache lives as long as its latest job needs it.
+    """
+    row = session.get(StoredFile, relative_path(path))
+    if size_bytes is None:
+        size_bytes = _stored_size(path)
+        if size_bytes is None:
+            if row is None:
+                return None
+            size_bytes = row.size_bytes
+    now = datetime.utcnow()
+    if row is None:
+        codec = None
+        if kind == "result" and path.suffix not in COMPRESSIBLE_SUFFIXES:
+            # PDF output is compressed already; keep it out of the cold pass.
+            codec = "native"
+        row = StoredFile(
+            path=relative_path(path),
+            kind=kind,
+            job_id=job_id,
+            size_bytes=size_bytes,
+            codec=codec,
+            expires_at=expires_at,
+            last_used_at=used_at or now,
+        )
+    else:
+        if row.codec != "zstd":
+            row.size_bytes = size_bytes
+        row.job_id = row.job_id or job_id
+        row.expires_at = _later(row.expires_at, expires_at)
+        row.last_used_at = max(row.last_used_at, used_at or now)
+        row.updated_at = now
+    session.add(row)
+    return row
+
+
+def track_job_output(
+    session: Session, job: OCRJob, results_dir: Path, used_at: Optional[datetime] = None
+) -> None:
+    """Record the output of a finished job with its page store and download variants. The caller commits."""
+    if not job.output_filename:
+        return
+    output_path = results_dir / job.output_filename
+    track_file(session, output_path, "result", job_id=job.id, expires_at=result_expiry(used_at), used_at=used_at)
+    track_file(session, store_path(job.output_filename), "text", job_id=job.id, used_at=used_at)
+    for variant in variant_paths(output_path):
+        track_file(session, variant, "derived", job_id=job.id, used_at=used_at)
+
+
+def publish_job_output(job: OCRJob, results_dir: Path) -> None:
+    """Store the output and page store of a finished job for the other nodes."""
+    if not job.output_filename:
+        return
+    publish_path(results_dir / job.output_filename)
+    publish_path(store_path(job.output_filename))
+
+
+def retain_result(session: Session, output_filename: str) -> None:
+    """Push back the expiry of an output that another job just reused. The caller commits."""
+    row = session.get(StoredFile, f"results/{output_filename}")
+    if row is not None and row.expires_at is not None:
+        row.expires_at = _later(row.expires_at, result_expiry())
+        session.add(row)
+
+
+def release_upload(session: Session, job: OCRJob, path: Path, succeeded: bool) -> None:
+    """Apply the retention policy to the original of a finished job. The caller commits."""
+    settings = get_settings()
+    store = get_file_store()
+    if store.remote:
+        # The worker's copy of a published upload is not needed any more.
+        store.release(relative_path(path))
+    if settings.storage_keep_uploads:
+        return
+    if succeeded:
+        if settings.storage_upload_retention_hours <= 0:
+            remove_file(session, path)
+            return
+        expires_at = datetime.utcnow() + timedelta(hours=settings.storage_upload_retention_hours)
+    else:
+        # Failed jobs keep their original as long as an output would be kept.
+        expires_at = result_expiry()
+    row = track_file(session, path, "upload", job_id=job.id)
+    if row is not None:
+        row.expires_at = expires_at
+
+
+def touch_files(session: Session, paths: Iterable[Path]) -> None:
+    """Mark files as used for cold compression and the LRU. The caller commits."""
+    now = datetime.utcnow()
+    keys = [relative_path(path) for path in paths]
+    session.execute(
+        update(StoredFile)
+        .where(StoredFile.path.in_(keys), StoredFile.last_used_at < now - TOUCH_INTERVAL)
+        .values(last_used_at=now)
+    )
+
+
+def remove_file(session: Session, path: Path) -> None:
+    """Delete ``path``, its compressed copy and its accounting row. The caller commits."""
+    path.unlink(missing_ok=True)
+    cold_path(path).unlink(missing_ok=True)
+    store = get_file_store()
+    if store.remote:
+        store.delete(relative_path(path))
+    row = session.get(StoredFile, relative_path(path))
+    if row is not None:
+        session.delete(row)
+
+
+def remove_output(session: Session, path: Path) -> None:
+    """Delete an output with its page store and download variants. The caller commits."""
+    remove_file(session, path)
+    for variant in variant_paths(path):
+        remove_file(session, variant)
+    remove_file(session, store_path(path.name))
+
+
+def hot_path(path: Path) -> Path:
+    """Return ``path``, decompressing it first if it was compressed while cold.
+
+    With a remote file store, an object with no copy on this node is fetched.
+    """
+    compressed = cold_path(path)
+    if path.exists():
+        return path
+    if not compressed.exists():
+        return fetch_path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with compressed.open("rb") as source, temporary.open("wb") as target:
+            _zstandard().ZstdDecompressor().copy_stream(source, target)
+    except FileNotFoundError:
+        # Another reader decompressed it first.
+        temporary.unlink(missing_ok=True)
+        return path
+    os.replace(temporary, path)
+    compressed.unlink(missing_ok=True)
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                update(StoredFile)
+                .where(StoredFile.path == relative_path(path))
+                .values(codec=None, size_bytes=path.stat().st_size, last_used_at=datetime.utcnow())
+            )
+    except OperationalError as exc:
+        logger.warning("Could not record decompression of %s: %s", path.name, exc)
+    return path
+
+
+def iter_stored(path: Path, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Yield the content of ``path`` without writing it to this node first.
+
+    The local file is read when there is one, a cold copy is decompressed on
+    the fly and anything else is streamed from the file store. Raises
+    ``FileNotFoundError`` on the first ``next`` when there is no such file.
+    """
+    compressed = cold_path(path)
+    try:
+        handle: BinaryIO = path.open("rb")
+    except FileNotFoundError:
+        try:
+            source = compressed.open("rb")
+        except FileNotFoundError:
+            store = get_file_store()
+            yield from store.iter_bytes(store.key_for(path), chunk_size)
+            return
+        handle = _zstandard().ZstdDecompressor().stream_reader(source, closefd=True)
+    with handle:
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+
+def compress_file(path: Path, level: int) -> Optional[int]:
+    """Replace ``path`` by its zstd-compressed copy and return the compressed size."""
+    compressed = cold_path(path)
+    temporary = compressed.with_name(f".{compressed.name}.{os.getpid()}.tmp")
+    try:
+        with path.open("rb") as source, temporary.open("wb") as target:
+            _zstandard().ZstdCompressor(level=level).copy_stream(source, target)
+    except FileNotFoundError:
+        temporary.unlink(missing_ok=True)
+        return None
+    os.replace(temporary, compressed)
+    path.unlink(missing_ok=True)
+    return compressed.stat().st_size
+
+
+def expire_files(session: Session, limit: int) -> int:
+    """Delete files past their expiry; outputs are removed from their jobs too."""
+    now = datetime.utcnow()
+    rows = session.exec(
+        select(StoredFile).where(StoredFile.expires_at <= now).order_by(StoredFile.expires_at).limit(limit)
+    ).all()
+    for row in rows:
+        path = _data_dir() / row.path
+        if row.kind == "result":
+            purge_output(session, path, now)
+        else:
+            remove_file(session, path)
+    session.commit()
+    return len(rows)
+
+
+def purge_output(session: Session, path: Path, now: datetime) -> None:
+    """Remove an expired output and detach it from every job and cache entry using it. The caller commits."""
+    from .search import remove_job_from_index
+
+    jobs = session.exec(select(OCRJob).where(OCRJob.output_filename == path.name)).all()
+    for job in jobs:
+        remove_job_from_index(session, job.id)
+        job.output_filename = None
+        job.purged_at = now
+        # Listing ETags follow max(updated_at), so clients drop the stale download URL.
+        job.updated_at = now
+        session.add(job)
+    for entry in session.exec(select(ResultCacheEntry).where(ResultCacheEntry.output_filename == path.name)).all():
+        session.delete(entry)
+    remove_output(session, path)
+    logger.info("Removed expired output %s of %s jobs", path.name, len(jobs))
+
+
+def compress_cold_results(session: Session, limit: int) -> int:
+    settings = get_settings()
+    if settings.storage_cold_after_days <= 0 or get_file_store().remote:
+        # Objects in a bucket are left to its lifecycle rules.
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=settings.storage_cold_after_days)
+    rows = session.exec(
+        select(StoredFile)
+        .where(StoredFile.kind == "result", StoredFile.codec.is_(None), StoredFile.last_used_at < cutoff)
+        .order_by(StoredFile.last_used_at)
+        .limit(limit)
+    ).all()
+    for row in rows:
+        path = _data_dir() / row.path
+        size = compress_file(path, settings.storage_zstd_level)
+        if size is None:
+            if not cold_path(path).exists():
+                session.delete(row)
+            continue
+        row.codec = "zstd"
+        row.size_bytes = size
+        session.add(row)
+    session.commit()
+    return len(rows)
+
+
+def _evict_kind(session: Session, kind: str, max_bytes: int, limit: int) -> int:
+    """Drop the least recently used files of ``kind`` while they take more than ``max_bytes``."""
+    if max_bytes <= 0:
+        return 0
+    of_kind = StoredFile.kind == kind
+    total = session.exec(select(func.coalesce(func.sum(StoredFile.size_bytes), 0)).where(of_kind)).one()
+    if total <= max_bytes:
+        return 0
+    evicted = 0
+    for row in session.exec(select(StoredFile).where(of_kind).order_by(StoredFile.last_used_at).limit(limit)).all():
+        if total <= max_bytes:
+            break
+        remove_file(session, _data_dir() / row.path)
+        total -= row.size_bytes
+        evicted += 1
+    session.commit()
+    return evicted
+
+
+def evict_derived(session: Session, limit: int) -> int:
+    """Drop the least recently used download variants while they exceed their quota."""
+    return _evict_kind(session, "derived", get_settings().storage_derived_max_bytes, limit)
+
+
+def evict_conversions(session: Session, limit: int) -> int:
+    """Drop the least recently used cached docling conversions while they exceed their quota."""
+    return _evict_kind(session, "conversion", get_settings().storage_conversions_max_bytes, limit)
+
+
+def _sync_local_copies(session: Session) -> None:
+    """Record the copies this process fetched, read or dropped since the last sync. The caller commits."""
+    for key, seen in drain_copy_reads().items():
+        row = session.get(LocalCopy, (NODE, key))
+        if seen is None:
+            if row is not None:
+                session.delete(row)
+            continue
+        size, read_at = seen
+        if row is None:
+            if size is not None:
+                session.add(LocalCopy(node=NODE, path=key, size_bytes=size, last_read_at=read_at))
+            continue
+        row.last_read_at = max(row.last_read_at, read_at)
+        if size is not None:
+            row.size_bytes = size
+        session.add(row)
+
+
+def _local_copies_bytes(session: Session) -> int:
+    return session.exec(
+        select(func.coalesce(func.sum(LocalCopy.size_bytes), 0)).where(LocalCopy.node == NODE)
+    ).one()
+
+
+def local_copies_due() -> bool:
+    return _last_trim is None or time.monotonic() - _last_trim >= get_settings().storage_cleanup_interval
+
+
+def trim_local_copies(force: bool = False) -> int:
+    """Drop this node's least recently read copies of bucket objects above their budget.
+
+    Runs at most once per cleanup interval per process unless ``force``.
+    Returns the bytes freed.
+    """
+    global _last_trim  # pylint: disable=global-statement
+    settings = get_settings()
+    if not get_file_store().remote or not _trim_lock.acquire(blocking=False):
+        return 0
+    try:
+        if not force and not local_copies_due():
+            return 0
+        _last_trim = time.monotonic()
+        max_bytes = settings.storage_s3_local_copies_max_bytes
+        freed = 0
+        with Session(engine) as session:
+            _sync_local_copies(session)
+            session.flush()
+            total = _local_copies_bytes(session)
+            if max_bytes and total > max_bytes:
+                statement = (
+                    select(LocalCopy)
+                    .where(LocalCopy.node == NODE, LocalCopy.last_read_at < datetime.utcnow() - LOCAL_COPY_GRACE)
+                    .order_by(LocalCopy.last_read_at)
+                    .limit(settings.storage_cleanup_batch_size)
+                )
+                for row in session.exec(statement).all():
+                    if total - freed <= max_bytes:
+                        break
+                    (_data_dir() / row.path).unlink(missing_ok=True)
+                    freed += row.size_bytes
+                    session.delete(row)
+            session.commit()
+        if freed:
+            logger.info("Dropped %s MiB of local copies, %s MiB kept", freed >> 20, (total - freed) >> 20)
+        return freed
+    finally:
+        _trim_lock.release()
+
+
+def _track_existing_job(session: Session, job: OCRJob) -> None:
+    settings = get_settings()
+    finished_at = job.finished_at or job.updated_at
+    upload_path = _data_dir() / "uploads" / job.stored_filename
+    expires_at = None
+    if job.status == "completed" and not settings.storage_keep_uploads:
+        expires_at = finished_at + timedelta(hours=settings.storage_upload_retention_hours)
+    elif job.status == "failed" and not settings.storage_keep_uploads:
+        expires_at = result_expiry(finished_at)
+    track_file(session, upload_path, "upload", job_id=job.id, expires_at=expires_at, used_at=finished_at)
+    if job.status == "completed":
+        track_job_output(session, job, _data_dir() / "results", used_at=finished_at)
+
+
+def _track_existing_document(session: Session, document: WordDocument) -> None:
+    path = _data_dir() / "results" / "word_documents" / document.file_name
+    track_file(session, path, "document", used_at=document.created_at)
+
+
+BACKFILLS: list[tuple[str, Any, Callable[[Session, Any], None]]] = [
+    ("storage_backfill_job_id", OCRJob, _track_existing_job),
+    ("storage_backfill_document_id", WordDocument, _track_existing_document),
+]
+
+
+def _backfill_conversions(session: Session) -> int:
+    """Register the docling conversions cached before they were tracked, once.
+
+    The docling JSON written next to them was never read and is deleted.
+    """
+    key = "storage_backfill_conversions"
+    if session.get(Setting, key) is not None:
+        return 0
+    directory = _data_dir() / "cache" / "conversions"
+    registered = 0
+    if directory.is_dir():
+        for path in directory.iterdir():
+            if path.suffix == ".json":
+                path.unlink(missing_ok=True)
+            elif path.suffix == ".md":
+                used_at = datetime.utcfromtimestamp(path.stat().st_mtime)
+                track_file(session, path, "conversion", used_at=used_at)
+                registered += 1
+    session.add(Setting(key=key, value="done"))
+    session.commit()
+    return registered
+
+
+def backfill(session: Session, limit: int) -> int:
+    """Register files written before the accounting existed, resuming from a cursor in ``Setting``."""
+    registered = _backfill_conversions(session)
+    for key, model, track in BACKFILLS:
+        cursor = session.get(Setting, key)
+        if cursor is not None and cursor.value == "done":
+            continue
+        after = int(cursor.value) if cursor is not None else 0
+        rows = session.exec(select(model).where(model.id > after).order_by(model.id).limit(limit)).all()
+        for row in rows:
+            track(session, row)
+        if cursor is None:
+            cursor = Setting(key=key, value="")
+        # Rows added later are tracked when they are written.
+        cursor.value = str(rows[-1].id) if len(rows) == limit else "done"
+        session.add(cursor)
+        session.commit()
+        registered += len(rows)
+    return registered
+
+
+def storage_usage(session: Session) -> dict[str, Any]:
+    rows = session.exec(
+        select(StoredFile.kind, func.count(), func.coalesce(func.sum(StoredFile.size_bytes), 0)).group_by(
+            StoredFile.kind
+        )
+    ).all()
+    kinds = {kind: {"files": files, "bytes": size} for kind, files, size in rows}
+    compressed = session.exec(select(func.count()).select_from(StoredFile).where(StoredFile.codec == "zstd")).one()
+    pending = session.exec(
+        select(func.count()).select_from(StoredFile).where(StoredFile.expires_at <= datetime.utcnow())
+    ).one()
+    settings = get_settings()
+    return {
+        "kinds": kinds,
+        "total_bytes": sum(item["bytes"] for item in kinds.values()),
+        "compressed_results": compressed,
+        "expired_pending": pending,
+        "derived_max_bytes": settings.storage_derived_max_bytes,
+        "conversions_max_bytes": settings.storage_conversions_max_bytes,
+        "result_retention_days": settings.storage_result_retention_days,
+        "upload_retention_hours": None if settings.storage_keep_uploads else settings.storage_upload_retention_hours,
+        # Copies of bucket objects on this node, as recorded by the last trim.
+        "local_copies_bytes": _local_copies_bytes(session) if get_file_store().remote else None,
+        "local_copies_max_bytes": settings.storage_s3_local_copies_max_bytes if get_file_store().remote else None,
+    }
+
+
+class StorageManager:
+    """Apply retention, cold compression and the derived-file quota a batch at a time."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.batch_size = max(settings.storage_cleanup_batch_size, 1)
+        self.poll_interval = settings.storage_cleanup_interval
+        self.stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        with Session(engine) as session:
+            done = backfill(session, self.batch_size)
+            done += expire_files(session, self.batch_size)
+            done += compress_cold_results(session, self.batch_size)
+            done += evict_derived(session, self.batch_size)
+            done += evict_conversions(session, self.batch_size)
+        trim_local_copies()
+        return done
+
+    def _loop(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                done = self.run_once()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Storage manager error")
+                done = 0
+            if done < self.batch_size:
+                self.stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="storage-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
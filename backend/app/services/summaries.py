@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+
+from ..config import get_settings
+from ..database import engine
+from ..models import OCRJob, ResultCacheEntry, SummaryRequest, WordDocument
+from .events import publish_event
+from .mistral_client import generate_summary, get_cached_summary
+
+logger = logging.getLogger(__name__)
+
+_requests = SummaryRequest.__table__
+
+SUMMARY_LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 15 * 60
+
+
+def summaries_enabled() -> bool:
+    return bool(get_settings().mistral_api_key)
+
+
+def enqueue_summary(session: Session, target: str, target_id: int, prompt: str) -> Optional[SummaryRequest]:
+    """Queue a summary for a job or Word document. The caller commits.
+
+    A request that is still waiting for the same target is reused, so a job
+    that is processed again does not summarize twice.
+    """
+    if not summaries_enabled():
+        return None
+    request = session.exec(
+        select(SummaryRequest).where(
+            SummaryRequest.target == target,
+            SummaryRequest.target_id == target_id,
+            SummaryRequest.status == "pending",
+        )
+    ).first()
+    if request is None:
+        request = SummaryRequest(target=target, target_id=target_id, prompt=prompt)
+    else:
+        request.prompt = prompt
+        request.updated_at = datetime.utcnow()
+    session.add(request)
+    return request
+
+
+def request_summary(session: Session, target: str, target_id: int, prompt: str) -> Optional[str]:
+    """Return a memoized summary for ``prompt`` right away, or queue one. The caller commits."""
+    if not summaries_enabled():
+        return None
+    cached = get_cached_summary(prompt, session)
+    if cached is None:
+        enqueue_summary(session, target, target_id, prompt)
+    return cached
+
+
+def claim_summary_requests(limit: int) -> list[int]:
+    """Lease up to ``limit`` due requests, including ones whose previous lease expired."""
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(_requests.c.status == "pending", _requests.c.next_attempt_at <= now),
+        and_(_requests.c.status == "processing", _requests.c.lease_expires_at < now),
+    )
+    claimed: list[int] = []
+    with Session(engine) as session:
+        candidates = session.exec(
+            select(SummaryRequest.id)
+            .where(claimable)
+            .order_by(SummaryRequest.next_attempt_at, SummaryRequest.id)
+            .limit(limit)
+        ).all()
+        for request_id in candidates:
+            result = session.execute(
+                update(_requests)
+                .where(_requests.c.id == request_id, claimable)
+                .values(
+                    status="processing",
+                    attempts=_requests.c.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=SUMMARY_LEASE_SECONDS),
+                    updated_at=now,
+                )
+            )
+            if result.rowcount == 1:
+                claimed.append(request_id)
+        session.commit()
+    return claimed
+
+
+def release_summary_request(request_id: int) -> None:
+    """Hand a claimed request back without counting the attempt."""
+    with engine.begin() as connection:
+        connection.execute(
+            update(_requests)
+            .where(_requests.c.id == request_id, _requests.c.status == "processing")
+            .values(status="pending", attempts=_requests.c.attempts - 1, lease_expires_at=None)
+        )
+
+
+def retry_delay(attempts: int) -> float:
+    base = get_settings().summary_retry_base_seconds * (2 ** max(attempts - 1, 0))
+    delay = min(base, MAX_RETRY_DELAY_SECONDS)
+    return delay + random.uniform(0, delay / 2)
+
+
+def _fail_or_reschedule(session: Session, request: SummaryRequest, error: str) -> None:
+    now = datetime.utcnow()
+    request.error = error
+    request.lease_expires_at = None
+    request.updated_at = now
+    if request.attempts >= get_settings().summary_max_attempts:
+        request.status = "failed"
+        logger.warning(
+            "Giving up on summary for %s %s after %s attempts: %s",
+            request.target,
+            request.target_id,
+            request.attempts,
+            error,
+        )
+    else:
+        request.status = "pending"
+        request.next_attempt_at = now + timedelta(seconds=retry_delay(request.attempts))
+    session.add(request)
+    session.commit()
+
+
+def _store_job_summary(session: Session, job: OCRJob, summary: str) -> list[OCRJob]:
+    """Set the summary on ``job`` and on jobs that share its cached output."""
+    now = datetime.utcnow()
+    jobs = [job]
+    if job.cache_key:
+        entry = session.get(ResultCacheEntry, job.cache_key)
+        if entry is not None and entry.output_filename == job.output_filename and not entry.summary:
+            entry.summary = summary
+            session.add(entry)
+        jobs += session.exec(
+            select(OCRJob).where(
+                OCRJob.cache_key == job.cache_key,
+                OCRJob.output_filename == job.output_filename,
+                OCRJob.summary.is_(None),
+                OCRJob.id != job.id,
+            )
+        ).all()
+    for item in jobs:
+        item.summary = summary
+        item.updated_at = now
+        session.add(item)
+    return jobs
+
+
+def process_summary_request(request_id: int) -> None:
+    """Generate one claimed summary; the database is not held open during the API call."""
+    with Session(engine) as session:
+        request = session.get(SummaryRequest, request_id)
+        if request is None or request.status != "processing":
+            return
+        prompt = request.prompt
+
+    try:
+        summary = generate_summary(prompt)
+        error = None
+    except Exception as exc:  # pylint: disable=broad-except
+        summary = None
+        error = str(exc) or exc.__class__.__name__
+
+    with Session(engine) as session:
+        request = session.get(SummaryRequest, request_id)
+        if request is None:
+            return
+        if error is not None:
+            logger.info("Summary request %s failed (attempt %s): %s", request_id, request.attempts, error)
+            _fail_or_reschedule(session, request, error)
+            return
+
+        updated_jobs: list[OCRJob] = []
+        document: Optional[WordDocument] = None
+        if summary:
+            if request.target == "job":
+                job = session.get(OCRJob, request.target_id)
+                if job is not None:
+                    updated_jobs = _store_job_summary(session, job, summary)
+            elif request.target == "word_document":
+                document = session.get(WordDocument, request.target_id)
+                if document is not None:
+                    document.summary = summary
+                    document.updated_at = datetime.utcnow()
+                    session.add(document)
+        session.delete(request)
+        session.commit()
+
+        # Imported here because the OCR service enqueues summaries from this module.
+        from .ocr import publish_job_event
+
+        for job in updated_jobs:
+            publish_job_event(job)
+        if document is not None:
+            publish_event("word_document", {"id": document.id})
+
+
+class RateLimiter:
+    """Space out calls evenly so at most ``per_minute`` start in any minute."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        delay = slot - now
+        return delay <= 0 or not stop_event.wait(delay)
+
+
+class SummaryWorker:
+    """Run queued summary requests with bounded concurrency and a rate limit."""
+
+    def __init__(self, concurrency: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.concurrency = concurrency or settings.summary_concurrency
+        self.batch_size = max(settings.summary_batch_size, 1)
+        self.poll_interval = settings.queue_poll_interval
+        self.limiter = RateLimiter(settings.summary_rate_per_minute)
+        self.stop_event = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self, request_id: int) -> None:
+        if not self.limiter.acquire(self.stop_event):
+            release_summary_request(request_id)
+            return
+        process_summary_request(request_id)
+
+    def _loop(self) -> None:
+        assert self._executor is not None
+        running: set[Future] = set()
+        while not self.stop_event.is_set():
+            free = self.concurrency - len(running)
+            if free > 0:
+                try:
+                    for request_id in claim_summary_requests(min(free, self.batch_size)):
+                        running.add(self._executor.submit(self._run, request_id))
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Summary dispatch error")
+            if running:
+                done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        logger.error("Summary request crashed", exc_info=future.exception())
+            else:
+                self.stop_event.wait(self.poll_interval)
+        wait(running)
+
+    def start(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="summary")
+        self._thread = threading.Thread(target=self._loop, name="summary-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
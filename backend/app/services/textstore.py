@@ -0,0 +1,274 @@
+"""Per-page text of every job output, compressed and read through mmap.
+
+Each output file in ``results/`` gets a page store in ``text/`` named after
+it, so jobs that share a cached output share its text too. The file is::
+
+    header   b"OCRT" | version u16 | entry count u32
+    index    per entry: offset u64 | compressed size u32 | text size u32 | page i32 (-1: no page number)
+    blocks   zlib-compressed UTF-8, one per entry
+
+An entry is a PDF page when the engine knows page boundaries (text layers,
+ocrmypdf output) and a chunk of about ``text_store_chunk_chars`` characters of
+markdown otherwise. Readers map the file and decompress only the entries
+they need, so excerpts, summaries, search and Word conversion never re-read
+or re-parse the full output.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from ..config import get_settings
+from ..models import OCRJob
+from .filestore import fetch_path, get_file_store
+from .preflight import extract_pdf_text
+from .sharding import is_pdf
+
+logger = logging.getLogger(__name__)
+
+PageText = tuple[Optional[int], str]  # (1-based page number or None, text)
+
+_MAGIC = b"OCRT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+_ENTRY = struct.Struct("<QIIi")
+STORE_SUFFIX = ".pages"
+
+
+def text_dir() -> Path:
+    directory = get_settings().data_dir / "text"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def store_path(output_filename: str) -> Path:
+    return text_dir() / f"{output_filename}{STORE_SUFFIX}"
+
+
+def numbered_pages(texts: list[str], first: int = 0) -> list[PageText]:
+    """Number the non-empty page texts of a PDF, ``first`` being the 0-based index of ``texts[0]``."""
+    return [(first + index + 1, text.strip()) for index, text in enumerate(texts) if text.strip()]
+
+
+def chunk_text(content: str, size: Optional[int] = None) -> list[PageText]:
+    """Split markdown on blank lines into chunks of about ``size`` characters."""
+    size = size or get_settings().text_store_chunk_chars
+    chunks: list[PageText] = []
+    current: list[str] = []
+    length = 0
+    for paragraph in re.split(r"\n\s*\n", content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and length + len(paragraph) > size:
+            chunks.append((None, "\n\n".join(current)))
+            current, length = [], 0
+        current.append(paragraph)
+        length += len(paragraph) + 2
+    if current:
+        chunks.append((None, "\n\n".join(current)))
+    return chunks
+
+
+def join_pages(pages: Iterable[PageText], max_chars: Optional[int] = None) -> str:
+    """Join entry texts with blank lines, stopping once ``max_chars`` characters are collected."""
+    parts: list[str] = []
+    length = 0
+    for _page, content in pages:
+        if max_chars is not None and length >= max_chars:
+            break
+        parts.append(content)
+        length += len(content) + 2
+    joined = "\n\n".join(parts)
+    return joined if max_chars is None else joined[:max_chars]
+
+
+def write_page_store(path: Path, pages: list[PageText]) -> None:
+    level = get_settings().text_store_compression_level
+    blocks = []
+    entries = []
+    offset = _HEADER.size + _ENTRY.size * len(pages)
+    for page, content in pages:
+        raw = content.encode("utf-8")
+        block = zlib.compress(raw, level)
+        entries.append(_ENTRY.pack(offset, len(block), len(raw), -1 if page is None else page))
+        blocks.append(block)
+        offset += len(block)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with temporary.open("wb") as handle:
+        handle.write(_HEADER.pack(_MAGIC, _VERSION, len(pages)))
+        handle.writelines(entries)
+        handle.writelines(blocks)
+    os.replace(temporary, path)
+
+
+class PageStore:
+    """Read-only view of a page store; entries are decompressed on access."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._map is None or size < _HEADER.size:
+            raise ValueError(f"Empty page store {path.name}")
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"Unknown page store format in {path.name}")
+        self.count = count
+
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, position: int) -> tuple[int, int, int, int]:
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        return _ENTRY.unpack_from(self._map, _HEADER.size + _ENTRY.size * position)
+
+    def page_number(self, position: int) -> Optional[int]:
+        page = self._entry(position)[3]
+        return None if page < 0 else page
+
+    def text_size(self, position: int) -> int:
+        return self._entry(position)[2]
+
+    def __getitem__(self, position: int) -> PageText:
+        offset, compressed, _size, page = self._entry(position)
+        content = zlib.decompress(self._map[offset : offset + compressed]).decode("utf-8")
+        return (None if page < 0 else page, content)
+
+    def __iter__(self) -> Iterator[PageText]:
+        for position in range(self.count):
+            yield self[position]
+
+    def text(self, max_chars: Optional[int] = None) -> str:
+        """Join the entries, decompressing only as many as ``max_chars`` needs."""
+        return join_pages(iter(self), max_chars)
+
+
+def open_page_store(output_filename: Optional[str]) -> Optional[PageStore]:
+    if not output_filename:
+        return None
+    try:
+        return PageStore(fetch_path(store_path(output_filename)))
+    except FileNotFoundError:
+        return None
+    except ValueError as exc:
+        logger.warning("Ignoring unreadable page store: %s", exc)
+        return None
+
+
+def pages_from_output(job: OCRJob, dirs: dict[str, Path]) -> list[PageText]:
+    """Recover the pages of an output that was produced without a page store."""
+    if not job.output_filename:
+        return []
+    from .storage import hot_path
+
+    output_path = hot_path(dirs["results"] / job.output_filename)
+    input_path = dirs["uploads"] / job.stored_filename
+    if job.output_mime_type == "application/pdf":
+        return numbered_pages(extract_pdf_text(output_path)) if output_path.exists() else []
+    if job.resolved_engine == "text" and input_path.exists() and is_pdf(input_path):
+        # The text engine output is the input's text layer joined page by page.
+        return numbered_pages(extract_pdf_text(input_path))
+    if not output_path.exists():
+        return []
+    return chunk_text(output_path.read_text(encoding="utf-8", errors="replace"))
+
+
+def save_job_text(job: OCRJob, dirs: dict[str, Path], pages: Optional[list[PageText]] = None) -> list[PageText]:
+    """Write the page store of a finished job's output unless it already has one."""
+    if not job.output_filename:
+        return []
+    path = fetch_path(store_path(job.output_filename))
+    if path.exists():
+        with PageStore(path) as store:
+            pages = list(store)
+    else:
+        if pages is None:
+            pages = pages_from_output(job, dirs)
+        write_page_store(path, pages)
+    if get_file_store().remote and job.text_excerpt is None:
+        # Listings never fetch page stores from the bucket, so they read the excerpt column.
+        job.text_excerpt = join_pages(pages, get_settings().text_excerpt_chars)[: get_settings().text_excerpt_chars]
+    return pages
+
+
+def job_pages(job: OCRJob, dirs: dict[str, Path]) -> list[PageText]:
+    """Return the pages of a job, building the page store of older outputs on first use."""
+    store = open_page_store(job.output_filename)
+    if store is None:
+        return save_job_text(job, dirs)
+    with store:
+        return list(store)
+
+
+def read_pages(job: OCRJob, dirs: dict[str, Path], offset: int, limit: int) -> Optional[tuple[int, list[PageText]]]:
+    """Return the entry count and the entries from ``offset`` on, decompressing only those."""
+    store = open_page_store(job.output_filename)
+    if store is None:
+        if not save_job_text(job, dirs):
+            return None
+        store = open_page_store(job.output_filename)
+        if store is None:
+            return None
+    with store:
+        return len(store), [store[position] for position in range(offset, min(offset + limit, len(store)))]
+
+
+def job_text(job: OCRJob, max_chars: Optional[int] = None) -> Optional[str]:
+    store = open_page_store(job.output_filename)
+    if store is None:
+        return None
+    with store:
+        return store.text(max_chars)
+
+
+@lru_cache(maxsize=4096)
+def _cached_excerpt(output_filename: str, mtime_ns: int, chars: int) -> str:
+    store = open_page_store(output_filename)
+    if store is None:
+        return ""
+    with store:
+        return store.text(chars)
+
+
+def text_excerpt(output_filename: Optional[str], legacy: Optional[str] = None) -> Optional[str]:
+    """Return the first ``text_excerpt_chars`` characters of an output, read from its page store.
+
+    Jobs finished before the page store existed, and page stores with no copy
+    on this node, fall back to the excerpt column: listings never fetch from a
+    remote file store. Excerpts are memoized by file name and modification time.
+    """
+    chars = get_settings().text_excerpt_chars
+    if output_filename:
+        try:
+            mtime_ns = store_path(output_filename).stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+        else:
+            return _cached_excerpt(output_filename, mtime_ns, chars) or None
+    return legacy[:chars] if legacy else None
+
+
+def remove_job_text(output_filename: Optional[str]) -> None:
+    if output_filename:
+        store_path(output_filename).unlink(missing_ok=True)
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO, Optional
+
+from flask import Request
+from sqlmodel import Session, select
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from ..config import get_settings
+from ..models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MULTIPART_PART_OVERHEAD = 1024
+# Page objects in an uncompressed PDF; pages inside object streams are not
+# visible to this scan, so the result is only a scheduling hint.
+_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+_PAGE_TAIL = 64
+
+
+def incoming_dir() -> Path:
+    directory = get_settings().data_dir / "uploads" / ".incoming"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+class PageCounter:
+    """Count PDF page objects in a byte stream fed chunk by chunk."""
+
+    def __init__(self) -> None:
+        self.pages = 0
+        self.is_pdf: Optional[bool] = None
+        self._tail = b""
+
+    def update(self, chunk: bytes) -> None:
+        if self.is_pdf is None:
+            self.is_pdf = chunk.startswith(b"%PDF-")
+        if not self.is_pdf or not chunk:
+            return
+        data = self._tail + chunk
+        # A match ending inside the old tail was counted by the previous call;
+        # one ending in the last byte waits for its look-ahead character.
+        lower = len(self._tail) - 1
+        upper = len(data) - 1
+        self.pages += sum(1 for match in _PAGE_PATTERN.finditer(data) if lower < match.end() <= upper)
+        self._tail = data[-_PAGE_TAIL:]
+
+    def finish(self) -> Optional[int]:
+        if not self.is_pdf:
+            return None
+        if self._tail:
+            last = None
+            for last in _PAGE_PATTERN.finditer(self._tail):
+                pass
+            if last is not None and last.end() == len(self._tail):
+                self.pages += 1
+            self._tail = b""
+        return self.pages or None
+
+
+class StreamedUpload:
+    """File-like target for the multipart parser that hashes data while it is written.
+
+    The bytes go straight to ``uploads/.incoming`` so a request body is written
+    to disk once; :meth:`commit` then moves the file to its final name.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.path = incoming_dir() / f"{uuid.uuid4().hex}.part"
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._pages = PageCounter()
+        self._handle: IO[bytes] = self.path.open("w+b")
+        self._committed = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            # The parser drops this object without closing it.
+            self.close()
+            raise RequestEntityTooLarge()
+        self._digest.update(data)
+        self._pages.update(data)
+        return self._handle.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._handle.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._handle.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._handle.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        self._handle.flush()
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def page_count(self) -> Optional[int]:
+        return self._pages.finish()
+
+    def commit(self, destination: Path) -> None:
+        self._handle.close()
+        os.replace(self.path, destination)
+        self._committed = True
+
+    def close(self) -> None:
+        if not self._handle.closed:
+            self._handle.close()
+        if not self._committed:
+            self.path.unlink(missing_ok=True)
+
+
+class StreamingUploadRequest(Request):
+    # Endpoints whose body holds a whole batch rather than one file; filled in by the app.
+    batch_endpoints: frozenset[str] = frozenset()
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        settings = get_settings()
+        if self.endpoint in self.batch_endpoints:
+            # Room for the multipart headers of every part on top of the stored bytes.
+            return settings.batch_max_bytes + settings.batch_max_files * MULTIPART_PART_OVERHEAD
+        return settings.upload_max_bytes
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Each file of a batch still has the single-file limit.
+        upload = StreamedUpload(get_settings().upload_max_bytes)
+        self.__dict__.setdefault("_streamed_uploads", []).append(upload)
+        return upload
+
+    def close(self) -> None:
+        super().close()
+        # Parts parsed before a failure never reach ``files``, so they are removed here.
+        for upload in self.__dict__.get("_streamed_uploads", ()):
+            upload.close()
+
+
+def save_upload(file: FileStorage, destination: Path) -> tuple[str, int, Optional[int]]:
+    """Store an uploaded file at ``destination``, returning its SHA-256, size and page-count hint.
+
+    Files parsed by :class:`StreamingUploadRequest` are already on disk and are
+    only moved; anything else is copied in chunks.
+    """
+    stream = file.stream
+    if isinstance(stream, StreamedUpload):
+        stream.commit(destination)
+        return stream.sha256, stream.size, stream.page_count()
+    return copy_stream(stream, destination)
+
+
+def copy_stream(
+    stream: IO[bytes], destination: Path, max_bytes: Optional[int] = None
+) -> tuple[str, int, Optional[int]]:
+    """Copy ``stream`` to ``destination`` in chunks, returning its SHA-256, size and page-count hint."""
+    digest = hashlib.sha256()
+    pages = PageCounter()
+    size = 0
+    with destination.open("wb") as handle:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                handle.close()
+                destination.unlink(missing_ok=True)
+                raise RequestEntityTooLarge()
+            digest.update(chunk)
+            pages.update(chunk)
+            handle.write(chunk)
+    return digest.hexdigest(), size, pages.finish()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _SessionDigest:
+    """Hash state of a resumable upload, valid while ``offset`` matches the bytes received."""
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.digest = hashlib.sha256()
+        self.pages = PageCounter()
+
+
+# hashlib objects cannot be stored in the database, so the running hash lives in
+# the process that received the previous chunk. A chunk handled by another
+# worker, or after a restart, drops it and the upload is hashed once at the end.
+_session_digests: dict[str, _SessionDigest] = {}
+_session_digests_lock = threading.Lock()
+
+
+def session_path(upload: UploadSession) -> Path:
+    return incoming_dir() / f"{upload.id}.session"
+
+
+def create_upload_session(session: Session, filename: str, total_size: Optional[int]) -> UploadSession:
+    upload = UploadSession(id=uuid.uuid4().hex, filename=filename, total_size=total_size)
+    session_path(upload).touch()
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    return upload
+
+
+def append_upload_chunk(session: Session, upload: UploadSession, stream: IO[bytes]) -> UploadSession:
+    """Append a request body to a resumable upload; the caller checks the offset first."""
+    settings = get_settings()
+    path = session_path(upload)
+    with _session_digests_lock:
+        state = _session_digests.pop(upload.id, None)
+    if state is None and upload.received == 0:
+        state = _SessionDigest()
+    elif state is not None and state.offset != upload.received:
+        state = None
+    with path.open("r+b") as handle:
+        handle.seek(upload.received)
+        handle.truncate()
+        written = upload.received
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > settings.upload_max_bytes or (upload.total_size and written > upload.total_size):
+                    handle.truncate(upload.received)
+                    raise RequestEntityTooLarge()
+                handle.write(chunk)
+                if state is not None:
+                    state.digest.update(chunk)
+                    state.pages.update(chunk)
+        except Exception:
+            # The hash may have seen bytes that were not kept.
+            state = None
+            raise
+        finally:
+            if state is not None:
+                state.offset = written
+                with _session_digests_lock:
+                    _session_digests[upload.id] = state
+
+    upload.received = written
+    upload.updated_at = datetime.utcnow()
+    if upload.total_size is not None and written == upload.total_size:
+        finalize_upload_session(upload)
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    return upload
+
+
+def finalize_upload_session(upload: UploadSession) -> None:
+    with _session_digests_lock:
+        state = _session_digests.pop(upload.id, None)
+    if state is None or state.offset != upload.received:
+        state = _SessionDigest()
+        with session_path(upload).open("rb") as handle:
+            for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+                state.digest.update(chunk)
+                state.pages.update(chunk)
+    upload.content_hash = state.digest.hexdigest()
+    upload.page_count = state.pages.finish()
+    upload.completed = True
+
+
+def claim_upload_session(session: Session, upload: UploadSession, destination: Path) -> None:
+    """Move a completed upload to ``destination`` and forget the session. The caller commits."""
+    shutil.move(str(session_path(upload)), destination)
+    session.delete(upload)
+
+
+def delete_upload_session(session: Session, upload: UploadSession) -> None:
+    with _session_digests_lock:
+        _session_digests.pop(upload.id, None)
+    session_path(upload).unlink(missing_ok=True)
+    session.delete(upload)
+    session.commit()
+
+
+def expire_upload_sessions(session: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=get_settings().upload_session_ttl_hours)
+    stale = session.exec(select(UploadSession).where(UploadSession.updated_at < cutoff)).all()
+    for upload in stale:
+        with _session_digests_lock:
+            _session_digests.pop(upload.id, None)
+        session_path(upload).unlink(missing_ok=True)
+        session.delete(upload)
+    if stale:
+        session.commit()
+        logger.info("Expired %s abandoned upload sessions", len(stale))
+    return len(stale)
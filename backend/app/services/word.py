@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from docx import Document
 from sqlmodel import Session, select
 
 from ..config import get_settings
-from ..models import WordDocument
+from ..models import OCRJob, WordDocument
 from ..schemas import WordDocumentRead
-from .mistral_client import generate_summary
-from .ocr import ensure_storage_dirs, get_converter
+from .conversions import convert_to_markdown, get_cached_markdown
+from .events import publish_event
+from .ocr import ensure_storage_dirs
+from .summaries import request_summary
+from .filestore import publish_path
+from .storage import hot_path, track_file
+from .textstore import job_pages, job_text, join_pages
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +34,11 @@ def documents_dir() -> Path:
 def save_document(session: Session, document: WordDocument) -> WordDocument:
     document.updated_at = datetime.utcnow()
     session.add(document)
+    track_file(session, documents_dir() / document.file_name, "document")
     session.commit()
+    publish_path(documents_dir() / document.file_name)
     session.refresh(document)
+    publish_event("word_document", {"id": document.id, "job_id": document.job_id})
     return document
 
 
@@ -48,6 +57,23 @@ def serialize_word_document(document: WordDocument, prefix: str) -> WordDocument
     )
 
 
+WORD_DOCUMENT_LIST_FIELDS = list(WordDocumentRead.model_fields)
+
+
+def word_document_list_columns(fields: list[str]) -> list[str]:
+    return [name for name in fields if name != "download_url"]
+
+
+def project_word_document_row(row: dict[str, Any], fields: list[str], prefix: str) -> dict[str, Any]:
+    item = {}
+    for name in fields:
+        if name == "download_url":
+            item[name] = f"{prefix}/word/documents/{row['id']}/download"
+        else:
+            item[name] = row[name]
+    return item
+
+
 def generate_docx_from_text(title: str, content: str) -> Path:
     doc = Document()
     if title:
@@ -55,48 +81,117 @@ def generate_docx_from_text(title: str, content: str) -> Path:
     paragraphs = content.splitlines() or [content]
     for paragraph in paragraphs:
         doc.add_paragraph(paragraph)
-    output_path = documents_dir() / f"{int(datetime.utcnow().timestamp())}_generated.docx"
+    output_path = documents_dir() / f"{time.time_ns()}_generated.docx"
     doc.save(output_path)
     return output_path
 
 
+def _save_with_summary(session: Session, document: WordDocument, summary_prompt: str) -> WordDocument:
+    document = save_document(session, document)
+    summary = request_summary(session, "word_document", document.id, summary_prompt)
+    if summary:
+        document.summary = summary
+        return save_document(session, document)
+    session.commit()
+    return document
+
+
 def create_word_document_from_text(session: Session, title: str, content: str) -> WordDocument:
     output_path = generate_docx_from_text(title, content)
     summary_input = (
         "Rezuma continutul urmatorului document Word in doua fraze in limba romana:\n" + content[:4000]
     )
-    summary = generate_summary(summary_input)
     document = WordDocument(
         title=title or "Document fara titlu",
         source="generated",
         file_name=output_path.name,
-        summary=summary,
     )
-    return save_document(session, document)
+    return _save_with_summary(session, document, summary_input)
 
 
-def convert_pdf_to_word(session: Session, title: str, pdf_path: Path, original_filename: Optional[str] = None) -> WordDocument:
-    converter = get_converter()
-    result = converter.convert(str(pdf_path))
-    markdown = result.document.export_to_markdown()
+def _markdown_to_docx(title: str, markdown: str) -> Path:
     doc = Document()
     if title:
         doc.add_heading(title, level=1)
     paragraphs = markdown.splitlines() or [markdown]
     for paragraph in paragraphs:
         doc.add_paragraph(paragraph)
-    output_path = documents_dir() / f"{int(datetime.utcnow().timestamp())}_converted.docx"
+    output_path = documents_dir() / f"{time.time_ns()}_converted.docx"
     doc.save(output_path)
+    return output_path
+
+
+def _save_converted_document(
+    session: Session,
+    title: str,
+    markdown: str,
+    original_filename: Optional[str],
+    job_id: Optional[int] = None,
+) -> WordDocument:
+    output_path = _markdown_to_docx(title, markdown)
     summary_input = "Rezuma documentul convertit in doua fraze in limba romana:\n" + markdown[:4000]
-    summary = generate_summary(summary_input)
     document = WordDocument(
         title=title or (original_filename or "Document convertit"),
         source="converted",
         original_filename=original_filename,
         file_name=output_path.name,
-        summary=summary,
+        job_id=job_id,
+    )
+    return _save_with_summary(session, document, summary_input)
+
+
+def convert_pdf_to_word(
+    session: Session,
+    title: str,
+    pdf_path: Path,
+    original_filename: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    job_id: Optional[int] = None,
+) -> WordDocument:
+    markdown = convert_to_markdown(pdf_path, content_hash, session)
+    return _save_converted_document(session, title, markdown, original_filename, job_id)
+
+
+def job_markdown(session: Session, job: OCRJob) -> Optional[str]:
+    """Return the text already produced for ``job``, without running the model. The caller commits."""
+    stored = job_text(job)
+    if stored:
+        return stored
+    cached = get_cached_markdown(job.content_hash, session)
+    if cached is not None:
+        return cached
+    if job.output_filename and job.output_mime_type == "text/markdown":
+        results_dir = ensure_storage_dirs(get_settings().data_dir)["results"]
+        try:
+            return hot_path(results_dir / job.output_filename).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+    return None
+
+
+def convert_job_to_word(session: Session, job: OCRJob, title: str = "") -> Optional[WordDocument]:
+    """Build a Word document from a completed job, reusing its conversion whenever possible.
+
+    The text comes from the page store of the output. Outputs finished before
+    the page store existed get one on first use; a searchable PDF without any
+    text is converted with docling once and cached by its content hash.
+    """
+    if job.status != "completed":
+        return None
+    markdown = job_markdown(session, job)
+    if markdown is None:
+        if not job.output_filename:
+            return None
+        dirs = ensure_storage_dirs(get_settings().data_dir)
+        markdown = join_pages(job_pages(job, dirs))
+        if not markdown:
+            output_path = hot_path(dirs["results"] / job.output_filename)
+            if not output_path.exists():
+                return None
+            markdown = convert_to_markdown(output_path, session=session)
+    return _save_converted_document(
+        session, title or Path(job.original_filename).stem, markdown, job.original_filename, job.id
     )
-    return save_document(session, document)
 
 
 def get_document(session: Session, document_id: int) -> Optional[WordDocument]:
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+from typing import Optional
+
+from .config import get_settings
+from .database import init_db
+from .services.ocr import ensure_storage_dirs, get_converter, process_job
+from .services.pool import ProcessPoolWorker
+from .services.queue import (
+    LeaseKeeper,
+    claim_next_job,
+    make_worker_id,
+    maybe_recover_expired_leases,
+)
+from .services.search import SearchIndexer, search_available
+from .services.storage import StorageManager
+from .services.summaries import SummaryWorker
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    """Pull jobs from the database queue with a fixed number of threads."""
+
+    def __init__(self, threads: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.threads = threads or settings.worker_threads
+        self.poll_interval = settings.queue_poll_interval
+        self.worker_id = make_worker_id()
+        self.stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def run_one(self) -> bool:
+        job_id = claim_next_job(self.worker_id)
+        if job_id is None:
+            return False
+        logger.info("Worker %s picked up job %s", self.worker_id, job_id)
+        with LeaseKeeper(job_id, self.worker_id):
+            process_job(job_id)
+        return True
+
+    def _loop(self) -> None:
+        while not self.stop_event.is_set():
+            maybe_recover_expired_leases()
+            try:
+                worked = self.run_one()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Worker loop error")
+                worked = False
+            if not worked:
+                self.stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        for index in range(self.threads):
+            thread = threading.Thread(
+                target=self._loop, name=f"ocr-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def start_summary_worker() -> Optional[SummaryWorker]:
+    if get_settings().summary_concurrency <= 0:
+        return None
+    worker = SummaryWorker()
+    worker.start()
+    return worker
+
+
+def start_search_indexer() -> Optional[SearchIndexer]:
+    if not search_available():
+        return None
+    indexer = SearchIndexer()
+    indexer.start()
+    return indexer
+
+
+def start_storage_manager() -> StorageManager:
+    manager = StorageManager()
+    manager.start()
+    return manager
+
+
+def start_embedded_worker() -> QueueWorker:
+    worker = QueueWorker()
+    worker.start()
+    start_summary_worker()
+    start_search_indexer()
+    start_storage_manager()
+    return worker
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="OCR queue worker")
+    parser.add_argument("--threads", type=int, default=None, help="Concurrent jobs in this process")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Run jobs in N pool processes with a warm converter each (overrides WORKER_PROCESSES)",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    settings = get_settings()
+    init_db()
+    ensure_storage_dirs(settings.data_dir)
+
+    processes = args.processes if args.processes is not None else settings.worker_processes
+    worker = ProcessPoolWorker(processes) if processes > 0 else QueueWorker(threads=args.threads)
+
+    def handle_signal(signum, frame):  # pragma: no cover - signal handler
+        logger.info("Received signal %s, finishing running jobs", signum)
+        worker.stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    summary_worker = start_summary_worker()
+    search_indexer = start_search_indexer()
+    storage_manager = start_storage_manager()
+    try:
+        if isinstance(worker, ProcessPoolWorker):
+            logger.info("Worker %s starting %s pool processes", worker.worker_id, worker.processes)
+            worker.run()
+            return
+
+        if settings.worker_preload_converter:
+            # Pay the docling import here rather than on the first job.
+            get_converter()
+        worker.start()
+        logger.info("Worker %s started with %s threads", worker.worker_id, worker.threads)
+        while not worker.stop_event.wait(1.0):
+            pass
+        worker.stop()
+    finally:
+        if summary_worker is not None:
+            summary_worker.stop()
+        if search_indexer is not None:
+            search_indexer.stop()
+        storage_manager.stop()
+
+
+if __name__ == "__main__":  # pragma: no cover - manual execution helper
+    main()
@@ -0,0 +1,79 @@
+"""Measure hot-folder ingest throughput and the cost of an idle poll.
+
+    cd backend && python bench/hotfolder.py --files 2000 --directories 20
+
+Small text files are spread over ``--directories`` subdirectories of a
+temporary hot folder, discovered with one poll and ingested in passes of
+``HOTFOLDER_BATCH_SIZE``. An idle poll afterwards only stats the known
+directories, so its time should not grow with the number of archived files.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--directories", type=int, default=20)
+    parser.add_argument("--idle-files", type=int, default=20000, help="Unrelated files left in a watched directory")
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="hotfolder-bench-"))
+    watched = directory / "scans"
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{directory}/bench.db",
+        DATA_DIR=str(directory / "data"),
+        QUEUE_EMBEDDED_WORKER="false",
+        HOTFOLDER_DIRS=str(watched),
+        RESULT_CACHE_ENABLED="false",
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.database import init_db
+    from app.services.hotfolder import HotFolderIngestor
+
+    init_db()
+    for index in range(args.files):
+        target = watched / f"dept-{index % args.directories}"
+        target.mkdir(parents=True, exist_ok=True)
+        (target / f"scan-{index}.txt").write_text(f"document {index} " * 50)
+
+    ingestor = HotFolderIngestor()
+    started = time.perf_counter()
+    ingestor.poll()
+    discovered = time.perf_counter() - started
+    paths = sorted(ingestor.pending)
+
+    started = time.perf_counter()
+    created = 0
+    while paths:
+        created += ingestor.ingest(paths)
+        paths = [path for path in paths if path in ingestor.pending]
+    ingest_seconds = time.perf_counter() - started
+
+    # Files that are not ingested (temporary uploads) stay in place; the idle poll must not list them.
+    idle = watched / "dept-0"
+    for index in range(args.idle_files):
+        (idle / f"upload-{index}.part").touch()
+    ingestor.poll()
+    time.sleep(2.1)
+    ingestor.poll()
+    started = time.perf_counter()
+    for _ in range(10):
+        ingestor.poll()
+    idle_poll = (time.perf_counter() - started) / 10
+
+    print(f"discovery poll       {discovered * 1000:8.1f} ms for {args.files} files")
+    print(f"ingest               {ingest_seconds:8.2f} s  ({created / ingest_seconds * 3600:,.0f} files/hour)")
+    print(f"idle poll            {idle_poll * 1000:8.2f} ms ({args.directories + 1} directories, {args.idle_files} idle files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Seed a large database and time the listing endpoints with and without the hot-query indexes.
+
+    cd backend && python bench/listing_queries.py --jobs 100000 --repeat 20
+
+The database is created in a temporary directory. Each endpoint is timed
+through the Flask test client with the migration indexes in place, then again
+after dropping them (the state of databases created before the migration).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def seed(engine, jobs: int, documents: int, folders: int) -> None:
+    from sqlalchemy import insert
+
+    from app.models import Folder, OCRJob, WordDocument
+
+    rng = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    statuses = ["completed"] * 90 + ["failed"] * 6 + ["queued"] * 3 + ["processing"]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Folder),
+            [
+                {
+                    "name": f"Folder {index}",
+                    "color": "green",
+                    "parent_id": None if index < 10 else rng.randint(1, 10),
+                    "created_at": start,
+                    "updated_at": start,
+                }
+                for index in range(folders)
+            ],
+        )
+        batch = []
+        for index in range(jobs):
+            created = start + timedelta(seconds=index * 300)
+            batch.append(
+                {
+                    "original_filename": f"scan-{index}.pdf",
+                    "stored_filename": f"{index}.pdf",
+                    "engine": rng.choice(["docling", "ocrmypdf"]),
+                    "auto_detect": True,
+                    "folder_id": rng.randint(1, folders) if rng.random() < 0.7 else None,
+                    "status": rng.choice(statuses),
+                    "progress": 100,
+                    "output_filename": f"{index}_docling.md",
+                    "output_mime_type": "text/markdown",
+                    "text_excerpt": "Lorem ipsum dolor sit amet. " * 40,
+                    "attempts": 1,
+                    "created_at": created,
+                    "updated_at": created,
+                }
+            )
+            if len(batch) == 5000:
+                connection.execute(insert(OCRJob), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(OCRJob), batch)
+        connection.execute(
+            insert(WordDocument),
+            [
+                {
+                    "title": f"Document {index}",
+                    "source": "converted",
+                    "file_name": f"{index}.docx",
+                    "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    "folder_id": rng.randint(1, folders) if rng.random() < 0.7 else None,
+                    "job_id": rng.randint(1, jobs),
+                    "created_at": start + timedelta(seconds=index * 900),
+                    "updated_at": start + timedelta(seconds=index * 900),
+                }
+                for index in range(documents)
+            ],
+        )
+
+
+def time_endpoint(client, url: str, repeat: int, headers: dict | None = None) -> tuple[float, float, int]:
+    timings = []
+    status = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        timings.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+    ordered = sorted(timings)
+    return statistics.median(ordered), ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--documents", type=int, default=20_000)
+    parser.add_argument("--folders", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--full-listing", action="store_true", help="Also time the unpaginated legacy listing")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="listing-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory}/bench.db"
+    os.environ["DATA_DIR"] = str(Path(directory) / "data")
+    os.environ["QUEUE_EMBEDDED_WORKER"] = "false"
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from sqlalchemy import text
+
+    from app.database import engine, init_db
+    from app.migrations import HOT_QUERY_INDEXES
+
+    init_db()
+    started = time.perf_counter()
+    seed(engine, args.jobs, args.documents, args.folders)
+    print(f"Seeded {args.jobs} jobs and {args.documents} documents in {time.perf_counter() - started:.1f}s")
+
+    from app.config import get_settings
+    from app.main import app
+
+    client = app.test_client()
+    prefix = get_settings().api_prefix
+    etag = client.get(f"{prefix}/ocr/jobs?limit=50").headers.get("ETag", "")
+    first_page = client.get(f"{prefix}/ocr/jobs?limit=50").get_json()
+    cursor = first_page["next_cursor"] if first_page else ""
+    endpoints = [
+        ("jobs page 1", f"{prefix}/ocr/jobs?limit=50", None),
+        ("jobs page 2", f"{prefix}/ocr/jobs?limit=50&cursor={cursor}", None),
+        ("jobs status=failed", f"{prefix}/ocr/jobs?limit=50&status=failed", None),
+        ("jobs folder_id=7", f"{prefix}/ocr/jobs?limit=50&folder_id=7", None),
+        ("jobs 304", f"{prefix}/ocr/jobs?limit=50", {"If-None-Match": etag}),
+        ("word docs page 1", f"{prefix}/word/documents?limit=50", None),
+        ("word docs folder_id=7", f"{prefix}/word/documents?limit=50&folder_id=7", None),
+        ("folders", f"{prefix}/folders", None),
+        ("folder 7 documents", f"{prefix}/folders/7/documents", None),
+    ]
+    if args.full_listing:
+        endpoints.append(("jobs full listing", f"{prefix}/ocr/jobs", None))
+
+    results: dict[str, dict[str, tuple[float, float, int]]] = {}
+    for label in ("indexed", "no indexes"):
+        if label == "no indexes":
+            with engine.begin() as connection:
+                for name, _table, _columns in HOT_QUERY_INDEXES:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for name, url, headers in endpoints:
+            results.setdefault(name, {})[label] = time_endpoint(client, url, args.repeat, headers)
+
+    print(f"{'endpoint':<24} {'indexed p50':>12} {'p95':>8} {'no idx p50':>11} {'p95':>8}  status")
+    for name, row in results.items():
+        indexed, plain = row["indexed"], row["no indexes"]
+        print(f"{name:<24} {indexed[0]:>10.1f}ms {indexed[1]:>6.1f}ms {plain[0]:>9.1f}ms {plain[1]:>6.1f}ms  {indexed[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Local stand-in for the Mistral chat completions API.
+
+Point the backend at it with ``MISTRAL_SERVER_URL=http://127.0.0.1:8089`` (any
+``MISTRAL_API_KEY`` works) to exercise the summary stage without network access:
+
+    python bench/mistral_stub.py --latency 2 --failure-rate 0.2 --rate-limit 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    def __init__(self, latency: float, failure_rate: float, rate_limit: int) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.calls: deque[float] = deque()
+        self.served = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def admit(self) -> bool:
+        """Return False when the per-minute limit is exceeded (HTTP 429)."""
+        now = time.monotonic()
+        with self.lock:
+            while self.calls and now - self.calls[0] > 60:
+                self.calls.popleft()
+            if self.rate_limit and len(self.calls) >= self.rate_limit:
+                return False
+            self.calls.append(now)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def finish(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self.served += 1
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            with state.lock:
+                stats = {"served": state.served, "in_flight": state.in_flight, "peak_in_flight": state.peak_in_flight}
+            self._send(200, stats)
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"message": "not found"})
+                return
+            if not state.admit():
+                self._send(429, {"message": "rate limit exceeded"})
+                return
+            try:
+                time.sleep(state.latency)
+                if random.random() < state.failure_rate:
+                    self._send(503, {"message": "stub failure"})
+                    return
+                prompt = payload.get("messages", [{}])[-1].get("content", "")
+                self._send(
+                    200,
+                    {
+                        "id": f"stub-{time.time_ns()}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": payload.get("model", "stub"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "finish_reason": "stop",
+                                "message": {"role": "assistant", "content": f"Rezumat stub ({len(prompt)} caractere)."},
+                            }
+                        ],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 8, "total_tokens": len(prompt) // 4 + 8},
+                    },
+                )
+            finally:
+                state.finish()
+
+        def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds per completion")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Calls per minute before 429 (0 = unlimited)")
+    args = parser.parse_args()
+
+    state = StubState(args.latency, args.failure_rate, args.rate_limit)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Mistral stub listening on http://{args.host}:{args.port} (GET / for counters)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Local stand-in for an S3-compatible object store (MinIO-style, path addressing).
+
+Point the backend at it to run workers against the S3 file store without a
+real bucket (any credentials work, signatures are not checked):
+
+    python bench/s3_stub.py --root /tmp/s3 --port 9009
+    STORAGE_BACKEND=s3 STORAGE_S3_BUCKET=ocr STORAGE_S3_ENDPOINT_URL=http://127.0.0.1:9009 \\
+        STORAGE_S3_ACCESS_KEY_ID=stub STORAGE_S3_SECRET_ACCESS_KEY=stub STORAGE_S3_REGION=us-east-1 ...
+
+Objects are files under ``--root/<bucket>/``. Single PUTs, multipart uploads,
+ranged GETs, HEAD and DELETE are supported, which is what boto3 transfers and
+presigned downloads use; request counts are printed on exit.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+CHUNK = 1024 * 1024
+
+
+class StubState:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.uploads = root / ".multipart"
+        self.uploads.mkdir(parents=True, exist_ok=True)
+        self.counts: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, operation: str) -> None:
+        with self.lock:
+            self.counts[operation] += 1
+
+
+def _etag(path: Path) -> str:
+    digest = hashlib.md5()
+    with path.open("rb") as handle:
+        while chunk := handle.read(CHUNK):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()}"'
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+            pass
+
+        def _target(self) -> tuple[str, str, dict[str, list[str]]]:
+            parts = urlsplit(self.path)
+            bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+            return bucket, key, parse_qs(parts.query, keep_blank_values=True)
+
+        def _object_path(self, bucket: str, key: str) -> Path:
+            path = (state.root / bucket / key).resolve()
+            if state.root.resolve() not in path.parents:
+                raise PermissionError(key)
+            return path
+
+        def _reply(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body and self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _error(self, status: int, code: str) -> None:
+            body = f"<?xml version='1.0' encoding='UTF-8'?><Error><Code>{code}</Code></Error>".encode()
+            self._reply(status, body, {"Content-Type": "application/xml"})
+
+        def _read_body(self, target: Path) -> None:
+            """Stream the request body to ``target``, decoding aws-chunked uploads."""
+            length = int(self.headers.get("Content-Length", 0))
+            chunked = "aws-chunked" in self.headers.get("Content-Encoding", "") or self.headers.get(
+                "x-amz-content-sha256", ""
+            ).startswith("STREAMING-")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with target.open("wb") as handle:
+                if not chunked:
+                    remaining = length
+                    while remaining:
+                        chunk = self.rfile.read(min(CHUNK, remaining))
+                        if not chunk:
+                            break
+                        handle.write(chunk)
+                        remaining -= len(chunk)
+                    return
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        # Trailing checksum headers end with a blank line.
+                        while self.rfile.readline().strip():
+                            pass
+                        return
+                    handle.write(self.rfile.read(size))
+                    self.rfile.readline()
+
+        def do_PUT(self) -> None:
+            bucket, key, query = self._target()
+            if not key:
+                (state.root / bucket).mkdir(parents=True, exist_ok=True)
+                state.count("create_bucket")
+                return self._reply(200)
+            if "uploadId" in query:
+                upload = state.uploads / query["uploadId"][0]
+                if not upload.is_dir():
+                    return self._error(404, "NoSuchUpload")
+                part = upload / f"{int(query['partNumber'][0]):05d}"
+                self._read_body(part)
+                state.count("upload_part")
+                return self._reply(200, headers={"ETag": _etag(part)})
+            path = self._object_path(bucket, key)
+            temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+            self._read_body(temporary)
+            os.replace(temporary, path)
+            state.count("put_object")
+            self._reply(200, headers={"ETag": _etag(path)})
+
+        def do_POST(self) -> None:
+            bucket, key, query = self._target()
+            if "uploads" in query:
+                upload_id = uuid.uuid4().hex
+                (state.uploads / upload_id).mkdir()
+                state.count("create_multipart_upload")
+                body = (
+                    "<?xml version='1.0' encoding='UTF-8'?><InitiateMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                    "</InitiateMultipartUploadResult>"
+                ).encode()
+                return self._reply(200, body, {"Content-Type": "application/xml"})
+            if "uploadId" in query:
+                upload = state.uploads / query["uploadId"][0]
+                listing = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                if not upload.is_dir():
+                    return self._error(404, "NoSuchUpload")
+                numbers = [int(number) for number in re.findall(r"<PartNumber>(\d+)</PartNumber>", listing)]
+                path = self._object_path(bucket, key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+                with temporary.open("wb") as target:
+                    for number in numbers:
+                        with (upload / f"{number:05d}").open("rb") as source:
+                            shutil.copyfileobj(source, target, CHUNK)
+                os.replace(temporary, path)
+                shutil.rmtree(upload, ignore_errors=True)
+                state.count("complete_multipart_upload")
+                body = (
+                    "<?xml version='1.0' encoding='UTF-8'?><CompleteMultipartUploadResult>"
+                    f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>{_etag(path)}</ETag>"
+                    "</CompleteMultipartUploadResult>"
+                ).encode()
+                return self._reply(200, body, {"Content-Type": "application/xml"})
+            self._error(400, "InvalidRequest")
+
+        def do_HEAD(self) -> None:
+            self.do_GET()
+
+        def do_GET(self) -> None:
+            bucket, key, query = self._target()
+            if not key:
+                state.count("head_bucket")
+                return self._reply(200) if (state.root / bucket).is_dir() else self._error(404, "NoSuchBucket")
+            path = self._object_path(bucket, key)
+            if not path.is_file():
+                return self._error(404, "NoSuchKey")
+            size = path.stat().st_size
+            headers = {
+                "ETag": _etag(path),
+                "Last-Modified": formatdate(path.stat().st_mtime, usegmt=True),
+                "Accept-Ranges": "bytes",
+                "Content-Type": query.get("response-content-type", ["application/octet-stream"])[0],
+            }
+            if "response-content-disposition" in query:
+                headers["Content-Disposition"] = query["response-content-disposition"][0]
+            start, end, status = 0, size - 1, 200
+            match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+            if match and size:
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                else:
+                    start = max(size - int(match.group(2)), 0)
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            state.count(("ranged_" if status == 206 else "") + self.command.lower() + "_object")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(max(end - start + 1, 0)))
+            self.end_headers()
+            if self.command == "HEAD":
+                return
+            with path.open("rb") as handle:
+                handle.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = handle.read(min(CHUNK, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+        def do_DELETE(self) -> None:
+            bucket, key, query = self._target()
+            if "uploadId" in query:
+                shutil.rmtree(state.uploads / query["uploadId"][0], ignore_errors=True)
+                state.count("abort_multipart_upload")
+                return self._reply(204)
+            self._object_path(bucket, key).unlink(missing_ok=True)
+            state.count("delete_object")
+            self._reply(204)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", type=Path, default=Path("data/s3-stub"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9009)
+    parser.add_argument("--bucket", action="append", default=[], help="Create this bucket at start")
+    args = parser.parse_args()
+
+    state = StubState(args.root)
+    for bucket in args.bucket:
+        (args.root / bucket).mkdir(parents=True, exist_ok=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"S3 stand-in on http://{args.host}:{args.port}, objects under {args.root}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for operation, count in sorted(state.counts.items()):
+            print(f"{operation:<28} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Simulate the job queue with a mix of large batches and small interactive jobs.
+
+    cd backend && python bench/scheduler.py --workers 4 --batch-pages 1000
+
+Jobs are claimed through the real ``claim_next_job`` against a temporary
+database; running them is simulated, one time unit per unit of estimated
+cost. The same workload is then replayed in FIFO order and the virtual
+queue waits of both runs are compared per priority class.
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def build_workload(args) -> list[dict]:
+    rng = random.Random(7)
+    jobs = []
+    for batch in range(args.batches):
+        for index in range(args.batch_files):
+            jobs.append({"client": f"bulk-{batch}", "pages": args.batch_pages // args.batch_files, "arrival": index * 0.01})
+    for index in range(args.small_jobs):
+        jobs.append({"client": f"user-{rng.randint(1, 20)}", "pages": rng.randint(1, 3), "arrival": 1 + index * args.small_interval})
+    return sorted(jobs, key=lambda job: job["arrival"])
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+def simulate_fifo(jobs: list[dict], costs: list[float], workers: int) -> list[float]:
+    free_at = [0.0] * workers
+    waits = []
+    for job, cost in zip(jobs, costs):
+        start = max(heapq.heappop(free_at), job["arrival"])
+        heapq.heappush(free_at, start + cost)
+        waits.append(start - job["arrival"])
+    return waits
+
+
+def simulate_scheduler(jobs: list[dict], workers: int) -> tuple[list[float], list[float]]:
+    from sqlalchemy import update
+    from sqlmodel import Session
+
+    from app.database import engine
+    from app.models import OCRJob
+    from app.services.queue import claim_next_job
+    from app.services.scheduler import classify_job, estimate_job_cost, share_key_for
+
+    base = datetime.utcnow()
+    ids = {}
+    with Session(engine) as session:
+        for index, job in enumerate(jobs):
+            row = OCRJob(
+                original_filename=f"{index}.pdf",
+                stored_filename=f"{index}.pdf",
+                engine="docling",
+                page_count=job["pages"],
+                priority_class=classify_job(job["pages"]),
+                cost=estimate_job_cost("docling", job["pages"], None),
+                client_id=job["client"],
+                share_key=share_key_for(job["client"], None),
+                status="pending",
+                queued_at=base + timedelta(seconds=job["arrival"]),
+            )
+            session.add(row)
+            session.flush()
+            ids[row.id] = index
+        session.commit()
+    costs = {job_id: estimate_job_cost("docling", jobs[index]["pages"], None) for job_id, index in ids.items()}
+
+    # Arrivals in virtual time: a job becomes "queued" once the clock passes its arrival.
+    pending = sorted(ids, key=lambda job_id: jobs[ids[job_id]]["arrival"])
+    running: list[tuple[float, int]] = []
+    clock = 0.0
+    waits = [0.0] * len(jobs)
+    while pending or running:
+        arrived = []
+        while pending and jobs[ids[pending[0]]]["arrival"] <= clock:
+            arrived.append(pending.pop(0))
+        if arrived:
+            with engine.begin() as connection:
+                connection.execute(update(OCRJob.__table__).where(OCRJob.__table__.c.id.in_(arrived)).values(status="queued"))
+        while len(running) < workers:
+            job_id = claim_next_job("bench")
+            if job_id is None:
+                break
+            index = ids[job_id]
+            waits[index] = clock - jobs[index]["arrival"]
+            heapq.heappush(running, (clock + costs[job_id], job_id))
+        next_arrival = jobs[ids[pending[0]]]["arrival"] if pending else float("inf")
+        if running and running[0][0] <= next_arrival:
+            clock, finished = heapq.heappop(running)
+            with engine.begin() as connection:
+                connection.execute(
+                    update(OCRJob.__table__).where(OCRJob.__table__.c.id == finished).values(status="completed")
+                )
+        else:
+            clock = next_arrival
+    return waits, [costs[job_id] for job_id in sorted(ids, key=ids.get)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=1)
+    parser.add_argument("--batch-files", type=int, default=40)
+    parser.add_argument("--batch-pages", type=int, default=1000)
+    parser.add_argument("--small-jobs", type=int, default=200)
+    parser.add_argument("--small-interval", type=float, default=5.0, help="Virtual time between small uploads")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="scheduler-bench-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{directory}/bench.db",
+        DATA_DIR=str(Path(directory) / "data"),
+        QUEUE_EMBEDDED_WORKER="false",
+        QUEUE_MAX_CONCURRENCY=str(args.workers),
+        # Virtual time runs far ahead of the wall clock, so keep aging out of the comparison.
+        SCHEDULER_MAX_WAIT_SECONDS=str(10**9),
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.database import init_db
+
+    init_db()
+    jobs = build_workload(args)
+    waits, costs = simulate_scheduler(jobs, args.workers)
+    fifo_waits = simulate_fifo(jobs, costs, args.workers)
+
+    print(f"{len(jobs)} jobs, {args.workers} workers, virtual time units")
+    print(f"{'jobs':<12} {'policy':<10} {'wait p50':>10} {'p95':>10} {'max':>10}")
+    for label, selector in (("small", lambda job: job["pages"] <= 3), ("batch", lambda job: job["pages"] > 3)):
+        for policy, values in (("fifo", fifo_waits), ("scheduler", waits)):
+            picked = [wait for job, wait in zip(jobs, values) if selector(job)]
+            if not picked:
+                continue
+            print(
+                f"{label:<12} {policy:<10} {statistics.median(picked):>10.1f} "
+                f"{percentile(picked, 0.95):>10.1f} {max(picked):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Measure full-text search latency on a large synthetic index.
+
+    cd backend && python bench/search.py --pages 1000000
+
+Pages of Zipf-distributed words are written to ``searchpage`` of a temporary
+database and the FTS5 index is rebuilt once. Queries for rare, medium and
+common words, two-word and phrase queries, and folder/engine filters then
+run through ``search_pages``; each is repeated and its p50 and p95 reported.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def build_vocabulary(size: int) -> list[str]:
+    rng = random.Random(3)
+    letters = "abcdefghijklmnoprstuvăâîșț"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) + str(index) for index in range(size)]
+
+
+def seed(pages: int, pages_per_job: int, words_per_page: int, vocabulary: list[str]) -> None:
+    from sqlalchemy import text
+
+    from app.database import engine
+    from app.services.search import FTS_TABLE, page_tags
+
+    rng = random.Random(11)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    engines = ["docling", "ocrmypdf", "text", "auto"]
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        rows = []
+        for index in range(pages):
+            job_id = index // pages_per_job + 1
+            words = rng.choices(vocabulary, cum_weights=cumulative, k=words_per_page)
+            rows.append(
+                {
+                    "job_id": job_id,
+                    "position": index % pages_per_job,
+                    "page": index % pages_per_job + 1,
+                    "text": " ".join(words),
+                    "tags": page_tags(job_id % 50, engines[job_id % len(engines)]),
+                }
+            )
+            if len(rows) == 10000:
+                connection.execute(
+                    text(
+                        "INSERT INTO searchpage (job_id, position, page, text, tags) "
+                        "VALUES (:job_id, :position, :page, :text, :tags)"
+                    ),
+                    rows,
+                )
+                rows = []
+        if rows:
+            connection.execute(
+                text(
+                    "INSERT INTO searchpage (job_id, position, page, text, tags) "
+                    "VALUES (:job_id, :position, :page, :text, :tags)"
+                ),
+                rows,
+            )
+        connection.execute(
+            text(
+                "INSERT INTO ocrjob (id, original_filename, stored_filename, engine, folder_id, status, created_at, "
+                "updated_at, auto_detect, progress, attempts, priority_class) "
+                "VALUES (:id, :name, :name, :engine, NULL, 'completed', :now, :now, 1, 100, 0, 'bulk')"
+            ),
+            [
+                {"id": job_id, "name": f"{job_id}.pdf", "engine": engines[job_id % len(engines)], "now": now}
+                for job_id in range(1, (pages - 1) // pages_per_job + 2)
+            ],
+        )
+        seeded = time.perf_counter()
+        connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+        connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    print(f"seeded {pages:,} pages in {seeded - started:.0f} s, indexed in {time.perf_counter() - seeded:.0f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200000)
+    parser.add_argument("--pages-per-job", type=int, default=20)
+    parser.add_argument("--words-per-page", type=int, default=250)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database", type=Path, help="Reuse the database of an earlier run instead of seeding")
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="search-bench-"))
+    database = args.database or directory / "bench.db"
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{database}",
+        DATA_DIR=str(directory / "data"),
+        QUEUE_EMBEDDED_WORKER="false",
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+    from sqlmodel import Session
+
+    from app.database import engine, init_db
+    from app.services.search import search_pages
+
+    init_db()
+    vocabulary = build_vocabulary(args.vocabulary)
+    if args.database is None:
+        seed(args.pages, args.pages_per_job, args.words_per_page, vocabulary)
+        print(f"database: {database}")
+
+    queries = [
+        ("rare word", {"query": vocabulary[-1]}),
+        ("medium word", {"query": vocabulary[500]}),
+        ("common word", {"query": vocabulary[5]}),
+        ("two words", {"query": f"{vocabulary[40]} {vocabulary[300]}"}),
+        ("rare + common", {"query": f"{vocabulary[5]} {vocabulary[-1]}"}),
+        ("phrase", {"query": f'"{vocabulary[0]} {vocabulary[1]}"'}),
+        ("common + folder", {"query": vocabulary[5], "folder_id": 7}),
+        ("medium + engine", {"query": vocabulary[500], "engine_name": "docling"}),
+        ("medium, page 5", {"query": vocabulary[500], "offset": 80}),
+    ]
+    print(f"{'query':<18} {'hits':>6} {'ranked':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    with Session(engine) as session:
+        for label, kwargs in queries:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = search_pages(session, **kwargs)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            partial = result["ranking"]
+            print(f"{label:<18} {len(result['items']):>6} {partial:>7} {statistics.median(timings):>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
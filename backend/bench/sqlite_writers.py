@@ -0,0 +1,183 @@
+"""Concurrent-writer benchmark for the SQLite profile used by the backend.
+
+Emulates gunicorn workers x OCR threads that report job progress while other
+requests read the job list, once with the stock engine (``default``) and once
+with the tuned profile from ``app.database.build_engine`` (``tuned``):
+
+    cd backend && python bench/sqlite_writers.py --processes 4 --threads 4 --seconds 10
+
+``--coalesce`` throttles progress writes per job the way
+``JOB_PROGRESS_WRITE_INTERVAL`` does in ``update_job_status``.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _prepare_environment(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("DATA_DIR", str(Path(tempfile.gettempdir()) / "ocr-bench-data"))
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _setup(database_url: str, jobs: int) -> list[int]:
+    _prepare_environment(database_url)
+    from sqlmodel import Session, SQLModel
+
+    from app.database import build_engine
+    from app.models import OCRJob
+
+    engine = build_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        rows = [
+            OCRJob(original_filename=f"bench-{index}.pdf", stored_filename=f"bench-{index}.pdf", engine="docling")
+            for index in range(jobs)
+        ]
+        session.add_all(rows)
+        session.commit()
+        ids = [row.id for row in rows]
+    engine.dispose()
+    return ids
+
+
+def _worker(database_url: str, tuned: bool, job_ids: list[int], seconds: float, tick: float, coalesce: float, results) -> None:
+    _prepare_environment(database_url)
+    from sqlalchemy.exc import OperationalError
+    from sqlmodel import Session, select
+
+    from app.database import build_engine
+    from app.models import OCRJob
+
+    engine = build_engine(database_url, tuned=tuned)
+    deadline = time.monotonic() + seconds
+    stats = {"writes": 0, "skipped": 0, "errors": 0, "reads": 0, "write_latency": [], "read_latency": []}
+    lock = threading.Lock()
+
+    def writer(job_id: int) -> None:
+        last_write = 0.0
+        progress = 0
+        while time.monotonic() < deadline:
+            progress = (progress + 1) % 100
+            now = time.monotonic()
+            if coalesce and now - last_write < coalesce:
+                with lock:
+                    stats["skipped"] += 1
+                time.sleep(tick)
+                continue
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    job = session.get(OCRJob, job_id)
+                    job.status = "processing"
+                    job.progress = progress
+                    session.add(job)
+                    session.commit()
+                with lock:
+                    stats["writes"] += 1
+                    stats["write_latency"].append(time.perf_counter() - started)
+                last_write = now
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+            time.sleep(tick)
+
+    def reader() -> None:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    session.exec(select(OCRJob).order_by(OCRJob.created_at.desc()).limit(50)).all()
+                with lock:
+                    stats["reads"] += 1
+                    stats["read_latency"].append(time.perf_counter() - started)
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=writer, args=(job_id,)) for job_id in job_ids]
+    threads.append(threading.Thread(target=reader))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    results.put(stats)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_profile(profile: str, args: argparse.Namespace) -> dict:
+    directory = tempfile.mkdtemp(prefix="sqlite-bench-")
+    database_url = f"sqlite:///{directory}/bench.db"
+    job_ids = _setup(database_url, args.processes * args.threads)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = []
+    for index in range(args.processes):
+        chunk = job_ids[index * args.threads : (index + 1) * args.threads]
+        process = context.Process(
+            target=_worker,
+            args=(database_url, profile == "tuned", chunk, args.seconds, args.tick_ms / 1000, args.coalesce, results),
+        )
+        process.start()
+        processes.append(process)
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    merged: dict = {"writes": 0, "skipped": 0, "errors": 0, "reads": 0, "write_latency": [], "read_latency": []}
+    for stats in collected:
+        for key, value in stats.items():
+            merged[key] += value
+    return {
+        "profile": profile,
+        "writes_per_s": merged["writes"] / args.seconds,
+        "skipped": merged["skipped"],
+        "errors": merged["errors"],
+        "reads_per_s": merged["reads"] / args.seconds,
+        "write_p50_ms": statistics.median(merged["write_latency"]) * 1000 if merged["write_latency"] else 0.0,
+        "write_p99_ms": _percentile(merged["write_latency"], 0.99) * 1000,
+        "read_p99_ms": _percentile(merged["read_latency"], 0.99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4, help="Simulated gunicorn/worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="Writer threads (running jobs) per process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick-ms", type=float, default=20.0, help="Delay between progress updates of one job")
+    parser.add_argument("--coalesce", type=float, default=0.0, help="Minimum seconds between writes per job")
+    parser.add_argument("--profile", choices=["default", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    profiles = ["default", "tuned"] if args.profile == "both" else [args.profile]
+    print(f"{'profile':<8} {'writes/s':>9} {'skipped':>8} {'errors':>7} {'reads/s':>8} {'w p50 ms':>9} {'w p99 ms':>9} {'r p99 ms':>9}")
+    for profile in profiles:
+        row = run_profile(profile, args)
+        print(
+            f"{row['profile']:<8} {row['writes_per_s']:>9.1f} {row['skipped']:>8} {row['errors']:>7} "
+            f"{row['reads_per_s']:>8.1f} {row['write_p50_ms']:>9.1f} {row['write_p99_ms']:>9.1f} {row['read_p99_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure how long the web app takes to import and how much memory it holds afterwards.
+
+    cd backend && python bench/startup.py --runs 5
+
+Each run starts a fresh interpreter that imports ``app.main`` (which builds the
+Flask app) and then requests ``/health``. The script exits with status 1 when
+an OCR engine or LLM client module was imported along the way, so it can
+guard against regressions in CI; ``--max-seconds`` and ``--max-rss-mb`` add
+budgets on top.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that belong to the worker path and must not load in the web tier.
+HEAVY_MODULES = ["ocrmypdf", "docling", "torch", "pikepdf", "mistralai", "httpx"]
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app.main import app
+from app.config import get_settings
+imported = time.perf_counter() - started
+response = app.test_client().get(get_settings().api_prefix + "/health")
+first_request = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_s": imported,
+    "first_request_s": first_request,
+    "status": response.status_code,
+    "max_rss_mb": rss_kb / 1024,
+    "loaded": sorted({name.split(".")[0] for name in sys.modules} & set(%r)),
+}))
+"""
+
+
+def run_once(env: dict[str, str]) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail when the median import time exceeds this")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="Fail when the peak RSS exceeds this")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="startup-bench-")
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=f"sqlite:///{directory}/bench.db",
+        DATA_DIR=str(Path(directory) / "data"),
+        QUEUE_EMBEDDED_WORKER="false",
+    )
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    import_s = statistics.median(run["import_s"] for run in runs)
+    first_request_s = statistics.median(run["first_request_s"] for run in runs)
+    rss_mb = max(run["max_rss_mb"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"import app.main      {import_s * 1000:8.1f} ms (median of {args.runs})")
+    print(f"first /health        {first_request_s * 1000:8.1f} ms (status {runs[-1]['status']})")
+    print(f"peak RSS             {rss_mb:8.1f} MB")
+    print(f"heavy modules loaded {', '.join(loaded) or 'none'}")
+
+    failed = bool(loaded)
+    if args.max_seconds is not None and import_s > args.max_seconds:
+        print(f"Import time exceeds the {args.max_seconds}s budget")
+        failed = True
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        print(f"Peak RSS exceeds the {args.max_rss_mb} MB budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
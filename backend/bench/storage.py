@@ -0,0 +1,136 @@
+"""Measure storage manager passes against a large file accounting table.
+
+    cd backend && python bench/storage.py --files 500000
+
+``storedfile`` rows are seeded for uploads, outputs, page stores and download
+variants with spread-out last uses and expiries (the files themselves are
+not written, so passes measure the database side). The query plans of the
+three cleanup passes are printed, then passes run until one finds nothing
+to do and their latency is reported.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def seed(files: int, expired_share: float) -> None:
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    kinds = ["upload", "result", "text", "derived"]
+    rows = []
+    with engine.begin() as connection:
+        for index in range(files):
+            kind = kinds[index % len(kinds)]
+            used_at = now - timedelta(days=rng.uniform(0, 120))
+            expires_at = None
+            if kind in ("upload", "result") and rng.random() < expired_share:
+                expires_at = now - timedelta(hours=rng.uniform(0, 48))
+            elif kind == "result":
+                expires_at = now + timedelta(days=rng.uniform(1, 90))
+            rows.append(
+                {
+                    "path": f"{kind}/{index}.md",
+                    "kind": kind,
+                    "job_id": index // len(kinds) + 1,
+                    "size_bytes": rng.randint(1000, 2_000_000),
+                    "codec": None if kind != "result" or index % 3 else "native",
+                    "last_used_at": used_at,
+                    "expires_at": expires_at,
+                    "now": now,
+                }
+            )
+            if len(rows) == 10000 or index == files - 1:
+                connection.execute(
+                    text(
+                        "INSERT INTO storedfile (path, kind, job_id, size_bytes, codec, last_used_at, expires_at, "
+                        "created_at, updated_at) VALUES (:path, :kind, :job_id, :size_bytes, :codec, :last_used_at, "
+                        ":expires_at, :now, :now)"
+                    ),
+                    rows,
+                )
+                rows = []
+        connection.execute(
+            text("INSERT INTO setting (key, value) VALUES ('storage_backfill_job_id', 'done'), "
+                 "('storage_backfill_document_id', 'done')")
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500000)
+    parser.add_argument("--expired-share", type=float, default=0.02)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--derived-max-mb", type=int, default=100000)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="storage-bench-"))
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{directory}/bench.db",
+        DATA_DIR=str(directory / "data"),
+        QUEUE_EMBEDDED_WORKER="false",
+        STORAGE_CLEANUP_BATCH_SIZE=str(args.batch_size),
+        STORAGE_DERIVED_MAX_BYTES=str(args.derived_max_mb * 1024 * 1024),
+        STORAGE_COLD_AFTER_DAYS="30",
+    )
+    sys.path.insert(0, str(BACKEND_DIR))
+    from sqlalchemy import text
+    from sqlmodel import Session
+
+    from app.database import engine, init_db
+    from app.services.storage import StorageManager, storage_usage
+
+    init_db()
+    started = time.perf_counter()
+    seed(args.files, args.expired_share)
+    print(f"seeded {args.files:,} files in {time.perf_counter() - started:.0f} s")
+
+    cutoff = datetime.utcnow() - timedelta(days=30)
+    plans = {
+        "expired": ("SELECT path FROM storedfile WHERE expires_at <= :now ORDER BY expires_at LIMIT 200", {"now": datetime.utcnow()}),
+        "cold": (
+            "SELECT path FROM storedfile WHERE kind = 'result' AND codec IS NULL AND last_used_at < :cutoff "
+            "ORDER BY last_used_at LIMIT 200",
+            {"cutoff": cutoff},
+        ),
+        "derived": ("SELECT path FROM storedfile WHERE kind = 'derived' ORDER BY last_used_at LIMIT 200", {}),
+    }
+    with engine.connect() as connection:
+        for label, (statement, params) in plans.items():
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {statement}"), params).all()
+            print(f"{label:<8} {' / '.join(row[-1] for row in plan)}")
+
+    manager = StorageManager()
+    timings = []
+    handled = 0
+    while True:
+        started = time.perf_counter()
+        done = manager.run_once()
+        timings.append((time.perf_counter() - started) * 1000)
+        handled += done
+        if done == 0:
+            break
+    timings.sort()
+    p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+    print(f"{len(timings)} passes handled {handled:,} files: p50 {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms")
+    started = time.perf_counter()
+    with Session(engine) as session:
+        usage = storage_usage(session)
+    print(f"usage query {(time.perf_counter() - started) * 1000:.1f} ms: {usage['kinds']}")
+
+
+if __name__ == "__main__":
+    main()
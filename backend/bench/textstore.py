@@ -0,0 +1,75 @@
+"""Measure the page store: size on disk, excerpt latency and random page reads.
+
+    cd backend && python bench/textstore.py --jobs 500 --pages 100
+
+Synthetic page texts are written once as markdown outputs and once as page
+stores. A listing excerpt is then taken from each (the first 2000 characters
+of the markdown file against the lazily decompressed first entries of the
+store), and single pages are read from the middle of each document.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--words-per-page", type=int, default=300)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="textstore-bench-"))
+    os.environ.update(DATA_DIR=str(directory), DATABASE_URL=f"sqlite:///{directory}/bench.db")
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.services.textstore import _cached_excerpt, join_pages, open_page_store, store_path, write_page_store
+
+    rng = random.Random(5)
+    words = [f"cuvânt{index}" for index in range(5000)] + ["contract", "hotărâre", "articolul", "lei"] * 200
+    results = directory / "results"
+    results.mkdir()
+    raw_bytes = 0
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        pages = [(page + 1, " ".join(rng.choices(words, k=args.words_per_page))) for page in range(args.pages)]
+        markdown = join_pages(pages)
+        (results / f"{job}.md").write_text(markdown, encoding="utf-8")
+        raw_bytes += len(markdown.encode("utf-8"))
+        write_page_store(store_path(f"{job}.md"), pages)
+    written = time.perf_counter() - started
+    store_bytes = sum(store_path(f"{job}.md").stat().st_size for job in range(args.jobs))
+
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        (results / f"{job}.md").read_text(encoding="utf-8")[:2000]
+    markdown_excerpt = (time.perf_counter() - started) / args.jobs
+
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        _cached_excerpt.__wrapped__(f"{job}.md", 0, 300)
+    store_excerpt = (time.perf_counter() - started) / args.jobs
+
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        with open_page_store(f"{job}.md") as store:
+            store[len(store) // 2]
+    page_read = (time.perf_counter() - started) / args.jobs
+
+    print(f"{args.jobs} jobs x {args.pages} pages, stores written in {written:.1f} s")
+    print(f"markdown on disk     {raw_bytes / 1e6:8.1f} MB")
+    print(f"page stores on disk  {store_bytes / 1e6:8.1f} MB ({store_bytes / raw_bytes:.0%})")
+    print(f"excerpt, markdown    {markdown_excerpt * 1000:8.3f} ms/job (reads the whole file)")
+    print(f"excerpt, page store  {store_excerpt * 1000:8.3f} ms/job (first entry only)")
+    print(f"one page from store  {page_read * 1000:8.3f} ms/job")
+
+
+if __name__ == "__main__":
+    main()
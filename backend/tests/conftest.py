@@ -0,0 +1,101 @@
+"""Shared fixtures: every test session runs against a throwaway data directory and SQLite file.
+
+The settings and the database engine are created at import time, so the
+environment is set before anything from ``app`` is imported.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+_root = Path(tempfile.mkdtemp(prefix="ocr-tests-"))
+os.environ.update(
+    DATA_DIR=str(_root / "data"),
+    DATABASE_URL=f"sqlite:///{_root / 'app.db'}",
+    STORAGE_BACKEND="local",
+)
+
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app as flask_app  # noqa: E402
+from app.models import OCRJob  # noqa: E402
+from app.services import filestore  # noqa: E402
+from app.services.search import FTS_TABLE, search_available  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    yield
+    with engine.begin() as connection:
+        if search_available():
+            # The FTS index is not on the metadata; its rows point at the deleted pages.
+            connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('delete-all')"))
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def settings():
+    return get_settings()
+
+
+@pytest.fixture
+def client():
+    return flask_app.test_client()
+
+
+@pytest.fixture
+def make_job():
+    def make(**values) -> int:
+        values.setdefault("original_filename", "scan.pdf")
+        values.setdefault("stored_filename", f"{datetime.utcnow().timestamp()}_scan.pdf")
+        values.setdefault("engine", "text")
+        with Session(engine) as session:
+            job = OCRJob(**values)
+            session.add(job)
+            session.commit()
+            return job.id
+
+    return make
+
+
+@pytest.fixture
+def s3_bucket(settings, monkeypatch, tmp_path):
+    """Switch the file store to a bucket on bench/s3_stub.py; returns the bucket directory."""
+    pytest.importorskip("boto3")
+    from http.server import ThreadingHTTPServer
+
+    from bench.s3_stub import StubState, make_handler
+
+    state = StubState(tmp_path / "s3")
+    bucket = tmp_path / "s3" / "ocr"
+    bucket.mkdir()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for name, value in {
+        "storage_backend": "s3",
+        "storage_s3_bucket": "ocr",
+        "storage_s3_endpoint_url": f"http://127.0.0.1:{server.server_address[1]}",
+        "storage_s3_region": "us-east-1",
+        "storage_s3_access_key_id": "test",
+        "storage_s3_secret_access_key": "test",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    filestore.get_file_store.cache_clear()
+    yield bucket
+    filestore.drain_copy_reads()
+    filestore.get_file_store.cache_clear()
+    server.shutdown()
+    server.server_close()
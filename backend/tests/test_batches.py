@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import io
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import OCRBatch, OCRJob, ResultCacheEntry
+from app.services import batches
+from app.services.batches import BatchError, create_batch
+from app.services.ocr import JobParams, result_cache_key
+
+
+def _source(name: str, content: bytes):
+    def store(destination: Path):
+        destination.write_bytes(content)
+        return f"hash-{name}", len(content), None
+
+    return name, store
+
+
+def _failing(destination: Path):
+    raise OSError("disk full")
+
+
+def _database_is_writable(settings) -> bool:
+    connection = sqlite3.connect(settings.database_url.removeprefix("sqlite:///"), timeout=0.1)
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.rollback()
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+def test_batch_is_added_in_one_transaction(settings):
+    sources = [_source(f"{index}.txt", f"fișier {index}".encode()) for index in range(3)]
+    with Session(engine) as session:
+        batch = create_batch(session, JobParams(engine="text"), sources)
+        jobs = session.exec(select(OCRJob).where(OCRJob.batch_id == batch.id)).all()
+    assert batch.total_jobs == 3
+    assert [job.original_filename for job in jobs] == ["0.txt", "1.txt", "2.txt"]
+    assert all((settings.data_dir / "uploads" / job.stored_filename).exists() for job in jobs)
+
+
+def test_failed_source_leaves_nothing_behind(settings):
+    uploads = settings.data_dir / "uploads"
+    before = set(uploads.iterdir())
+    sources = [_source("a.txt", b"a"), _source("b.txt", b"b"), ("c.txt", _failing)]
+    with Session(engine) as session, pytest.raises(OSError):
+        create_batch(session, JobParams(engine="text"), sources)
+    with Session(engine) as session:
+        assert session.exec(select(OCRBatch)).all() == []
+        assert session.exec(select(OCRJob)).all() == []
+    assert set(uploads.iterdir()) == before
+
+
+def test_empty_batch_is_refused():
+    with Session(engine) as session, pytest.raises(BatchError):
+        create_batch(session, JobParams(engine="text"), [])
+
+
+def test_uploads_are_published_without_the_write_lock(settings, monkeypatch, s3_bucket):
+    writable = []
+    publish_path = batches.publish_path
+
+    def publish(path: Path) -> None:
+        writable.append(_database_is_writable(settings))
+        publish_path(path)
+
+    monkeypatch.setattr(batches, "publish_path", publish)
+    sources = [_source(f"{index}.txt", b"x" * 10) for index in range(3)]
+    with Session(engine) as session:
+        batch = create_batch(session, JobParams(engine="text"), sources)
+        jobs = session.exec(select(OCRJob).where(OCRJob.batch_id == batch.id)).all()
+
+    assert writable == [True, True, True]
+    for job in jobs:
+        assert (s3_bucket / "uploads" / job.stored_filename).exists()
+        assert not (settings.data_dir / "uploads" / job.stored_filename).exists()
+
+
+def test_rollback_deletes_published_objects(monkeypatch, s3_bucket):
+    def fail(*args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(batches, "build_job", fail)
+    sources = [_source(f"{index}.txt", b"x" * 10) for index in range(3)]
+    with Session(engine) as session, pytest.raises(RuntimeError):
+        create_batch(session, JobParams(engine="text"), sources)
+    # The uploads were in the bucket before the jobs failed.
+    assert (s3_bucket / "uploads").is_dir()
+    assert list((s3_bucket / "uploads").iterdir()) == []
+
+
+def _cache_entry(settings, content_hash: str, output: str, write_output: bool) -> str:
+    key = result_cache_key(content_hash, "text", {}, None, True)
+    if write_output:
+        (settings.data_dir / "results" / output).write_text("rezultat", encoding="utf-8")
+    with Session(engine) as session:
+        session.add(
+            ResultCacheEntry(
+                key=key,
+                content_hash=content_hash,
+                engine="text",
+                output_filename=output,
+                output_mime_type="text/markdown",
+                ref_count=1,
+            )
+        )
+        session.commit()
+    return key
+
+
+def test_cached_job_drops_its_upload_after_the_commit(settings):
+    _cache_entry(settings, "hash-a.txt", "cached_text.md", write_output=True)
+    with Session(engine) as session:
+        batch = create_batch(session, JobParams(engine="text"), [_source("a.txt", b"a"), _source("b.txt", b"b")])
+        jobs = session.exec(select(OCRJob).where(OCRJob.batch_id == batch.id).order_by(OCRJob.id)).all()
+
+    assert [job.status for job in jobs] == ["completed", "queued"]
+    assert jobs[0].output_filename == "cached_text.md"
+    assert not (settings.data_dir / "uploads" / jobs[0].stored_filename).exists()
+    assert (settings.data_dir / "uploads" / jobs[1].stored_filename).exists()
+
+
+def test_stale_cache_entry_does_not_commit_a_partial_batch(settings, monkeypatch):
+    key = _cache_entry(settings, "hash-a.txt", "missing_text.md", write_output=False)
+    uploads = settings.data_dir / "uploads"
+    before = set(uploads.iterdir())
+    build_job = batches.build_job
+    calls = []
+
+    def build_then_fail(*args, **kwargs):
+        calls.append(args[2])
+        if len(calls) == 2:
+            raise RuntimeError("insert failed")
+        return build_job(*args, **kwargs)
+
+    monkeypatch.setattr(batches, "build_job", build_then_fail)
+    with Session(engine) as session, pytest.raises(RuntimeError):
+        create_batch(session, JobParams(engine="text"), [_source("a.txt", b"a"), _source("b.txt", b"b")])
+
+    with Session(engine) as session:
+        assert session.exec(select(OCRBatch)).all() == []
+        assert session.exec(select(OCRJob)).all() == []
+        # Dropping the stale entry was part of the rolled back transaction.
+        assert session.get(ResultCacheEntry, key) is not None
+    assert set(uploads.iterdir()) == before
+
+
+def _zip(members: dict[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, content in members.items():
+            bundle.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _post_batch(client, **files):
+    return client.post(
+        "/api/ocr/batches",
+        data={"engine_override": "text", **files},
+        content_type="multipart/form-data",
+    )
+
+
+def test_files_and_archive_members_become_one_batch(client):
+    archive = _zip({"acte/a.txt": b"a", "__MACOSX/acte/._a.txt": b"x", "acte/.DS_Store": b"x", "acte/b.txt": b"b"})
+
+    response = _post_batch(client, files=[(io.BytesIO(b"c"), "c.txt")], archive=(archive, "acte.zip"))
+
+    assert response.status_code == 201
+    batch = response.get_json()
+    assert (batch["total_jobs"], batch["jobs"], batch["queued"], batch["status"]) == (3, 3, 3, "queued")
+    jobs = client.get(batch["jobs_url"]).get_json()
+    assert sorted(job["original_filename"] for job in jobs) == ["a.txt", "b.txt", "c.txt"]
+    assert client.get(f"/api/ocr/batches/{batch['id']}").get_json()["total_jobs"] == 3
+
+
+def test_batch_limits_are_enforced(client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_files", 2)
+    archive = _zip({f"{index}.txt": b"x" for index in range(3)})
+    assert _post_batch(client, archive=(archive, "many.zip")).status_code == 400
+
+    files = [(io.BytesIO(b"x"), f"{index}.txt") for index in range(3)]
+    assert _post_batch(client, files=files).status_code == 400
+
+    assert _post_batch(client, archive=(io.BytesIO(b"not a zip"), "broken.zip")).status_code == 400
+
+    monkeypatch.setattr(settings, "batch_max_bytes", 10)
+    files = [(io.BytesIO(b"x" * 6), f"{index}.txt") for index in range(2)]
+    assert _post_batch(client, files=files).status_code == 413
+    with Session(engine) as session:
+        assert session.exec(select(OCRJob)).all() == []
+
+
+def test_unknown_batch_is_not_found(client):
+    assert client.get("/api/ocr/batches/999").status_code == 404
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import StoredFile
+from app.services import engines, ocr
+from app.services.conversions import conversions_dir, convert_to_markdown, get_cached_markdown
+from app.services.engines import DoclingEngine, EngineRequest
+from app.services.storage import backfill, evict_conversions
+
+
+class FakeConverter:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def convert(self, path: str):
+        self.calls.append(path)
+        markdown = f"# {Path(path).name}"
+        return SimpleNamespace(document=SimpleNamespace(export_to_markdown=lambda: markdown))
+
+
+@pytest.fixture
+def converter(monkeypatch):
+    fake = FakeConverter()
+    monkeypatch.setattr(ocr, "_converter", fake)
+    yield fake
+    for path in conversions_dir().iterdir():
+        path.unlink()
+
+
+def _conversions() -> list[StoredFile]:
+    with Session(engine) as session:
+        return session.exec(select(StoredFile).where(StoredFile.kind == "conversion")).all()
+
+
+def test_conversion_is_cached_and_tracked(converter, tmp_path):
+    source = tmp_path / "scan.pdf"
+    source.write_bytes(b"%PDF-1.4 scan")
+
+    assert convert_to_markdown(source, "abc") == "# scan.pdf"
+    assert convert_to_markdown(source, "abc") == "# scan.pdf"
+
+    assert len(converter.calls) == 1
+    assert [path.name for path in conversions_dir().iterdir()] == ["abc.md"]
+    [row] = _conversions()
+    assert row.path == "cache/conversions/abc.md"
+    assert row.size_bytes == len("# scan.pdf")
+
+
+def test_temporary_inputs_are_not_cached(converter, tmp_path):
+    source = tmp_path / "pages.pdf"
+    source.write_bytes(b"%PDF-1.4 pages")
+
+    convert_to_markdown(source, cache=False)
+    convert_to_markdown(source, cache=False)
+
+    assert len(converter.calls) == 2
+    assert not list(conversions_dir().iterdir())
+    assert not _conversions()
+
+
+def test_docling_page_range_skips_the_cache(converter, monkeypatch, tmp_path):
+    def fake_extract(input_path, first, last, destination):
+        destination.write_bytes(b"%PDF-1.4 chunk")
+        return destination
+
+    monkeypatch.setattr(engines, "extract_pages", fake_extract)
+    source = tmp_path / "scan.pdf"
+    source.write_bytes(b"%PDF-1.4 scan")
+    request = EngineRequest(job_id=1, input_path=source, results_dir=tmp_path, options={}, content_hash="abc")
+
+    result = DoclingEngine().run(request, pages=(0, 9))
+
+    assert result.text == "# pages.pdf"
+    assert not list(conversions_dir().iterdir())
+    assert not _conversions()
+
+
+def test_least_recently_used_conversions_are_evicted(converter, settings, monkeypatch, tmp_path):
+    source = tmp_path / "scan.pdf"
+    source.write_bytes(b"%PDF-1.4 scan")
+    for content_hash in ("old", "new"):
+        convert_to_markdown(source, content_hash)
+    with Session(engine) as session:
+        old = session.get(StoredFile, "cache/conversions/old.md")
+        old.last_used_at = old.last_used_at.replace(year=2000)
+        session.add(old)
+        session.commit()
+    monkeypatch.setattr(settings, "storage_conversions_max_bytes", len("# scan.pdf"))
+
+    with Session(engine) as session:
+        assert evict_conversions(session, 10) == 1
+
+    assert get_cached_markdown("old") is None
+    assert get_cached_markdown("new") == "# scan.pdf"
+    assert [row.path for row in _conversions()] == ["cache/conversions/new.md"]
+
+
+def test_backfill_registers_cached_conversions_once(converter):
+    directory = conversions_dir()
+    (directory / "abc.md").write_text("# cached", encoding="utf-8")
+    (directory / "abc.json").write_text("{}", encoding="utf-8")
+    os.utime(directory / "abc.md", (0, 0))
+
+    with Session(engine) as session:
+        assert backfill(session, 10) == 1
+        assert backfill(session, 10) == 0
+
+    assert [path.name for path in directory.iterdir()] == ["abc.md"]
+    [row] = _conversions()
+    assert row.last_used_at.year == 1970
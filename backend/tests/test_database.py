@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.database import build_engine, engine
+from app.models import OCRJob
+from app.services.ocr import update_job_status
+
+
+def _pragma(name: str, target=engine):
+    with target.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_file_databases_use_the_production_profile(settings):
+    assert _pragma("journal_mode") == "wal"
+    assert _pragma("busy_timeout") == settings.sqlite_busy_timeout_ms
+    assert _pragma("synchronous") == 1  # NORMAL
+
+
+def test_memory_databases_are_left_alone():
+    assert _pragma("journal_mode", build_engine("sqlite://")) == "memory"
+
+
+def test_writers_wait_for_the_lock_instead_of_failing(make_job):
+    job_id = make_job()
+    holding = threading.Event()
+
+    def hold_write_lock():
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE ocrjob SET progress = 1 WHERE id = :id"), {"id": job_id})
+            holding.set()
+            time.sleep(0.3)
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    holding.wait()
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE ocrjob SET progress = 2 WHERE id = :id"), {"id": job_id})
+    holder.join()
+
+    with Session(engine) as session:
+        assert session.get(OCRJob, job_id).progress == 2
+
+
+def test_progress_ticks_are_coalesced(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "job_progress_write_interval", 60)
+    job_id = make_job()
+
+    def progress_after(**update) -> int:
+        with Session(engine) as session:
+            update_job_status(session, session.get(OCRJob, job_id), **update)
+        with Session(engine) as session:
+            return session.get(OCRJob, job_id).progress
+
+    assert progress_after(status="processing", progress=10) == 10
+    assert progress_after(status="processing", progress=20) == 10
+    assert progress_after(status="processing", progress=30, error="pagina 3 ilizibilă") == 30
+    monkeypatch.setattr(settings, "job_progress_write_interval", 0)
+    assert progress_after(status="processing", progress=40) == 40
+    monkeypatch.setattr(settings, "job_progress_write_interval", 60)
+    assert progress_after(status="completed", progress=100) == 100
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import gzip
+
+import pytest
+
+from app.services.downloads import precompress_output
+from app.services.ocr import ensure_storage_dirs
+
+CONTENT = ("# Raport\n\n" + "rând de text recunoscut\n" * 200).encode("utf-8")
+
+
+@pytest.fixture
+def output(settings, make_job):
+    results = ensure_storage_dirs(settings.data_dir)["results"]
+    path = results / "11_raport.md"
+    path.write_bytes(CONTENT)
+    job_id = make_job(status="completed", output_filename=path.name, output_mime_type="text/markdown")
+    yield job_id, path
+    for file in results.glob("11_raport.md*"):
+        file.unlink()
+
+
+def _url(job_id: int) -> str:
+    return f"/api/ocr/jobs/{job_id}/download"
+
+
+def test_ranges_are_answered(client, output):
+    job_id, _path = output
+
+    response = client.get(_url(job_id), headers={"Range": "bytes=2-7"})
+
+    assert response.status_code == 206
+    assert response.data == CONTENT[2:8]
+    assert response.headers["Content-Range"] == f"bytes 2-7/{len(CONTENT)}"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+
+def test_conditional_requests_get_not_modified(client, output):
+    job_id, _path = output
+    first = client.get(_url(job_id))
+    assert first.status_code == 200 and first.data == CONTENT
+
+    assert client.get(_url(job_id), headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get(_url(job_id), headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+    assert client.get(_url(job_id), headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_precompressed_variant_is_served(client, output):
+    job_id, path = output
+    assert precompress_output(path, "text/markdown")[-1] == "gzip"
+
+    response = client.get(_url(job_id), headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == CONTENT
+    plain = client.get(_url(job_id))
+    assert "Content-Encoding" not in plain.headers and plain.data == CONTENT
+
+
+def test_small_and_binary_outputs_are_not_precompressed(output, tmp_path):
+    _job_id, path = output
+    small = tmp_path / "small.md"
+    small.write_bytes(b"scurt")
+
+    assert precompress_output(small, "text/markdown") == []
+    assert precompress_output(path, "application/pdf") == []
+    assert not path.with_name(path.name + ".gz").exists()
+
+
+def test_nginx_offload(client, settings, monkeypatch, output):
+    job_id, _path = output
+    monkeypatch.setattr(settings, "download_accel_redirect", "/protected/")
+
+    response = client.get(_url(job_id))
+
+    assert response.status_code == 200
+    assert response.data == b""
+    assert response.headers["X-Accel-Redirect"] == "/protected/results/11_raport.md"
+    assert response.headers["Content-Type"].startswith("text/markdown")
+    assert "filename=11_raport.md;" in response.headers["Content-Disposition"]
+    assert client.get(_url(job_id), headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_missing_outputs_are_not_found(client, make_job):
+    assert client.get(_url(make_job())).status_code == 404
+    assert client.get(_url(make_job(output_filename="gone.md"))).status_code == 404
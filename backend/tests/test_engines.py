@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from app.services import engines
+from app.services.engines import (
+    EngineCapabilities,
+    EngineRequest,
+    EngineResult,
+    OCREngine,
+    PageRange,
+    get_engine,
+)
+
+
+class RecordingEngine(OCREngine):
+    name = "recording"
+    label = "Recording"
+    cost_per_page = 3.0
+    capabilities = EngineCapabilities(
+        scanned=True, text_layer=False, plain_documents=False, layout=False, heavy=True, output_mime_type="text/markdown"
+    )
+
+    def __init__(self) -> None:
+        self.calls: list[Optional[PageRange]] = []
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        self.calls.append(pages)
+        output_path = request.results_dir / f"{request.job_id}_recording.md"
+        output_path.write_text("recognized", encoding="utf-8")
+        return EngineResult(output_path, "text/markdown", "recognized", self.name)
+
+
+@pytest.fixture
+def fallback(settings, monkeypatch):
+    engine = RecordingEngine()
+    monkeypatch.setitem(engines._ENGINES, engine.name, engine)
+    monkeypatch.setattr(settings, "ocr_auto_fallback_engine", engine.name)
+    return engine
+
+
+def _request(path: Path) -> EngineRequest:
+    return EngineRequest(job_id=1, input_path=path, results_dir=path.parent)
+
+
+def test_registry_lists_every_engine(client):
+    names = [engine["name"] for engine in client.get("/api/ocr/engines").get_json()]
+
+    assert names == ["auto", "docling", "ocrmypdf", "text"]
+    with pytest.raises(ValueError):
+        get_engine("tesseract")
+
+
+def test_unknown_engine_is_refused(client):
+    response = client.post(
+        "/api/ocr/jobs",
+        data={"file": (io.BytesIO(b"text"), "note.txt"), "engine_override": "tesseract"},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
+
+
+def test_auto_reads_plain_documents_directly(fallback, tmp_path):
+    note = tmp_path / "note.txt"
+    note.write_text("plain text", encoding="utf-8")
+
+    result = get_engine("auto").run(_request(note))
+
+    assert (result.engine, result.text) == ("text", "plain text")
+    assert not fallback.calls
+
+
+def test_auto_sends_images_to_the_fallback(fallback, tmp_path):
+    scan = tmp_path / "scan.png"
+    scan.write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    result = get_engine("auto").run(_request(scan))
+
+    assert result.engine == "recording"
+    assert fallback.calls == [None]
+
+
+def test_auto_costs_and_cache_options_follow_the_fallback(fallback):
+    auto = get_engine("auto")
+
+    assert auto.cost_per_page == fallback.cost_per_page
+    assert auto.estimate_cost(10) == 30.0
+    assert auto.estimate_cost(None, size_bytes=engines.BYTES_PER_PAGE_ESTIMATE * 4) == 12.0
+    assert auto.cache_options({}, None, True)["fallback"] == "recording"
+    assert get_engine("ocrmypdf").cache_options({"deskew": True}, "romanian", False)["language"] == "ron"
+    assert get_engine("text").cache_options({"deskew": True}, "romanian", False) == {}
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import socket
+
+from app.services.events import EventBroker, broker, events_dir, publish_event
+
+
+def test_published_events_reach_every_subscriber():
+    local = EventBroker()
+    first = local.subscribe()
+    second = local.subscribe()
+
+    publish_event("job", {"id": 7, "status": "completed"})
+
+    for subscriber in (first, second):
+        assert subscriber.get(timeout=2) == {"type": "job", "data": {"id": 7, "status": "completed"}}
+    local.unsubscribe(first)
+    local.unsubscribe(second)
+
+
+def test_sockets_of_dead_listeners_are_removed():
+    stale = events_dir() / "0-dead.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as listener:
+        listener.bind(str(stale))
+
+    publish_event("job", {"id": 1})
+
+    assert not stale.exists()
+
+
+def test_subscribers_are_capped():
+    local = EventBroker()
+    subscriber = local.subscribe(limit=1)
+
+    assert local.subscribe(limit=1) is None
+    local.unsubscribe(subscriber)
+    assert local.subscribe(limit=1) is not None
+
+
+def test_stream_sends_published_events(client):
+    response = client.get("/api/events", buffered=False)
+    chunks = iter(response.response)
+
+    assert response.mimetype == "text/event-stream"
+    assert next(chunks).startswith(b"retry:")
+    publish_event("job", {"id": 3})
+    event, data = next(chunks).decode().strip().split("\n")
+    assert event == "event: job"
+    assert json.loads(data.removeprefix("data: ")) == {"id": 3}
+    response.close()
+    assert not broker._subscribers
+
+
+def test_streams_past_the_cap_are_turned_away(client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "events_max_streams", 0)
+
+    response = client.get("/api/events")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert response.get_data(as_text=True).startswith("retry:")
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import LocalCopy
+from app.services import storage
+from app.services.filestore import fetch_path, get_file_store, publish_path
+from app.services.storage import storage_usage, trim_local_copies
+
+
+@pytest.fixture
+def bucket(s3_bucket, monkeypatch):
+    # No background trims while a test arranges its copies.
+    monkeypatch.setattr(storage, "_last_trim", time.monotonic())
+    (s3_bucket / "results").mkdir()
+    return s3_bucket
+
+
+def _objects(bucket, names: list[str], size: int = 100) -> list:
+    for name in names:
+        (bucket / "results" / name).write_bytes(b"x" * size)
+    return names
+
+
+def _copies() -> dict[str, LocalCopy]:
+    with Session(engine) as session:
+        return {row.path: row for row in session.exec(select(LocalCopy)).all()}
+
+
+def _age(paths: list[str], hours: float) -> None:
+    with Session(engine) as session:
+        for row in session.exec(select(LocalCopy).where(LocalCopy.path.in_(paths))).all():
+            row.last_read_at = datetime.utcnow() - timedelta(hours=hours)
+            session.add(row)
+        session.commit()
+
+
+def test_publish_and_fetch_round_trip(settings, bucket):
+    path = settings.data_dir / "results" / "round.md"
+    path.write_text("conținut", encoding="utf-8")
+    publish_path(path)
+    assert not path.exists()
+    assert (bucket / "results" / "round.md").read_text(encoding="utf-8") == "conținut"
+
+    assert fetch_path(path).read_text(encoding="utf-8") == "conținut"
+    trim_local_copies(force=True)
+    assert _copies()["results/round.md"].size_bytes == len("conținut".encode())
+
+
+def test_trim_drops_least_recently_read_copies(settings, monkeypatch, bucket):
+    results = settings.data_dir / "results"
+    for name in _objects(bucket, ["a.md", "b.md", "c.md"]):
+        fetch_path(results / name)
+    trim_local_copies(force=True)
+    assert set(_copies()) == {"results/a.md", "results/b.md", "results/c.md"}
+
+    _age(["results/a.md"], hours=3)
+    _age(["results/b.md"], hours=2)
+    monkeypatch.setattr(settings, "storage_s3_local_copies_max_bytes", 150)
+    assert trim_local_copies(force=True) == 200
+
+    assert not (results / "a.md").exists()
+    assert not (results / "b.md").exists()
+    # Read within the grace period, so kept above the budget.
+    assert (results / "c.md").exists()
+    assert set(_copies()) == {"results/c.md"}
+    with Session(engine) as session:
+        assert storage_usage(session)["local_copies_bytes"] == 100
+
+
+def test_recent_reads_protect_a_copy(settings, monkeypatch, bucket):
+    results = settings.data_dir / "results"
+    for name in _objects(bucket, ["old.md", "reread.md"]):
+        fetch_path(results / name)
+    trim_local_copies(force=True)
+    _age(["results/old.md", "results/reread.md"], hours=3)
+
+    fetch_path(results / "reread.md")
+    monkeypatch.setattr(settings, "storage_s3_local_copies_max_bytes", 1)
+    trim_local_copies(force=True)
+
+    assert not (results / "old.md").exists()
+    assert (results / "reread.md").exists()
+
+
+def test_files_written_on_this_node_are_never_trimmed(settings, monkeypatch, bucket):
+    written = settings.data_dir / "results" / "unpublished.md"
+    written.write_bytes(b"x" * 500)
+    fetch_path(written)
+    monkeypatch.setattr(settings, "storage_s3_local_copies_max_bytes", 1)
+    trim_local_copies(force=True)
+
+    assert written.exists()
+    assert _copies() == {}
+
+
+def test_released_copies_are_forgotten(settings, bucket):
+    path = settings.data_dir / "results" / _objects(bucket, ["released.md"])[0]
+    fetch_path(path)
+    trim_local_copies(force=True)
+    get_file_store().release("results/released.md")
+    trim_local_copies(force=True)
+    assert _copies() == {}
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from app.services.folder import ZIP_READ_CHUNK, stream_zip
+
+MODIFIED = datetime(2024, 5, 6, 7, 8, 10)
+
+
+@pytest.fixture
+def results_dir(settings) -> Path:
+    # Files that are not on disk are looked up in the file store, which only knows DATA_DIR.
+    return Path(tempfile.mkdtemp(dir=settings.data_dir / "results"))
+
+
+def _archive(chunks) -> zipfile.ZipFile:
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    return archive
+
+
+def test_stream_zip_is_a_valid_archive(results_dir):
+    large = os.urandom(ZIP_READ_CHUNK) + b"tail" * 1000
+    (results_dir / "large.pdf").write_bytes(large)
+    (results_dir / "notes.md").write_text("# Titlu\n\nconținut " * 500, encoding="utf-8")
+    (results_dir / "empty.md").write_bytes(b"")
+    entries = [
+        (results_dir / "large.pdf", "ocr/large.pdf", MODIFIED),
+        (results_dir / "notes.md", "ocr/notes.md", MODIFIED),
+        (results_dir / "empty.md", "ocr/empty.md", datetime(1970, 1, 1)),
+    ]
+
+    chunks = list(stream_zip(entries))
+    archive = _archive(chunks)
+
+    assert archive.namelist() == ["ocr/large.pdf", "ocr/notes.md", "ocr/empty.md"]
+    assert archive.read("ocr/large.pdf") == large
+    assert archive.read("ocr/notes.md") == (results_dir / "notes.md").read_bytes()
+    assert archive.read("ocr/empty.md") == b""
+    assert archive.getinfo("ocr/large.pdf").compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo("ocr/notes.md").compress_type == zipfile.ZIP_DEFLATED
+    assert archive.getinfo("ocr/notes.md").date_time == (2024, 5, 6, 7, 8, 10)
+    assert archive.getinfo("ocr/empty.md").date_time == (1980, 1, 1, 0, 0, 0)
+    # The archive is produced piece by piece, not in one final chunk.
+    assert len([chunk for chunk in chunks if chunk]) > 3
+
+
+def test_missing_files_are_skipped(results_dir):
+    (results_dir / "kept.md").write_text("kept", encoding="utf-8")
+    entries = [
+        (results_dir / "gone.md", "ocr/gone.md", MODIFIED),
+        (results_dir / "kept.md", "ocr/kept.md", MODIFIED),
+    ]
+
+    archive = _archive(stream_zip(entries))
+
+    assert archive.namelist() == ["ocr/kept.md"]
+    assert archive.read("ocr/kept.md") == b"kept"
+
+
+def test_empty_folder_gives_an_empty_archive():
+    assert _archive(stream_zip([])).namelist() == []
+
+
+def test_folder_download_names_every_file_once(client, settings, make_job):
+    folder_id = client.post("/api/folders", json={"name": "Dosar"}).json["id"]
+    results = settings.data_dir / "results"
+    for index in (1, 2):
+        (results / f"{index}_text.md").write_text(f"rezultat {index}", encoding="utf-8")
+        make_job(
+            original_filename="scan.pdf",
+            folder_id=folder_id,
+            status="completed",
+            output_filename=f"{index}_text.md",
+            finished_at=MODIFIED,
+        )
+
+    response = client.get(f"/api/folders/{folder_id}/download")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    archive = _archive([response.data])
+    assert archive.namelist() == ["ocr/scan.md", "ocr/scan (2).md"]
+    assert archive.read("ocr/scan (2).md") == "rezultat 2".encode()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import Folder, WordDocument
+from app.services.folder import _subtree_counts
+
+
+def _folder(name: str, parent_id: int | None = None) -> int:
+    with Session(engine) as session:
+        folder = Folder(name=name, parent_id=parent_id)
+        session.add(folder)
+        session.commit()
+        return folder.id
+
+
+def _document(folder_id: int) -> None:
+    with Session(engine) as session:
+        session.add(WordDocument(title="doc", source="upload", file_name="doc.docx", folder_id=folder_id))
+        session.commit()
+
+
+def test_counts_add_up_through_the_tree(client, make_job):
+    root = _folder("root")
+    child = _folder("child", root)
+    grandchild = _folder("grandchild", child)
+    other = _folder("other")
+    make_job(folder_id=root)
+    make_job(folder_id=child)
+    _document(child)
+    make_job(folder_id=grandchild)
+
+    counts = {
+        folder["id"]: (folder["document_count"], folder["total_document_count"])
+        for folder in client.get("/api/folders").get_json()
+    }
+
+    assert counts == {root: (1, 4), child: (2, 3), grandchild: (1, 1), other: (0, 0)}
+
+
+def test_listing_runs_a_fixed_number_of_queries(client, make_job):
+    for index in range(20):
+        folder_id = _folder(f"folder {index}")
+        make_job(folder_id=folder_id)
+        _document(folder_id)
+    statements: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert len(client.get("/api/folders").get_json()) == 20
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(statements) <= 5
+
+
+def test_parent_cycles_do_not_loop():
+    totals = _subtree_counts({1: 2, 2: 1, 3: None}, {1: 1, 2: 2, 3: 4})
+
+    assert totals == {1: 3, 2: 3, 3: 4}
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Folder, OCRBatch, OCRJob
+from app.services.hotfolder import (
+    FAILED_DIR,
+    IN_CLOSE_WRITE,
+    DirectoryPoller,
+    HotFolderIngestor,
+    InotifyWatcher,
+    is_candidate,
+)
+
+
+@pytest.fixture
+def roots(settings, monkeypatch, tmp_path):
+    watched = tmp_path / "scanner"
+    watched.mkdir()
+    monkeypatch.setattr(settings, "hotfolder_archive_dir", tmp_path / "archive")
+    monkeypatch.setattr(settings, "hotfolder_settle_seconds", 0)
+    monkeypatch.setattr(settings, "hotfolder_engine", "text")
+    return watched
+
+
+def _write(path: Path, content: bytes = b"scan", age: float = 0) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    if age:
+        # Directories changed in the last seconds are always listed again.
+        past = time.time() - age
+        for item in (path, path.parent):
+            os.utime(item, (past, past))
+    return path
+
+
+def test_temporary_and_hidden_files_are_ignored():
+    assert is_candidate(Path("scan.pdf"))
+    for name in (".scan.pdf", "~$scan.docx", "scan.pdf.part", "scan.tmp", "scan.pdf~", "scan.crdownload"):
+        assert not is_candidate(Path(name)), name
+
+
+def test_poller_lists_only_changed_directories(tmp_path):
+    root = tmp_path / "scanner"
+    scan = _write(root / "acte" / "a.pdf", age=60)
+    os.utime(root, (time.time() - 60, time.time() - 60))
+    _write(root / "acte" / ".hidden.pdf", age=60)
+    _write(tmp_path / "scanner" / "archive" / "old.pdf")
+    poller = DirectoryPoller([root], [root / "archive"])
+
+    files, directories = poller.poll()
+    assert files == [scan]
+    assert directories == [root / "acte"]
+
+    assert poller.poll() == ([], [])
+    late = _write(root / "acte" / "b.pdf")
+    files, directories = poller.poll()
+    assert sorted(files) == [scan, late]
+    assert directories == []
+
+
+def test_files_are_ingested_once_they_settle(roots, settings, monkeypatch):
+    monkeypatch.setattr(settings, "hotfolder_settle_seconds", 60)
+    ingestor = HotFolderIngestor([roots])
+    scan = _write(roots / "a.pdf")
+
+    ingestor.poll()
+    assert scan in ingestor.pending
+    assert ingestor.ready() == []
+
+    monkeypatch.setattr(settings, "hotfolder_settle_seconds", 0)
+    assert ingestor.ready() == [scan]
+    scan.unlink()
+    assert ingestor.ready() == []
+    assert scan not in ingestor.pending
+
+
+def test_subdirectories_become_folders_and_inputs_are_archived(roots, settings):
+    first = _write(roots / "acte" / "2026" / "a.txt", b"a")
+    second = _write(roots / "acte" / "2026" / "b.txt", b"b")
+    top = _write(roots / "c.txt", b"c")
+    ingestor = HotFolderIngestor([roots])
+
+    assert ingestor.ingest([first, second, top]) == 3
+
+    archive = settings.hotfolder_archive_dir / roots.name
+    assert sorted(path.relative_to(archive).as_posix() for path in archive.rglob("*.txt")) == [
+        "acte/2026/a.txt",
+        "acte/2026/b.txt",
+        "c.txt",
+    ]
+    assert not any(path.exists() for path in (first, second, top))
+    with Session(engine) as session:
+        folders = {folder.name: folder for folder in session.exec(select(Folder)).all()}
+        jobs = session.exec(select(OCRJob)).all()
+        batches = session.exec(select(OCRBatch)).all()
+    assert folders["2026"].parent_id == folders["acte"].id
+    assert {job.original_filename: job.folder_id for job in jobs} == {
+        "a.txt": folders["2026"].id,
+        "b.txt": folders["2026"].id,
+        "c.txt": None,
+    }
+    assert sorted(batch.total_jobs for batch in batches) == [1, 2]
+    assert {job.engine for job in jobs} == {"text"}
+
+
+def test_unusable_files_are_moved_aside(roots, settings):
+    empty = _write(roots / "empty.txt", b"")
+    good = _write(roots / "good.txt", b"good")
+    ingestor = HotFolderIngestor([roots])
+
+    assert ingestor.ingest([empty, good]) == 1
+
+    assert (settings.hotfolder_archive_dir / FAILED_DIR / roots.name / "empty.txt").exists()
+    assert (settings.hotfolder_archive_dir / roots.name / "good.txt").exists()
+
+
+def test_inotify_reports_closed_files(tmp_path):
+    watcher = InotifyWatcher.create()
+    if watcher is None:
+        pytest.skip("inotify is unavailable")
+    try:
+        watcher.add(tmp_path)
+        scan = _write(tmp_path / "scan.pdf")
+        events = watcher.read(2.0)
+    finally:
+        watcher.close()
+
+    assert any(path == scan and mask & IN_CLOSE_WRITE for path, mask in events)
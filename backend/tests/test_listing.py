@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import OCRJob
+
+
+def _jobs(make_job, count: int, first_minute: int = 0, **values) -> list[int]:
+    start = datetime(2026, 1, 1, 0, first_minute)
+    return [make_job(created_at=start + timedelta(minutes=index), **values) for index in range(count)]
+
+
+def test_unpaginated_listing_is_a_plain_list(client, make_job):
+    ids = _jobs(make_job, 3)
+
+    body = client.get("/api/ocr/jobs").get_json()
+
+    assert [item["id"] for item in body] == ids[::-1]
+    assert "summary" not in body[0] and "text_excerpt" not in body[0]
+
+
+def test_cursor_pages_through_every_job_once(client, make_job):
+    ids = _jobs(make_job, 5)
+    seen: list[int] = []
+    url = "/api/ocr/jobs?limit=2"
+    while url:
+        body = client.get(url).get_json()
+        seen += [item["id"] for item in body["items"]]
+        url = body["next_cursor"] and f"/api/ocr/jobs?limit=2&cursor={body['next_cursor']}"
+
+    assert seen == ids[::-1]
+
+
+def test_filters_and_fields(client, make_job):
+    queued = _jobs(make_job, 2, status="queued")
+    failed = _jobs(make_job, 1, first_minute=2, status="failed")
+
+    body = client.get("/api/ocr/jobs?status=queued&status=failed&fields=id,status").get_json()
+    assert {item["id"] for item in body} == set(queued + failed)
+    assert all(set(item) == {"id", "status"} for item in body)
+
+    body = client.get("/api/ocr/jobs?status=failed").get_json()
+    assert [item["id"] for item in body] == failed
+
+    body = client.get("/api/ocr/jobs?created_before=2026-01-01T00:01:00Z").get_json()
+    assert [item["id"] for item in body] == queued[:1]
+
+
+def test_invalid_parameters_are_refused(client):
+    for query in ("limit=many", "cursor=@@@", "fields=id,secret", "folder_id=x", "created_after=yesterday"):
+        response = client.get(f"/api/ocr/jobs?{query}")
+        assert response.status_code == 400, query
+        assert response.get_json()["detail"]
+
+
+def test_etag_follows_updates_and_deletions(client, make_job):
+    first, second = _jobs(make_job, 2)
+    etag = client.get("/api/ocr/jobs").headers["ETag"]
+
+    assert client.get("/api/ocr/jobs", headers={"If-None-Match": etag}).status_code == 304
+
+    with Session(engine) as session:
+        job = session.get(OCRJob, first)
+        job.status = "failed"
+        job.updated_at = datetime.utcnow()
+        session.add(job)
+        session.commit()
+    updated = client.get("/api/ocr/jobs", headers={"If-None-Match": etag})
+    assert updated.status_code == 200
+
+    with Session(engine) as session:
+        session.delete(session.get(OCRJob, second))
+        session.commit()
+    deleted = client.get("/api/ocr/jobs", headers={"If-None-Match": updated.headers["ETag"]})
+    assert deleted.status_code == 200
+    assert [item["id"] for item in deleted.get_json()] == [first]
+
+
+def test_word_documents_are_paginated_too(client):
+    body = client.get("/api/word/documents?limit=10").get_json()
+
+    assert body == {"items": [], "next_cursor": None}
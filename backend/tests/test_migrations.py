@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from sqlalchemy import inspect, text
+
+from app import database
+from app.migrations import MIGRATIONS, _backfill_columns, run_migrations
+
+# Tables as the first release created them.
+LEGACY_SCHEMA = [
+    "CREATE TABLE setting (key VARCHAR NOT NULL PRIMARY KEY, value VARCHAR NOT NULL)",
+    "CREATE TABLE folder (created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, id INTEGER NOT NULL PRIMARY KEY,"
+    " name VARCHAR NOT NULL, description VARCHAR, color VARCHAR NOT NULL, parent_id INTEGER REFERENCES folder (id))",
+    "CREATE TABLE ocrjob (created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, id INTEGER NOT NULL PRIMARY KEY,"
+    " original_filename VARCHAR NOT NULL, stored_filename VARCHAR NOT NULL, engine VARCHAR NOT NULL,"
+    " auto_detect BOOLEAN NOT NULL, language VARCHAR, folder VARCHAR, folder_id INTEGER REFERENCES folder (id),"
+    " status VARCHAR NOT NULL, progress INTEGER NOT NULL, error VARCHAR, output_filename VARCHAR,"
+    " output_mime_type VARCHAR, options VARCHAR, text_excerpt VARCHAR, summary VARCHAR)",
+    "CREATE TABLE worddocument (created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,"
+    " id INTEGER NOT NULL PRIMARY KEY, title VARCHAR NOT NULL, source VARCHAR NOT NULL, original_filename VARCHAR,"
+    " file_name VARCHAR NOT NULL, mime_type VARCHAR NOT NULL, summary VARCHAR,"
+    " job_id INTEGER REFERENCES ocrjob (id), folder_id INTEGER REFERENCES folder (id))",
+]
+CREATED_AT = "2024-03-01 08:00:00.000000"
+
+
+def _legacy_database(tmp_path):
+    legacy = database.build_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(
+            text(
+                "INSERT INTO ocrjob (created_at, updated_at, original_filename, stored_filename, engine, auto_detect,"
+                " status, progress, output_filename, text_excerpt)"
+                " VALUES (:created, :created, 'old.pdf', '1_old.pdf', 'docling', 1, 'completed', 100, 'old.md', 'old')"
+            ),
+            {"created": CREATED_AT},
+        )
+    return legacy
+
+
+def test_existing_database_is_upgraded(tmp_path, monkeypatch):
+    legacy = _legacy_database(tmp_path)
+    monkeypatch.setattr(database, "engine", legacy)
+
+    database.init_db()
+
+    columns = {column["name"] for column in inspect(legacy).get_columns("ocrjob")}
+    assert {"queued_at", "lease_expires_at", "attempts", "priority_class", "cache_key"} <= columns
+    with legacy.connect() as connection:
+        row = connection.execute(text("SELECT queued_at, attempts, priority_class, text_excerpt FROM ocrjob")).one()
+        versions = [version for (version,) in connection.execute(text("SELECT version FROM schema_version"))]
+        indexes = {name for (name,) in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert row.queued_at == CREATED_AT
+    assert row.attempts == 0
+    assert row.priority_class == "interactive"
+    assert row.text_excerpt == "old"
+    assert versions == [version for version, _, _ in MIGRATIONS]
+    assert {"ix_ocrjob_created_at_id", "ix_ocrjob_status_priority_class_cost", "ix_ocrjob_unindexed"} <= indexes
+
+    # Every later start finds nothing to do.
+    assert run_migrations(legacy) == []
+    database.init_db()
+
+
+def test_only_pending_migrations_run(tmp_path, monkeypatch):
+    legacy = _legacy_database(tmp_path)
+    monkeypatch.setattr(database, "engine", legacy)
+    database.init_db()
+    backfill = next(version for version, _, migrate in MIGRATIONS if migrate is _backfill_columns)
+    with legacy.begin() as connection:
+        connection.execute(text("DELETE FROM schema_version WHERE version = :version"), {"version": backfill})
+        connection.execute(text("UPDATE ocrjob SET queued_at = NULL"))
+
+    assert run_migrations(legacy) == [backfill]
+    with legacy.connect() as connection:
+        assert connection.execute(text("SELECT queued_at FROM ocrjob")).scalar_one() == CREATED_AT
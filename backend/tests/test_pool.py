@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import io
+import threading
+import time
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import OCRJob
+from app.services import pool, queue
+from app.services.pool import ProcessPoolWorker
+
+
+def _submit(client, name: str, content: bytes) -> int:
+    response = client.post(
+        "/api/ocr/jobs",
+        data={"file": (io.BytesIO(content), name), "engine_override": "text"},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["id"]
+
+
+def _wait_finished(job_ids: list[int], timeout: float = 60.0) -> dict[int, OCRJob]:
+    deadline = time.monotonic() + timeout
+    while True:
+        with Session(engine) as session:
+            jobs = {job_id: session.get(OCRJob, job_id) for job_id in job_ids}
+        if all(job.status in ("completed", "failed") for job in jobs.values()) or time.monotonic() > deadline:
+            return jobs
+        time.sleep(0.1)
+
+
+def test_pool_processes_run_jobs_and_recycle(client, settings, monkeypatch):
+    monkeypatch.setattr(settings, "worker_preload_converter", False)
+    monkeypatch.setattr(settings, "worker_max_jobs_per_process", 1)
+    monkeypatch.setattr(settings, "queue_poll_interval", 0.05)
+    job_ids = [_submit(client, f"note-{index}.txt", f"note {index}".encode()) for index in range(3)]
+    worker = ProcessPoolWorker(2)
+    spawned: list[int] = []
+    spawn = worker._spawn
+
+    def counting_spawn(slot):
+        spawn(slot)
+        spawned.append(slot.process.pid)
+
+    monkeypatch.setattr(worker, "_spawn", counting_spawn)
+    runner = threading.Thread(target=worker.run)
+    runner.start()
+    try:
+        jobs = _wait_finished(job_ids)
+    finally:
+        worker.stop_event.set()
+        runner.join(30)
+
+    assert not runner.is_alive()
+    assert {job.status for job in jobs.values()} == {"completed"}
+    assert all(job.lease_owner is None for job in jobs.values())
+    # Each process runs a single job before it is replaced.
+    assert len(spawned) >= 3
+
+
+def _crash(job_id: int) -> OCRJob:
+    worker = ProcessPoolWorker(1)
+    assert queue.claim_next_job(worker.worker_id) == job_id
+    slot = worker.slots[0]
+    slot.job_id = job_id
+
+    worker._finish_job(slot, crashed=True)
+
+    assert slot.job_id is None
+    with Session(engine) as session:
+        return session.get(OCRJob, job_id)
+
+
+def test_crashed_process_gives_its_job_back(make_job):
+    job = _crash(make_job())
+
+    assert job.status == "queued"
+    assert job.lease_owner is None
+
+
+def test_repeated_crashes_fail_the_job(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "queue_max_attempts", 1)
+
+    job = _crash(make_job())
+
+    assert job.status == "failed"
+    assert job.error == "Procesul OCR s-a oprit neașteptat"
+
+
+def test_rss_is_measured():
+    assert pool.current_rss_mb() > 0
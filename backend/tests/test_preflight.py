@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import pikepdf
+import pytest
+from pikepdf import Dictionary, Name
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import OCRJob
+from app.services import engines
+from app.services.engines import EngineCapabilities, EngineRequest, EngineResult, OCREngine, PageRange, get_engine
+from app.services.ocr import run_preflight
+from app.services.preflight import PreflightReport, analyze_pdf
+
+
+def _pdf(path: Path, kinds: str) -> Path:
+    """Write a PDF with a text page (t), a drawing without text (i) or a blank page (b) per letter."""
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(Dictionary(Type=Name.Font, Subtype=Name.Type1, BaseFont=Name.Helvetica))
+    for index, kind in enumerate(kinds):
+        pdf.add_blank_page(page_size=(300, 300))
+        page = pdf.pages[-1]
+        content = b""
+        if kind == "t":
+            text = f"Pagina {index + 1} are destul text pentru a fi extrasa direct"
+            content = f"BT /F1 8 Tf 10 150 Td ({text}) Tj ET".encode()
+            page.obj.Resources = Dictionary(Font=Dictionary(F1=font))
+        elif kind == "i":
+            content = b"0 0 1 rg 10 10 100 100 re f"
+        page.obj.Contents = pdf.make_stream(content)
+    pdf.save(path)
+    return path
+
+
+class PageEngine(OCREngine):
+    name = "pages"
+    capabilities = EngineCapabilities(
+        scanned=True, text_layer=False, plain_documents=False, layout=False, heavy=True, output_mime_type="text/markdown"
+    )
+
+    def __init__(self) -> None:
+        self.calls: list[Optional[PageRange]] = []
+
+    def run(self, request: EngineRequest, pages: Optional[PageRange] = None) -> EngineResult:
+        self.calls.append(pages)
+        text = "OCR document" if pages is None else f"OCR {pages[0] + 1}-{pages[1] + 1}"
+        output_path = request.results_dir / f"{request.job_id}_pages_{len(self.calls)}.md"
+        output_path.write_text(text, encoding="utf-8")
+        return EngineResult(output_path, "text/markdown", text, self.name)
+
+
+@pytest.fixture
+def fallback(settings, monkeypatch):
+    engine = PageEngine()
+    monkeypatch.setitem(engines._ENGINES, engine.name, engine)
+    monkeypatch.setattr(settings, "ocr_auto_fallback_engine", engine.name)
+    return engine
+
+
+def _run_auto(path: Path, progress: Optional[list] = None) -> EngineResult:
+    request = EngineRequest(
+        job_id=1,
+        input_path=path,
+        results_dir=path.parent,
+        on_progress=(lambda done, total: progress.append((done, total))) if progress is not None else None,
+    )
+    return get_engine("auto").run(request)
+
+
+def test_pages_are_classified(tmp_path):
+    report = analyze_pdf(_pdf(tmp_path / "mixed.pdf", "ttiibt"))
+
+    assert report.kinds == "ttiibt"
+    assert (report.page_count, report.text_page_count, report.ocr_page_count) == (6, 3, 2)
+    assert report.runs() == [("t", 0, 1), ("i", 2, 3), ("b", 4, 4), ("t", 5, 5)]
+    assert report.ocr_pages_spec() == "3-4"
+    assert report.text().startswith("Pagina 1")
+    assert PreflightReport.from_json(report.to_json()).kinds == "ttiibt"
+
+
+def test_born_digital_pdf_skips_ocr(fallback, tmp_path):
+    result = _run_auto(_pdf(tmp_path / "digital.pdf", "ttt"))
+
+    assert result.engine == "text"
+    assert [page for page, _ in result.pages] == [1, 2, 3]
+    assert not fallback.calls
+
+
+def test_mixed_pdf_only_sends_image_pages_to_ocr(fallback, tmp_path):
+    progress: list[tuple[int, int]] = []
+
+    result = _run_auto(_pdf(tmp_path / "mixed.pdf", "ttitit"), progress)
+
+    assert fallback.calls == [(2, 2), (4, 4)]
+    assert result.engine == "pages+text"
+    assert [page for page, _ in result.pages] == [1, 2, 3, 4, 5, 6]
+    assert "OCR 3-3" in result.text and "OCR 5-5" in result.text
+    assert progress == [(1, 2), (2, 2)]
+    # The outputs of the OCR runs are merged into one file and removed.
+    assert list(tmp_path.glob("1_pages_*")) == [result.output_path]
+
+
+def test_mostly_scanned_pdf_goes_to_ocr_whole(fallback, tmp_path):
+    result = _run_auto(_pdf(tmp_path / "scan.pdf", "iit"))
+
+    assert fallback.calls == [None]
+    assert result.text == "OCR document"
+
+
+def test_preflight_counts_are_stored_on_the_job(make_job, tmp_path):
+    path = _pdf(tmp_path / "mixed.pdf", "tti")
+    job_id = make_job(engine="auto")
+
+    with Session(engine) as session:
+        job = session.get(OCRJob, job_id)
+        report = run_preflight(session, job, path)
+        job = session.get(OCRJob, job_id)
+
+    assert report.kinds == "tti"
+    assert (job.page_count, job.text_page_count, job.ocr_page_count) == (3, 2, 1)
+    assert PreflightReport.from_json(job.preflight).kinds == "tti"
+    assert job.cost is not None
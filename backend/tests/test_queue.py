@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import OCRJob
+from app.services import queue
+
+
+def _claim_concurrently(workers: int, attempts: int) -> list[int]:
+    claimed: list[int] = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers)
+
+    def work(index: int) -> None:
+        worker_id = f"test:{index}"
+        start.wait()
+        for _ in range(attempts):
+            job_id = queue.claim_next_job(worker_id)
+            if job_id is not None:
+                with lock:
+                    claimed.append(job_id)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return claimed
+
+
+def _jobs() -> dict[int, OCRJob]:
+    with Session(engine) as session:
+        return {job.id: job for job in session.exec(select(OCRJob)).all()}
+
+
+def test_concurrent_claims_never_share_a_job(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "queue_max_concurrency", 100)
+    ids = {make_job() for _ in range(20)}
+
+    claimed = _claim_concurrently(workers=8, attempts=5)
+    while (job_id := queue.claim_next_job("test:drain")) is not None:
+        claimed.append(job_id)
+
+    assert len(claimed) == len(set(claimed))
+    assert set(claimed) == ids
+    jobs = _jobs()
+    assert all(job.status == "processing" and job.attempts == 1 for job in jobs.values())
+    assert all(job.lease_expires_at > datetime.utcnow() for job in jobs.values())
+
+
+def test_concurrent_claims_respect_the_concurrency_limit(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "queue_max_concurrency", 4)
+    for _ in range(12):
+        make_job()
+
+    claimed = _claim_concurrently(workers=8, attempts=3)
+    while (job_id := queue.claim_next_job("test:drain")) is not None:
+        claimed.append(job_id)
+
+    assert len(claimed) == len(set(claimed)) == 4
+    statuses = [job.status for job in _jobs().values()]
+    assert statuses.count("processing") == 4
+    assert statuses.count("queued") == 8
+
+
+def test_expired_leases_are_requeued_or_failed(settings, make_job):
+    now = datetime.utcnow()
+    expired = now - timedelta(seconds=5)
+    requeued = make_job(status="processing", lease_owner="gone", lease_expires_at=expired, attempts=1)
+    orphaned = make_job(status="processing", attempts=1)
+    exhausted = make_job(
+        status="processing", lease_owner="gone", lease_expires_at=expired, attempts=settings.queue_max_attempts
+    )
+    alive = make_job(status="processing", lease_owner="busy", lease_expires_at=now + timedelta(minutes=1), attempts=1)
+
+    assert queue.recover_expired_leases() == 3
+
+    jobs = _jobs()
+    for job_id in (requeued, orphaned):
+        assert jobs[job_id].status == "queued"
+        assert jobs[job_id].lease_owner is None
+    assert jobs[exhausted].status == "failed"
+    assert jobs[exhausted].error
+    assert jobs[alive].status == "processing"
+    assert jobs[alive].lease_owner == "busy"
+    assert queue.recover_expired_leases() == 0
+
+
+def test_recovered_job_can_be_claimed_again(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "queue_max_concurrency", 1)
+    job_id = make_job()
+    assert queue.claim_next_job("first") == job_id
+    assert queue.claim_next_job("second") is None
+    assert queue.heartbeat(job_id, "first")
+
+    # The first worker stops sending heartbeats.
+    with engine.begin() as connection:
+        connection.execute(
+            OCRJob.__table__.update().values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+    assert queue.recover_expired_leases() == 1
+    assert queue.claim_next_job("second") == job_id
+    assert not queue.heartbeat(job_id, "first")
+    assert _jobs()[job_id].attempts == 2
+
+
+def test_lease_recovery_is_throttled_per_process(monkeypatch, make_job):
+    monkeypatch.setattr(queue, "_last_recovery", None)
+    first = make_job(status="processing", attempts=1)
+    queue.maybe_recover_expired_leases()
+    second = make_job(status="processing", attempts=1)
+    queue.maybe_recover_expired_leases()
+
+    jobs = _jobs()
+    assert jobs[first].status == "queued"
+    assert jobs[second].status == "processing"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import OCRJob, ResultCacheEntry
+from app.services.result_cache import (
+    build_cache_key,
+    evict_orphaned_results,
+    get_cached_result,
+    register_result,
+    release_result,
+)
+
+
+def _finish(session: Session, settings, job_id: int, key: str, output: str, size: int = 100) -> OCRJob:
+    (settings.data_dir / "results" / output).write_bytes(b"x" * size)
+    job = session.get(OCRJob, job_id)
+    job.cache_key = key
+    job.content_hash = "hash"
+    job.output_filename = output
+    job.output_mime_type = "text/markdown"
+    job.status = "completed"
+    register_result(session, job)
+    session.add(job)
+    session.commit()
+    return job
+
+
+def test_cache_key_depends_on_every_input():
+    key = build_cache_key("hash", "docling", {"a": 1, "b": 2}, "ron")
+    assert key == build_cache_key("hash", "docling", {"b": 2, "a": 1}, "ron")
+    assert key != build_cache_key("hash", "ocrmypdf", {"a": 1, "b": 2}, "ron")
+    assert key != build_cache_key("hash", "docling", {"a": 1, "b": 2}, "eng")
+    assert key != build_cache_key("other", "docling", {"a": 1, "b": 2}, "ron")
+
+
+def test_identical_jobs_share_one_output(settings, make_job):
+    key = build_cache_key("hash", "text", {}, None)
+    results = settings.data_dir / "results"
+    with Session(engine) as session:
+        first = _finish(session, settings, make_job(), key, "1_text.md")
+        second = _finish(session, settings, make_job(), key, "2_text.md")
+
+        assert second.output_filename == "1_text.md"
+        assert not (results / "2_text.md").exists()
+        assert session.get(ResultCacheEntry, key).ref_count == 2
+
+        assert release_result(session, first)
+        session.commit()
+        assert session.get(ResultCacheEntry, key).ref_count == 1
+        assert evict_orphaned_results(session, max_bytes=0) == 0
+
+        assert release_result(session, second)
+        session.commit()
+        assert session.get(ResultCacheEntry, key).ref_count == 0
+        assert evict_orphaned_results(session, max_bytes=0) == 1
+        assert session.get(ResultCacheEntry, key) is None
+    assert not (results / "1_text.md").exists()
+
+
+def test_eviction_drops_least_recently_used_first(settings, make_job):
+    now = datetime.utcnow()
+    keys = [build_cache_key(f"hash{index}", "text", {}, None) for index in range(3)]
+    with Session(engine) as session:
+        for index, key in enumerate(keys):
+            job = _finish(session, settings, make_job(), key, f"{index}_text.md", size=100)
+            release_result(session, job)
+            entry = session.get(ResultCacheEntry, key)
+            entry.last_used_at = now - timedelta(hours=3 - index)
+            session.add(entry)
+        session.commit()
+
+        assert evict_orphaned_results(session, max_bytes=300) == 0
+        assert evict_orphaned_results(session, max_bytes=150) == 2
+        assert [key for key in keys if session.get(ResultCacheEntry, key)] == keys[2:]
+
+
+def test_entry_with_a_missing_output_is_dropped(settings, make_job):
+    key = build_cache_key("hash", "text", {}, None)
+    with Session(engine) as session:
+        _finish(session, settings, make_job(), key, "1_text.md")
+        (settings.data_dir / "results" / "1_text.md").unlink()
+
+        assert get_cached_result(session, key) is None
+        assert session.get(ResultCacheEntry, key) is None
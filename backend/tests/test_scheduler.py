@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import queue
+from app.services.scheduler import classify_job, share_key_for
+
+
+@pytest.fixture(autouse=True)
+def slots(settings, monkeypatch):
+    monkeypatch.setattr(settings, "queue_max_concurrency", 3)
+    monkeypatch.setattr(settings, "scheduler_reserved_interactive_slots", 1)
+    monkeypatch.setattr(settings, "scheduler_max_wait_seconds", 900)
+
+
+def _running(make_job, **values) -> int:
+    now = datetime.utcnow()
+    return make_job(status="processing", lease_owner="other", lease_expires_at=now + timedelta(minutes=5), **values)
+
+
+def _claim_order(count: int) -> list[int]:
+    return [queue.claim_next_job("test") for _ in range(count)]
+
+
+def test_classification_and_share_keys(settings, monkeypatch):
+    assert classify_job(settings.scheduler_interactive_max_pages) == "interactive"
+    assert classify_job(settings.scheduler_interactive_max_pages + 1) == "bulk"
+    assert classify_job(None) == "interactive"
+    assert classify_job(500, "interactive") == "interactive"
+    assert share_key_for("ana", 4) == "client:ana"
+    monkeypatch.setattr(settings, "scheduler_fair_share", "folder")
+    assert share_key_for("ana", 4) == "folder:4"
+    monkeypatch.setattr(settings, "scheduler_fair_share", "none")
+    assert share_key_for("ana", 4) is None
+
+
+def test_interactive_jobs_run_before_bulk_and_short_before_long(make_job):
+    bulk = make_job(priority_class="bulk", cost=1.0)
+    long = make_job(priority_class="interactive", cost=40.0)
+    short = make_job(priority_class="interactive", cost=2.0)
+
+    assert _claim_order(3) == [short, long, bulk]
+
+
+def test_old_bulk_jobs_are_promoted(make_job):
+    interactive = make_job(priority_class="interactive", cost=1.0)
+    waited = make_job(priority_class="bulk", cost=500.0, queued_at=datetime.utcnow() - timedelta(hours=1))
+
+    assert _claim_order(2) == [waited, interactive]
+
+
+def test_clients_with_fewer_running_jobs_go_first(make_job):
+    _running(make_job, share_key="client:busy")
+    busy = make_job(share_key="client:busy", cost=1.0)
+    idle = make_job(share_key="client:idle", cost=10.0)
+
+    assert _claim_order(2) == [idle, busy]
+
+
+def test_bulk_jobs_leave_slots_for_interactive_ones(make_job):
+    _running(make_job, priority_class="bulk")
+    _running(make_job, priority_class="bulk")
+    make_job(priority_class="bulk")
+
+    assert queue.claim_next_job("test") is None
+    interactive = make_job(priority_class="interactive")
+    assert queue.claim_next_job("test") == interactive
+    # Every slot is now taken.
+    make_job(priority_class="interactive")
+    assert queue.claim_next_job("test") is None
+
+
+def test_metrics_report_depth_and_wait_times(client, make_job):
+    now = datetime.utcnow()
+    make_job(priority_class="bulk", cost=5.0, queued_at=now - timedelta(seconds=30))
+    for wait, run in ((1, 10), (3, 20), (5, 30)):
+        queued_at = now - timedelta(seconds=wait + run)
+        make_job(
+            status="completed",
+            page_count=2,
+            queued_at=queued_at,
+            started_at=queued_at + timedelta(seconds=wait),
+            finished_at=now,
+        )
+
+    metrics = client.get("/api/ocr/scheduler/metrics").get_json()
+
+    assert metrics["bulk_slots"] == 2
+    bulk, interactive = metrics["classes"]["bulk"], metrics["classes"]["interactive"]
+    assert (bulk["queued"], bulk["queued_cost"]) == (1, 5.0)
+    assert bulk["oldest_queued_seconds"] >= 30
+    assert (interactive["completed"], interactive["pages"]) == (3, 6)
+    assert interactive["wait_seconds"] == {"p50": 3.0, "p95": 5.0, "max": 5.0}
+    assert interactive["run_seconds"]["max"] == 30.0
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import pytest
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import Folder, OCRJob
+from app.services.ocr import ensure_storage_dirs
+from app.services.search import SearchIndexer, index_job, remove_job_from_index, retag_job, search_available
+from app.services.textstore import store_path, write_page_store
+
+pytestmark = pytest.mark.skipif(not search_available(), reason="SQLite has no FTS5")
+
+
+def _folder(name: str) -> int:
+    with Session(engine) as session:
+        folder = Folder(name=name)
+        session.add(folder)
+        session.commit()
+        return folder.id
+
+
+def _indexed_job(make_job, pages: list[tuple[int, str]], **values) -> int:
+    values.setdefault("engine", "docling")
+    job_id = make_job(status="completed", **values)
+    with Session(engine) as session:
+        index_job(session, session.get(OCRJob, job_id), pages)
+        session.commit()
+    return job_id
+
+
+def _search(client, query: str, **params) -> dict:
+    response = client.get("/api/search", query_string={"q": query, **params})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_pages_are_found_with_highlighted_snippets(client, make_job):
+    job_id = _indexed_job(
+        make_job, [(1, "Contract de vânzare"), (2, "Anexa <1> la contractul de închiriere")], original_filename="acte.pdf"
+    )
+
+    body = _search(client, "anexa inchiriere")
+
+    [hit] = body["items"]
+    assert (hit["job_id"], hit["page"], hit["original_filename"]) == (job_id, 2, "acte.pdf")
+    assert "<mark>Anexa</mark> &lt;1&gt;" in hit["snippet"]
+    assert "<mark>închiriere</mark>" in hit["snippet"]
+    assert body["ranking"] == "full"
+
+
+def test_every_term_and_phrase_must_match(client, make_job):
+    _indexed_job(make_job, [(1, "proces verbal de predare"), (2, "verbal proces")])
+
+    assert [hit["page"] for hit in _search(client, '"proces verbal"')["items"]] == [1]
+    assert _search(client, "proces lipsă")["items"] == []
+
+
+def test_folder_and_engine_filters(client, make_job):
+    archive = _folder("arhivă")
+    filed = _indexed_job(make_job, [(1, "factura fiscală")], folder_id=archive)
+    _indexed_job(make_job, [(1, "factura proformă")], engine="text")
+
+    assert [hit["job_id"] for hit in _search(client, "factura", folder_id=archive)["items"]] == [filed]
+    assert len(_search(client, "factura", engine="text")["items"]) == 1
+    assert client.get("/api/search", query_string={"q": "factura", "engine": "nope"}).status_code == 400
+
+
+def test_moved_and_removed_jobs_leave_the_index(client, make_job):
+    first, second = _folder("unu"), _folder("doi")
+    job_id = _indexed_job(make_job, [(1, "decizie de impunere")], folder_id=first)
+
+    with Session(engine) as session:
+        job = session.get(OCRJob, job_id)
+        job.folder_id = second
+        retag_job(session, job)
+        session.commit()
+    assert _search(client, "decizie", folder_id=first)["items"] == []
+    assert len(_search(client, "decizie", folder_id=second)["items"]) == 1
+
+    with Session(engine) as session:
+        remove_job_from_index(session, job_id)
+        session.commit()
+    assert _search(client, "decizie")["items"] == []
+
+
+def test_common_terms_are_not_scored(client, settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "search_common_term_pages", 1)
+    _indexed_job(make_job, [(page, f"dosar numărul {page}") for page in range(1, 4)] + [(4, "dosar penal")])
+
+    newest = _search(client, "dosar", limit=2)
+    assert [hit["page"] for hit in newest["items"]] == [4, 3]
+    assert (newest["ranking"], newest["next_offset"]) == ("newest", 2)
+    partial = _search(client, "dosar penal")
+    assert [hit["page"] for hit in partial["items"]] == [4]
+    assert partial["ranking"] == "partial"
+
+
+def test_invalid_queries_are_refused(client):
+    assert client.get("/api/search", query_string={"q": "  "}).status_code == 400
+    terms = " ".join(f"t{index}" for index in range(20))
+    assert client.get("/api/search", query_string={"q": terms}).status_code == 400
+
+
+def test_indexer_picks_up_jobs_from_their_page_store(client, settings, make_job):
+    ensure_storage_dirs(settings.data_dir)
+    write_page_store(store_path("42_text.md"), [(1, "hotărâre judecătorească")])
+    job_id = make_job(status="completed", output_filename="42_text.md")
+    assert client.get("/api/search/status").get_json()["pending_jobs"] == 1
+
+    assert SearchIndexer().run_once() == 1
+
+    assert [hit["job_id"] for hit in _search(client, "hotarare")["items"]] == [job_id]
+    status = client.get("/api/search/status").get_json()
+    assert (status["pending_jobs"], status["indexed_pages"]) == (0, 1)
+    assert client.post("/api/search/reindex", json={"job_id": job_id}).get_json()["queued"] == 1
+    assert SearchIndexer().run_once() == 1
+    assert len(_search(client, "hotarare")["items"]) == 1
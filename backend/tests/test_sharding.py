@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pikepdf
+import pytest
+
+from app.services import ocr, sharding
+from app.services.sharding import merge_pdfs, run_sharded_docling, should_shard, split_pdf
+
+
+def _pdf(path: Path, pages: int, pdfa: str | None = None) -> Path:
+    with pikepdf.new() as pdf:
+        for _ in range(pages):
+            pdf.add_blank_page(page_size=(100, 100))
+        if pdfa:
+            with pdf.open_metadata(set_pikepdf_as_editor=False) as meta:
+                meta["pdfaid:part"] = pdfa[0]
+                meta["pdfaid:conformance"] = pdfa[1:]
+        pdf.save(path)
+    return path
+
+
+def _claim(path: Path) -> str | None:
+    with pikepdf.open(path) as pdf:
+        return sharding._pdfa_claim(pdf)
+
+
+@pytest.fixture
+def shards(settings, monkeypatch):
+    monkeypatch.setattr(settings, "ocr_shard_pages", 4)
+    monkeypatch.setattr(settings, "ocr_shard_min_pages", 10)
+
+
+def test_only_large_pdfs_are_sharded(shards, tmp_path):
+    assert should_shard(_pdf(tmp_path / "large.pdf", 10), {}) == 10
+    assert should_shard(_pdf(tmp_path / "small.pdf", 9), {}) is None
+    assert should_shard(tmp_path / "large.pdf", {"sharded": False}) is None
+    (tmp_path / "note.txt").write_text("not a pdf")
+    assert should_shard(tmp_path / "note.txt", {}) is None
+    (tmp_path / "broken.pdf").write_bytes(b"%PDF-1.4 broken")
+    assert should_shard(tmp_path / "broken.pdf", {}) is None
+
+
+def test_split_covers_every_page_once(tmp_path):
+    chunks = split_pdf(_pdf(tmp_path / "scan.pdf", 10), 4, tmp_path)
+
+    assert [(first, last) for first, last, _ in chunks] == [(0, 3), (4, 7), (8, 9)]
+    assert [sharding.pdf_page_count(path) for _, _, path in chunks] == [4, 4, 2]
+
+
+def test_merge_keeps_a_shared_pdfa_claim(tmp_path):
+    parts = [_pdf(tmp_path / f"part{index}.pdf", 2, "2B") for index in range(3)]
+
+    merge_pdfs(parts, tmp_path / "merged.pdf")
+
+    assert sharding.pdf_page_count(tmp_path / "merged.pdf") == 6
+    assert _claim(tmp_path / "merged.pdf") == "2B"
+
+
+def test_merge_drops_a_claim_not_every_shard_makes(tmp_path):
+    parts = [_pdf(tmp_path / "part0.pdf", 2, "2B"), _pdf(tmp_path / "part1.pdf", 2)]
+
+    merge_pdfs(parts, tmp_path / "merged.pdf")
+
+    assert _claim(tmp_path / "merged.pdf") is None
+
+
+def test_sharded_docling_keeps_page_order(shards, monkeypatch, tmp_path):
+    delays = iter([0.2, 0.0, 0.1])
+
+    def convert(path: str):
+        time.sleep(next(delays))
+        markdown = f"pages of {Path(path).stem}"
+        return SimpleNamespace(document=SimpleNamespace(export_to_markdown=lambda: markdown))
+
+    monkeypatch.setattr(ocr, "_converter", SimpleNamespace(convert=convert))
+    executor = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(sharding, "get_shard_executor", lambda: executor)
+    progress: list[tuple[int, int]] = []
+
+    parts = run_sharded_docling(_pdf(tmp_path / "scan.pdf", 10), 10, lambda done, total: progress.append((done, total)))
+    executor.shutdown()
+
+    assert parts == [
+        (0, 3, "pages of chunk_000000"),
+        (4, 7, "pages of chunk_000004"),
+        (8, 9, "pages of chunk_000008"),
+    ]
+    assert progress[-1] == (10, 10)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert not list(tmp_path.glob("ocr_shards_*"))
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import threading
+
+from app.main import create_app
+
+
+def test_create_app_starts_no_background_workers(settings, monkeypatch):
+    monkeypatch.setattr(settings, "queue_embedded_worker", True)
+    before = {thread.name for thread in threading.enumerate()}
+
+    create_app()
+
+    started = {thread.name for thread in threading.enumerate()} - before
+    assert not started
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import OCRJob, ResultCacheEntry, Setting, StoredFile
+from app.services.ocr import ensure_storage_dirs
+from app.services.storage import (
+    backfill,
+    cold_path,
+    compress_cold_results,
+    evict_derived,
+    expire_files,
+    hot_path,
+    release_upload,
+    track_file,
+    track_job_output,
+)
+from app.services.textstore import store_path, write_page_store
+
+PAST = datetime(2000, 1, 1)
+
+
+@pytest.fixture
+def dirs(settings):
+    dirs = ensure_storage_dirs(settings.data_dir)
+    yield dirs
+    for directory in (*dirs.values(), store_path("x").parent):
+        for path in directory.iterdir():
+            if path.is_file():
+                path.unlink()
+
+
+def _write(path, content: bytes = b"continut " * 100):
+    path.write_bytes(content)
+    return path
+
+
+def _rows() -> dict[str, StoredFile]:
+    with Session(engine) as session:
+        return {row.path: row for row in session.exec(select(StoredFile)).all()}
+
+
+def test_expired_uploads_are_deleted(dirs):
+    old = _write(dirs["uploads"] / "1_old.pdf")
+    kept = _write(dirs["uploads"] / "2_kept.pdf")
+    with Session(engine) as session:
+        track_file(session, old, "upload", expires_at=PAST)
+        track_file(session, kept, "upload", expires_at=datetime.utcnow() + timedelta(days=1))
+        session.commit()
+
+        assert expire_files(session, 10) == 1
+
+    assert not old.exists() and kept.exists()
+    assert list(_rows()) == ["uploads/2_kept.pdf"]
+
+
+def test_expired_outputs_are_detached_from_their_jobs(dirs, make_job):
+    output = _write(dirs["results"] / "3_out.md")
+    _write(dirs["results"] / "3_out.md.gz", b"gz")
+    write_page_store(store_path(output.name), [(None, "text")])
+    jobs = [make_job(status="completed", output_filename=output.name) for _ in range(2)]
+    with Session(engine) as session:
+        session.add(
+            ResultCacheEntry(
+                key="k", content_hash="h", engine="text", output_filename=output.name, output_mime_type="text/markdown"
+            )
+        )
+        track_job_output(session, session.get(OCRJob, jobs[0]), dirs["results"])
+        session.get(StoredFile, "results/3_out.md").expires_at = PAST
+        session.commit()
+
+        assert expire_files(session, 10) == 1
+
+        for job_id in jobs:
+            job = session.get(OCRJob, job_id)
+            assert job.output_filename is None and job.purged_at is not None
+        assert session.get(ResultCacheEntry, "k") is None
+    assert not list(dirs["results"].glob("3_out*")) and not store_path(output.name).exists()
+    assert _rows() == {}
+
+
+def test_cold_results_are_compressed_and_restored_on_read(client, dirs, make_job):
+    pytest.importorskip("zstandard")
+    content = b"rezultat vechi\n" * 500
+    output = _write(dirs["results"] / "4_out.md", content)
+    job_id = make_job(status="completed", output_filename=output.name, output_mime_type="text/markdown")
+    with Session(engine) as session:
+        track_file(session, output, "result", used_at=PAST)
+        session.commit()
+
+        assert compress_cold_results(session, 10) == 1
+
+    row = _rows()["results/4_out.md"]
+    assert not output.exists() and cold_path(output).exists()
+    assert (row.codec, row.size_bytes) == ("zstd", cold_path(output).stat().st_size)
+
+    assert client.get(f"/api/ocr/jobs/{job_id}/download").data == content
+    assert hot_path(output) == output and not cold_path(output).exists()
+    assert _rows()["results/4_out.md"].codec is None
+
+
+def test_pdf_results_are_never_compressed(dirs):
+    output = _write(dirs["results"] / "5_out.pdf")
+    with Session(engine) as session:
+        track_file(session, output, "result", used_at=PAST)
+        session.commit()
+
+        assert compress_cold_results(session, 10) == 0
+    assert output.exists()
+
+
+def test_least_recently_used_variants_are_evicted(dirs, settings, monkeypatch):
+    monkeypatch.setattr(settings, "storage_derived_max_bytes", 150)
+    paths = [_write(dirs["results"] / f"{index}_out.md.gz", b"x" * 100) for index in range(3)]
+    with Session(engine) as session:
+        for age, path in enumerate(paths):
+            track_file(session, path, "derived", used_at=PAST + timedelta(days=age))
+        session.commit()
+
+        assert evict_derived(session, 10) == 2
+
+    assert [path.exists() for path in paths] == [False, False, True]
+    assert list(_rows()) == ["results/2_out.md.gz"]
+
+
+def test_uploads_follow_the_retention_policy(dirs, settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "storage_result_retention_days", 30)
+    done = _write(dirs["uploads"] / "6_done.pdf")
+    failed = _write(dirs["uploads"] / "7_failed.pdf")
+    with Session(engine) as session:
+        release_upload(session, session.get(OCRJob, make_job()), done, succeeded=True)
+        release_upload(session, session.get(OCRJob, make_job()), failed, succeeded=False)
+        session.commit()
+
+    assert not done.exists() and failed.exists()
+    row = _rows()["uploads/7_failed.pdf"]
+    assert row.expires_at > datetime.utcnow() + timedelta(days=29)
+
+
+def test_backfill_registers_older_files_and_resumes(dirs, make_job):
+    for index in range(3):
+        _write(dirs["results"] / f"{index}_old.md")
+    jobs = [
+        make_job(status="completed", output_filename=f"{index}_old.md", finished_at=PAST) for index in range(3)
+    ]
+
+    with Session(engine) as session:
+        assert backfill(session, 2) == 2
+        assert session.get(Setting, "storage_backfill_job_id").value == str(jobs[1])
+        assert backfill(session, 2) == 1
+        assert backfill(session, 2) == 0
+
+    rows = _rows()
+    assert sorted(path for path, row in rows.items() if row.kind == "result") == [
+        f"results/{index}_old.md" for index in range(3)
+    ]
+    assert rows["results/0_old.md"].last_used_at == PAST
+
+
+def test_usage_endpoint_reports_each_kind(client, dirs, settings, monkeypatch):
+    monkeypatch.setattr(settings, "storage_keep_uploads", True)
+    with Session(engine) as session:
+        track_file(session, _write(dirs["uploads"] / "8_in.pdf", b"a" * 10), "upload", expires_at=PAST)
+        track_file(session, _write(dirs["results"] / "8_out.md", b"b" * 20), "result")
+        session.commit()
+
+    body = client.get("/api/storage/usage").get_json()
+
+    assert body["kinds"] == {"upload": {"files": 1, "bytes": 10}, "result": {"files": 1, "bytes": 20}}
+    assert (body["total_bytes"], body["expired_pending"], body["upload_retention_hours"]) == (30, 1, None)
+    assert body["local_copies_bytes"] is None
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import OCRJob, SummaryCacheEntry, SummaryRequest
+from app.services import mistral_client
+from app.services.mistral_client import evict_summary_cache, generate_summary, store_summary, summary_cache_key
+from app.services.summaries import request_summary
+
+
+@pytest.fixture(autouse=True)
+def mistral_key(settings, monkeypatch):
+    monkeypatch.setattr(settings, "mistral_api_key", "test-key")
+
+    def no_client():
+        raise AssertionError("the chat API must not be called")
+
+    monkeypatch.setattr(mistral_client, "get_client", no_client)
+
+
+def _entry(prompt: str, settings) -> SummaryCacheEntry:
+    with Session(engine) as session:
+        return session.get(SummaryCacheEntry, summary_cache_key(prompt, settings.mistral_model))
+
+
+def test_cache_hit_inside_a_writing_transaction(settings, make_job):
+    store_summary("textul documentului", "rezumat")
+    job_id = make_job()
+
+    with Session(engine) as session:
+        job = session.get(OCRJob, job_id)
+        job.progress = 90
+        session.add(job)
+        # The job's session now holds the SQLite write lock, as in process_job.
+        session.flush()
+        started = time.monotonic()
+        summary = request_summary(session, "job", job_id, "textul documentului")
+        job.summary = summary
+        session.add(job)
+        session.commit()
+
+    assert time.monotonic() - started < 1
+    assert summary == "rezumat"
+    assert _entry("textul documentului", settings).hits == 1
+
+
+def test_cache_miss_queues_a_request(make_job):
+    job_id = make_job()
+    with Session(engine) as session:
+        assert request_summary(session, "job", job_id, "text nou") is None
+        session.commit()
+        requests = session.exec(select(SummaryRequest)).all()
+    assert [(request.target, request.target_id, request.status) for request in requests] == [("job", job_id, "pending")]
+
+
+def test_expired_entry_is_not_used(settings, make_job):
+    store_summary("text vechi", "rezumat vechi")
+    with Session(engine) as session:
+        entry = session.get(SummaryCacheEntry, summary_cache_key("text vechi", settings.mistral_model))
+        entry.created_at = datetime.utcnow() - timedelta(days=settings.summary_cache_ttl_days + 1)
+        session.add(entry)
+        session.commit()
+
+    job_id = make_job()
+    with Session(engine) as session:
+        assert request_summary(session, "job", job_id, "text vechi") is None
+        session.commit()
+    assert _entry("text vechi", settings) is None
+
+
+def test_generate_summary_uses_the_cache(settings):
+    store_summary("prompt", "rezumat")
+    assert generate_summary("prompt") == "rezumat"
+    assert _entry("prompt", settings).hits == 1
+
+
+def test_eviction_keeps_the_most_recently_used(settings, monkeypatch):
+    monkeypatch.setattr(settings, "summary_cache_max_entries", 2)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        for index in range(4):
+            session.add(
+                SummaryCacheEntry(
+                    key=f"key{index}", model="m", summary=f"s{index}", last_used_at=now - timedelta(minutes=10 - index)
+                )
+            )
+        session.commit()
+        assert evict_summary_cache(session) == 2
+        assert sorted(session.exec(select(SummaryCacheEntry.key)).all()) == ["key2", "key3"]
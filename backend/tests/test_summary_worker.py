@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import OCRJob, SummaryRequest
+from app.services import summaries
+from app.services.summaries import (
+    RateLimiter,
+    SummaryWorker,
+    claim_summary_requests,
+    enqueue_summary,
+    process_summary_request,
+    release_summary_request,
+)
+
+
+@pytest.fixture(autouse=True)
+def mistral_key(settings, monkeypatch):
+    monkeypatch.setattr(settings, "mistral_api_key", "test-key")
+
+
+def _enqueue(job_id: int, prompt: str = "text") -> int:
+    with Session(engine) as session:
+        request = enqueue_summary(session, "job", job_id, prompt)
+        session.commit()
+        return request.id
+
+
+def _request(request_id: int) -> SummaryRequest | None:
+    with Session(engine) as session:
+        return session.get(SummaryRequest, request_id)
+
+
+def _job(job_id: int) -> OCRJob:
+    with Session(engine) as session:
+        return session.get(OCRJob, job_id)
+
+
+def test_pending_request_is_reused(make_job):
+    job_id = make_job()
+
+    assert _enqueue(job_id, "first") == _enqueue(job_id, "second")
+    assert _request(_enqueue(job_id)).prompt == "text"
+
+
+def test_claims_are_exclusive_until_the_lease_expires(make_job):
+    request_id = _enqueue(make_job())
+
+    assert claim_summary_requests(5) == [request_id]
+    assert claim_summary_requests(5) == []
+    with Session(engine) as session:
+        request = session.get(SummaryRequest, request_id)
+        request.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(request)
+        session.commit()
+    assert claim_summary_requests(5) == [request_id]
+    assert _request(request_id).attempts == 2
+
+
+def test_released_request_does_not_count_the_attempt(make_job):
+    request_id = _enqueue(make_job())
+    claim_summary_requests(1)
+
+    release_summary_request(request_id)
+
+    request = _request(request_id)
+    assert (request.status, request.attempts) == ("pending", 0)
+
+
+def test_summary_is_stored_on_jobs_sharing_the_output(monkeypatch, make_job):
+    monkeypatch.setattr(summaries, "generate_summary", lambda prompt: f"rezumat: {prompt}")
+    job_id = make_job(cache_key="key", output_filename="out.md")
+    twin_id = make_job(cache_key="key", output_filename="out.md")
+    request_id = _enqueue(job_id)
+    claim_summary_requests(1)
+
+    process_summary_request(request_id)
+
+    assert _request(request_id) is None
+    assert _job(job_id).summary == "rezumat: text"
+    assert _job(twin_id).summary == "rezumat: text"
+
+
+def test_failures_back_off_then_give_up(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "summary_max_attempts", 2)
+
+    def unavailable(prompt):
+        raise RuntimeError("429 Too Many Requests")
+
+    monkeypatch.setattr(summaries, "generate_summary", unavailable)
+    request_id = _enqueue(make_job())
+
+    claim_summary_requests(1)
+    process_summary_request(request_id)
+    request = _request(request_id)
+    assert (request.status, request.error) == ("pending", "429 Too Many Requests")
+    assert request.next_attempt_at > datetime.utcnow()
+    assert claim_summary_requests(1) == []
+
+    with Session(engine) as session:
+        request = session.get(SummaryRequest, request_id)
+        request.next_attempt_at = datetime.utcnow()
+        session.add(request)
+        session.commit()
+    claim_summary_requests(1)
+    process_summary_request(request_id)
+    assert _request(request_id).status == "failed"
+
+
+def test_rate_limiter_spaces_out_calls():
+    limiter = RateLimiter(per_minute=600)
+    stop = threading.Event()
+    started = time.monotonic()
+
+    for _ in range(4):
+        assert limiter.acquire(stop)
+
+    assert time.monotonic() - started >= 0.3
+    stop.set()
+    assert not limiter.acquire(stop)
+
+
+def test_worker_summarizes_queued_requests(settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "queue_poll_interval", 0.05)
+    monkeypatch.setattr(settings, "summary_rate_per_minute", 0)
+    monkeypatch.setattr(summaries, "generate_summary", lambda prompt: "rezumat")
+    job_ids = [make_job() for _ in range(5)]
+    for job_id in job_ids:
+        _enqueue(job_id)
+    worker = SummaryWorker(concurrency=2)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 10
+        while any(_job(job_id).summary is None for job_id in job_ids) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        worker.stop(5)
+
+    assert all(_job(job_id).summary == "rezumat" for job_id in job_ids)
+    with Session(engine) as session:
+        assert not session.exec(select(SummaryRequest)).all()
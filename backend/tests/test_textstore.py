@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.ocr import ensure_storage_dirs
+from app.services.textstore import PageStore, chunk_text, job_text, store_path, text_excerpt, write_page_store
+
+
+@pytest.fixture
+def results_dir(settings):
+    directory = ensure_storage_dirs(settings.data_dir)["results"]
+    yield directory
+    for path in [*directory.iterdir(), *store_path("x").parent.iterdir()]:
+        if path.is_file():
+            path.unlink()
+
+
+def test_page_store_round_trip(tmp_path):
+    path = tmp_path / "out.md.pages"
+    pages = [(1, "prima pagină"), (None, "fără număr"), (7, "ă" * 5000)]
+
+    write_page_store(path, pages)
+
+    with PageStore(path) as store:
+        assert len(store) == 3
+        assert list(store) == pages
+        assert (store.page_number(1), store.text_size(0)) == (None, len("prima pagină".encode()))
+        assert store[2] == (7, "ă" * 5000)
+        assert store.text(20) == "prima pagină\n\nfără n"
+        with pytest.raises(IndexError):
+            store[3]
+
+
+def test_unknown_formats_are_rejected(tmp_path):
+    path = tmp_path / "old.pages"
+    path.write_bytes(b"JSON{}" * 4)
+    with pytest.raises(ValueError):
+        PageStore(path)
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        PageStore(path)
+
+
+def test_chunk_text_splits_on_blank_lines():
+    content = "\n\n".join(["a" * 30, "b" * 30, "c" * 30, "  ", "d" * 10])
+
+    assert chunk_text(content, size=70) == [(None, f"{'a' * 30}\n\n{'b' * 30}"), (None, f"{'c' * 30}\n\n{'d' * 10}")]
+    assert chunk_text("", size=10) == []
+
+
+def test_older_outputs_get_a_page_store_on_first_read(client, results_dir, make_job):
+    (results_dir / "9_text.md").write_text("# Titlu\n\nprimul paragraf\n\nal doilea", encoding="utf-8")
+    job_id = make_job(status="completed", output_filename="9_text.md", output_mime_type="text/markdown")
+
+    response = client.get(f"/api/ocr/jobs/{job_id}/text", query_string={"limit": 1})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "total": 1,
+        "items": [{"position": 0, "page": None, "text": "# Titlu\n\nprimul paragraf\n\nal doilea"}],
+        "next_offset": None,
+    }
+    assert store_path("9_text.md").exists()
+
+
+def test_text_is_read_page_by_page(client, results_dir, make_job):
+    write_page_store(store_path("3_out.pdf"), [(page, f"pagina {page}") for page in range(1, 6)])
+    job_id = make_job(status="completed", output_filename="3_out.pdf", output_mime_type="application/pdf")
+
+    body = client.get(f"/api/ocr/jobs/{job_id}/text", query_string={"offset": 2, "limit": 2}).get_json()
+
+    assert [(item["position"], item["page"], item["text"]) for item in body["items"]] == [
+        (2, 3, "pagina 3"),
+        (3, 4, "pagina 4"),
+    ]
+    assert (body["total"], body["next_offset"]) == (5, 4)
+    assert client.get(f"/api/ocr/jobs/{make_job()}/text").status_code == 404
+
+
+def test_excerpts_follow_the_page_store(results_dir, settings, monkeypatch, make_job):
+    monkeypatch.setattr(settings, "text_excerpt_chars", 12)
+    path = store_path("5_out.md")
+    write_page_store(path, [(None, "un text destul de lung")])
+
+    assert text_excerpt("5_out.md") == "un text dest"
+    write_page_store(path, [(None, "alt text")])
+    assert text_excerpt("5_out.md") == "alt text"
+    assert text_excerpt("missing.md", legacy="rezumat vechi foarte lung") == "rezumat vech"
+    assert text_excerpt(None) is None
+
+
+def test_unreadable_stores_are_ignored(results_dir):
+    store_path("7_out.md").write_bytes(b"garbage" * 10)
+
+    assert job_text(type("Job", (), {"output_filename": "7_out.md"})()) is None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import OCRJob, UploadSession
+from app.services import uploads
+
+CONTENT = b"resumable upload " * 4096
+
+
+def _start(client, content: bytes = CONTENT) -> str:
+    response = client.post("/api/uploads", json={"filename": "scan.txt", "size": len(content)})
+    assert response.status_code == 201
+    assert response.json["offset"] == 0
+    return response.json["id"]
+
+
+def _put(client, upload_id: str, offset: int, chunk: bytes):
+    return client.put(f"/api/uploads/{upload_id}", data=chunk, headers={"Upload-Offset": str(offset)})
+
+
+def test_upload_session_lifecycle(client):
+    upload_id = _start(client)
+    middle = len(CONTENT) // 2
+
+    response = _put(client, upload_id, 0, CONTENT[:middle])
+    assert response.status_code == 200
+    assert response.json["offset"] == middle
+    assert not response.json["completed"]
+
+    # A retried chunk at a stale offset is refused with the current state.
+    response = _put(client, upload_id, 0, CONTENT[:middle])
+    assert response.status_code == 409
+    assert response.json["offset"] == middle
+
+    response = _put(client, upload_id, middle, CONTENT[middle:])
+    assert response.json["completed"]
+    assert client.get(f"/api/uploads/{upload_id}").json["offset"] == len(CONTENT)
+    assert _put(client, upload_id, len(CONTENT), b"x").status_code == 409
+
+    response = client.post("/api/ocr/jobs", data={"upload_id": upload_id})
+    assert response.status_code in (200, 201), response.json
+    with Session(engine) as session:
+        job = session.get(OCRJob, response.json["id"])
+        assert job.content_hash == hashlib.sha256(CONTENT).hexdigest()
+        assert job.size_bytes == len(CONTENT)
+        assert session.get(UploadSession, upload_id) is None
+    assert client.get(f"/api/uploads/{upload_id}").status_code == 404
+
+
+def test_hash_without_the_in_process_state(client):
+    upload_id = _start(client)
+    _put(client, upload_id, 0, CONTENT[:1000])
+    # As if the next chunk reached another worker process.
+    uploads._session_digests.clear()
+    _put(client, upload_id, 1000, CONTENT[1000:])
+
+    with Session(engine) as session:
+        upload = session.get(UploadSession, upload_id)
+        assert upload.completed
+        assert upload.content_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_incomplete_upload_cannot_start_a_job(client):
+    upload_id = _start(client)
+    _put(client, upload_id, 0, CONTENT[:10])
+    assert client.post("/api/ocr/jobs", data={"upload_id": upload_id}).status_code == 409
+
+
+def test_upload_larger_than_declared_is_refused(client):
+    upload_id = _start(client, b"small")
+    assert _put(client, upload_id, 0, b"much larger than declared").status_code == 413
+    assert client.get(f"/api/uploads/{upload_id}").json["offset"] == 0
+
+
+def test_invalid_sizes_are_refused(client, settings):
+    assert client.post("/api/uploads", json={"filename": "a.pdf", "size": 0}).status_code == 413
+    too_big = settings.upload_max_bytes + 1
+    assert client.post("/api/uploads", json={"filename": "a.pdf", "size": too_big}).status_code == 413
+
+
+def test_delete_and_expire_sessions(client, settings):
+    deleted = _start(client)
+    assert client.delete(f"/api/uploads/{deleted}").status_code == 204
+    assert client.get(f"/api/uploads/{deleted}").status_code == 404
+
+    stale = _start(client)
+    _put(client, stale, 0, CONTENT[:10])
+    with Session(engine) as session:
+        upload = session.get(UploadSession, stale)
+        upload.updated_at = datetime.utcnow() - timedelta(hours=settings.upload_session_ttl_hours + 1)
+        session.add(upload)
+        session.commit()
+        path = uploads.session_path(upload)
+        assert path.exists()
+        assert uploads.expire_upload_sessions(session) == 1
+    assert not path.exists()
+    assert client.get(f"/api/uploads/{stale}").status_code == 404
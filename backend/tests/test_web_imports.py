@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import os
+
+from bench.startup import HEAVY_MODULES, run_once
+
+
+def test_web_process_imports_no_engine_or_llm_client(tmp_path):
+    env = dict(os.environ)
+    env.update(DATABASE_URL=f"sqlite:///{tmp_path / 'web.db'}", DATA_DIR=str(tmp_path / "data"))
+
+    run = run_once(env)
+
+    assert run["status"] == 200
+    assert run["loaded"] == [], f"imported by app.main: {run['loaded']} (watched: {HEAVY_MODULES})"
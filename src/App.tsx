@@ -15,9 +15,15 @@ import WordStudio from "./pages/WordStudio";
 import NotFound from "./pages/NotFound";
 import Auth from "./pages/Auth";
 import ProtectedRoute from "./components/ProtectedRoute";
+import { useServerEvents } from "@/hooks/use-server-events";
 
 const queryClient = new QueryClient();
 
+const ServerEvents = () => {
+  useServerEvents();
+  return null;
+};
+
 const App = () => (
   <QueryClientProvider client={queryClient}>
     <TooltipProvider>
@@ -30,6 +36,7 @@ const App = () => (
             path="/*"
             element={
               <ProtectedRoute>
+                <ServerEvents />
                 <SidebarProvider defaultOpen={true}>
                   <div className="flex min-h-screen w-full">
                     <AppSidebar />
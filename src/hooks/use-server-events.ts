@@ -0,0 +1,100 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import { buildApiUrl } from "@/lib/api";
+import type { OCRJob } from "@/types/ocr";
+
+type JobEvent = Pick<
+  OCRJob,
+  | "id"
+  | "status"
+  | "progress"
+  | "error"
+  | "output_filename"
+  | "output_mime_type"
+  | "summary"
+  | "updated_at"
+>;
+
+const TERMINAL_STATUSES: OCRJob["status"][] = ["completed", "failed"];
+const BUSY_RETRY_MS = 30000;
+
+/**
+ * Keep job and document queries in sync with the server's event stream
+ * instead of polling them.
+ */
+export function useServerEvents() {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    let source: EventSource | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let hadError = false;
+
+    const connect = () => {
+      const current = new EventSource(buildApiUrl("/events"));
+      source = current;
+
+      current.onopen = () => {
+        if (hadError) {
+          // Events may have been missed while disconnected.
+          queryClient.invalidateQueries({ queryKey: ["ocr-jobs"] });
+          queryClient.invalidateQueries({ queryKey: ["word-documents"] });
+          hadError = false;
+        }
+      };
+
+      current.onerror = () => {
+        hadError = true;
+        if (current.readyState === EventSource.CLOSED) {
+          // The browser gives up after an error status, e.g. a 503 when the
+          // server has too many open streams; try again later ourselves.
+          current.close();
+          reconnectTimer = setTimeout(connect, BUSY_RETRY_MS + Math.random() * BUSY_RETRY_MS);
+        }
+      };
+
+      current.addEventListener("job", (message) => {
+        const event = JSON.parse((message as MessageEvent<string>).data) as JobEvent;
+        let known = false;
+        // Every cached job listing, with or without summaries.
+        queryClient.setQueriesData<OCRJob[]>({ queryKey: ["ocr-jobs"] }, (jobs) =>
+          jobs?.map((job) => {
+            if (job.id !== event.id) {
+              return job;
+            }
+            known = true;
+            return { ...job, ...event };
+          }),
+        );
+        queryClient.setQueryData<OCRJob>(["ocr-job", event.id], (job) =>
+          job ? { ...job, ...event } : job,
+        );
+        if (!known || TERMINAL_STATUSES.includes(event.status)) {
+          // New jobs and finished jobs carry fields (download URL, summary) that are not in the event.
+          queryClient.invalidateQueries({ queryKey: ["ocr-jobs"] });
+          queryClient.invalidateQueries({ queryKey: ["ocr-job", event.id] });
+        }
+      });
+
+      current.addEventListener("job_deleted", () => {
+        queryClient.invalidateQueries({ queryKey: ["ocr-jobs"] });
+      });
+
+      // A batch upload announces all of its jobs with a single event.
+      current.addEventListener("batch", () => {
+        queryClient.invalidateQueries({ queryKey: ["ocr-jobs"] });
+      });
+
+      current.addEventListener("word_document", () => {
+        queryClient.invalidateQueries({ queryKey: ["word-documents"] });
+      });
+    };
+
+    connect();
+
+    return () => {
+      clearTimeout(reconnectTimer);
+      source?.close();
+    };
+  }, [queryClient]);
+}
@@ -55,6 +55,68 @@ export async function postFormData<T>(path: string, formData: FormData): Promise
   return handleResponse<T>(response);
 }
 
+interface UploadSession {
+  id: string;
+  filename: string;
+  size: number | null;
+  offset: number;
+  completed: boolean;
+  chunk_size: number;
+}
+
+function uploadSessionStorageKey(file: File): string {
+  return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function findResumableUpload(file: File): Promise<UploadSession | null> {
+  const storedId = window.localStorage.getItem(uploadSessionStorageKey(file));
+  if (!storedId) {
+    return null;
+  }
+  const response = await fetch(`${API_BASE_URL}/uploads/${storedId}`);
+  if (!response.ok) {
+    window.localStorage.removeItem(uploadSessionStorageKey(file));
+    return null;
+  }
+  return response.json() as Promise<UploadSession>;
+}
+
+/**
+ * Upload a file in chunks to a resumable upload session and return its id.
+ * An interrupted upload of the same file continues from the last stored offset.
+ */
+export async function uploadFileInChunks(
+  file: File,
+  onProgress?: (uploadedBytes: number, totalBytes: number) => void,
+): Promise<string> {
+  let session =
+    (await findResumableUpload(file)) ??
+    (await postJSON<UploadSession>("/uploads", { filename: file.name, size: file.size }));
+  window.localStorage.setItem(uploadSessionStorageKey(file), session.id);
+
+  while (!session.completed) {
+    const chunk = file.slice(session.offset, session.offset + session.chunk_size);
+    const response = await fetch(`${API_BASE_URL}/uploads/${session.id}`, {
+      method: "PUT",
+      headers: {
+        "Content-Type": "application/octet-stream",
+        "Upload-Offset": String(session.offset),
+      },
+      body: chunk,
+    });
+    if (response.status === 409) {
+      // The server has a different offset (e.g. after a lost response); continue from it.
+      session = (await response.json()) as UploadSession;
+      continue;
+    }
+    session = await handleResponse<UploadSession>(response);
+    onProgress?.(session.offset, file.size);
+  }
+
+  window.localStorage.removeItem(uploadSessionStorageKey(file));
+  return session.id;
+}
+
 export function buildApiUrl(path: string): string {
   return `${API_BASE_URL}${path}`;
 }
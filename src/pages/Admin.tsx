@@ -9,7 +9,7 @@ import { Textarea } from "@/components/ui/textarea";
 import { Settings, Users, Database, FolderTree, FileText, Sparkles } from "lucide-react";
 import { useToast } from "@/hooks/use-toast";
 import { getJSON, postJSON } from "@/lib/api";
-import type { OCREngineSetting } from "@/types/settings";
+import { OCR_ENGINE_LABELS, type OCREngineName, type OCREngineSetting } from "@/types/settings";
 import type { OCRJob } from "@/types/ocr";
 import type { Folder } from "@/types/folder";
 import type { WordDocument } from "@/types/word";
@@ -36,7 +36,7 @@ export default function Admin() {
   const { toast } = useToast();
   const queryClient = useQueryClient();
   const [selectedUser, setSelectedUser] = useState("casian202");
-  const [selectedEngine, setSelectedEngine] = useState<"docling" | "ocrmypdf">("docling");
+  const [selectedEngine, setSelectedEngine] = useState<OCREngineName>("auto");
 
   const { data: engineSetting, isLoading: isLoadingEngine } = useQuery({
     queryKey: ["ocr-engine"],
@@ -65,7 +65,7 @@ export default function Admin() {
   }, [engineSetting]);
 
   const updateEngineMutation = useMutation({
-    mutationFn: (engine: "docling" | "ocrmypdf") =>
+    mutationFn: (engine: OCREngineName) =>
       postJSON<OCREngineSetting>("/settings/ocr-engine", { engine }),
     onSuccess: (data) => {
       queryClient.setQueryData(["ocr-engine"], data);
@@ -206,19 +206,21 @@ export default function Admin() {
               Setări motor OCR
             </CardTitle>
             <CardDescription>
-              Motorul curent: {selectedEngine === "docling" ? "Docling" : "OCRmyPDF"}
+              Motorul curent: {OCR_ENGINE_LABELS[selectedEngine]}
             </CardDescription>
           </CardHeader>
           <CardContent className="space-y-4">
             <div className="space-y-2">
               <Label htmlFor="ocr-engine">Motor OCR implicit:</Label>
-              <Select value={selectedEngine} onValueChange={(value) => setSelectedEngine(value as "docling" | "ocrmypdf")}>
+              <Select value={selectedEngine} onValueChange={(value) => setSelectedEngine(value as OCREngineName)}>
                 <SelectTrigger id="ocr-engine" disabled={isLoadingEngine || updateEngineMutation.isPending}>
                   <SelectValue />
                 </SelectTrigger>
                 <SelectContent className="bg-popover z-50">
+                  <SelectItem value="auto">Automat (text existent sau OCR)</SelectItem>
                   <SelectItem value="docling">Docling</SelectItem>
                   <SelectItem value="ocrmypdf">OCRmyPDF</SelectItem>
+                  <SelectItem value="text">Extragere text (fără OCR)</SelectItem>
                 </SelectContent>
               </Select>
               <p className="text-xs text-muted-foreground">
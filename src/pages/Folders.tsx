@@ -279,7 +279,11 @@ export default function Folders() {
                         )}
                         <div className="flex items-center gap-2 text-xs text-muted-foreground">
                           <FileText className="h-3 w-3" />
-                          <span>{folder.document_count} documente</span>
+                          <span>
+                            {folder.document_count} documente
+                            {folder.total_document_count > folder.document_count &&
+                              ` (${folder.total_document_count} cu subfolderele)`}
+                          </span>
                         </div>
                       </div>
                     </div>
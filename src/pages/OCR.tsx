@@ -35,9 +35,9 @@ import {
 } from "lucide-react";
 import { Switch } from "@/components/ui/switch";
 import { Label } from "@/components/ui/label";
-import { getJSON, postFormData, deleteRequest, patchJSON } from "@/lib/api";
+import { getJSON, postFormData, deleteRequest, patchJSON, uploadFileInChunks } from "@/lib/api";
 import type { OCRJob, OCRJobDetail } from "@/types/ocr";
-import type { OCREngineSetting } from "@/types/settings";
+import { OCR_ENGINE_LABELS, type OCREngineName, type OCREngineSetting } from "@/types/settings";
 import { useToast } from "@/hooks/use-toast";
 
 interface AdvancedOptionsState {
@@ -50,6 +50,31 @@ interface AdvancedOptionsState {
   outputType: "pdfa" | "pdf" | "txt";
 }
 
+// Job listings leave out summaries unless they are asked for.
+const JOB_LIST_PATH = `/ocr/jobs?fields=${[
+  "id",
+  "original_filename",
+  "engine",
+  "resolved_engine",
+  "auto_detect",
+  "language",
+  "folder",
+  "folder_id",
+  "status",
+  "progress",
+  "error",
+  "output_filename",
+  "output_mime_type",
+  "summary",
+  "priority_class",
+  "page_count",
+  "text_page_count",
+  "ocr_page_count",
+  "created_at",
+  "updated_at",
+  "download_url",
+].join(",")}`;
+
 const languageOptions = [
   { label: "Română", value: "romanian" },
   { label: "English", value: "english" },
@@ -71,6 +96,9 @@ const statusConfig: Record<
   failed: { label: "Eroare", icon: AlertCircle, variant: "bg-red-500/10 text-red-600" },
 };
 
+// Larger files go through resumable chunked uploads so a dropped connection does not restart them.
+const CHUNKED_UPLOAD_THRESHOLD = 32 * 1024 * 1024;
+
 const emptyAdvancedOptions: AdvancedOptionsState = {
   optimizationLevel: 1,
   rotatePages: true,
@@ -94,7 +122,7 @@ export default function OCR() {
   const [searchQuery, setSearchQuery] = useState("");
   const [processingProgress, setProcessingProgress] = useState(0);
   const [isProcessing, setIsProcessing] = useState(false);
-  const [selectedEngine, setSelectedEngine] = useState<"docling" | "ocrmypdf">("docling");
+  const [selectedEngine, setSelectedEngine] = useState<OCREngineName>("auto");
   const [activeJobId, setActiveJobId] = useState<number | null>(null);
   const [uploadedFile, setUploadedFile] = useState<File | null>(null);
 
@@ -118,16 +146,14 @@ export default function OCR() {
     data: jobs = [],
     isFetching: jobsLoading,
   } = useQuery({
-    queryKey: ["ocr-jobs"],
-    queryFn: () => getJSON<OCRJob[]>("/ocr/jobs"),
-    refetchInterval: 5000,
+    queryKey: ["ocr-jobs", "summaries"],
+    queryFn: () => getJSON<OCRJob[]>(JOB_LIST_PATH),
   });
 
   const { data: activeJob } = useQuery({
     queryKey: ["ocr-job", activeJobId],
     queryFn: () => getJSON<OCRJobDetail>(`/ocr/jobs/${activeJobId}`),
     enabled: Boolean(activeJobId),
-    refetchInterval: activeJobId ? 2000 : false,
   });
 
   useEffect(() => {
@@ -174,7 +200,15 @@ export default function OCR() {
   }, [jobs, searchQuery]);
 
   const startOcrMutation = useMutation({
-    mutationFn: (formData: FormData) => postFormData<OCRJob>("/ocr/jobs", formData),
+    mutationFn: async ({ file, formData }: { file: File; formData: FormData }) => {
+      if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+        const uploadId = await uploadFileInChunks(file);
+        formData.append("upload_id", uploadId);
+      } else {
+        formData.append("file", file);
+      }
+      return postFormData<OCRJob>("/ocr/jobs", formData);
+    },
     onSuccess: (job) => {
       setActiveJobId(job.id);
       setProcessingProgress(job.progress);
@@ -223,7 +257,6 @@ export default function OCR() {
     }
 
     const formData = new FormData();
-    formData.append("file", uploadedFile);
     formData.append("auto_detect", String(autoDetectLanguage));
     if (!autoDetectLanguage && selectedLanguage) {
       formData.append("language", selectedLanguage);
@@ -246,7 +279,7 @@ export default function OCR() {
 
     formData.append("options", JSON.stringify(optionsPayload));
 
-    startOcrMutation.mutate(formData);
+    startOcrMutation.mutate({ file: uploadedFile, formData });
   };
 
   const handleDeleteJob = (jobId: number) => {
@@ -269,7 +302,7 @@ export default function OCR() {
     window.open(job.download_url, "_blank", "noopener");
   };
 
-  const engineLabel = selectedEngine === "ocrmypdf" ? "OCRmyPDF" : "Docling";
+  const engineLabel = OCR_ENGINE_LABELS[selectedEngine] ?? selectedEngine;
 
   return (
     <div className="animate-fade-in space-y-6">
@@ -23,7 +23,6 @@ export default function WordStudio() {
   const { data: documents = [] } = useQuery({
     queryKey: ["word-documents"],
     queryFn: () => getJSON<WordDocument[]>("/word/documents"),
-    refetchInterval: 8000,
   });
 
   const generateDocumentMutation = useMutation({
@@ -7,6 +7,7 @@ export interface Folder {
   created_at: string;
   updated_at: string;
   document_count: number;
+  total_document_count: number;
 }
 
 export interface FolderCreate {
@@ -4,6 +4,7 @@ export interface OCRJob {
   id: number;
   original_filename: string;
   engine: string;
+  resolved_engine?: string | null;
   auto_detect: boolean;
   language?: string | null;
   folder?: string | null;
@@ -15,11 +16,63 @@ export interface OCRJob {
   output_mime_type?: string | null;
   text_excerpt?: string | null;
   summary?: string | null;
+  priority_class?: "interactive" | "bulk";
+  page_count?: number | null;
+  text_page_count?: number | null;
+  ocr_page_count?: number | null;
   created_at: string;
   updated_at: string;
   download_url?: string | null;
 }
 
+export interface OCRBatch {
+  id: number;
+  engine: string;
+  folder_id?: number | null;
+  priority_class: "interactive" | "bulk";
+  total_jobs: number;
+  status: "queued" | "processing" | "completed";
+  progress: number;
+  jobs: number;
+  queued: number;
+  processing: number;
+  completed: number;
+  failed: number;
+  created_at: string;
+  jobs_url: string;
+}
+
 export interface OCRJobDetail extends OCRJob {
   options?: Record<string, unknown> | null;
 }
+
+export interface SearchHit {
+  job_id: number;
+  original_filename: string;
+  page: number | null;
+  position: number;
+  folder_id?: number | null;
+  engine: string;
+  score: number;
+  /** HTML-escaped text with matches wrapped in <mark>. */
+  snippet: string;
+}
+
+export interface SearchResponse {
+  items: SearchHit[];
+  next_offset: number | null;
+  ranking: "full" | "partial" | "newest";
+  took_ms: number;
+}
+
+export interface OCRJobTextPage {
+  position: number;
+  page: number | null;
+  text: string;
+}
+
+export interface OCRJobText {
+  total: number;
+  items: OCRJobTextPage[];
+  next_offset: number | null;
+}
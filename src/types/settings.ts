@@ -1,3 +1,12 @@
+export type OCREngineName = "auto" | "docling" | "ocrmypdf" | "text";
+
+export const OCR_ENGINE_LABELS: Record<OCREngineName, string> = {
+  auto: "Automat",
+  docling: "Docling",
+  ocrmypdf: "OCRmyPDF",
+  text: "Extragere text",
+};
+
 export interface OCREngineSetting {
-  engine: "docling" | "ocrmypdf";
+  engine: OCREngineName;
 }